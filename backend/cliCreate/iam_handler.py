@@ -11,6 +11,7 @@ action 필드를 기반으로 4가지 기능을 지원합니다:
 
 import json
 from .base_handler import BaseHandler
+from backend.grok.policy_compactor import compact_policy
 
 
 class IAMHandler(BaseHandler):
@@ -201,7 +202,7 @@ class IAMHandler(BaseHandler):
                             예: {"s3": ["GetObject"], "ec2": ["StartInstances"]}
         
         Returns:
-            dict: IAM Policy JSON 객체
+            dict: IAM Policy JSON 객체 (중복 액션 제거, MBV_POLICY_WILDCARDS=1 이면 안전한 경우 와일드카드로 압축)
         """
         # 모든 서비스의 액션을 하나의 리스트로 합칩니다.
         actions = []
@@ -222,4 +223,5 @@ class IAMHandler(BaseHandler):
             ]
         }
         
-        return policy
+        # 같은 액션 중복 선택 / 같은 접두사의 액션 묶음을 줄여서 정책 크기 제한에 덜 걸리게 함
+        return compact_policy(policy)
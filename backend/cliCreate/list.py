@@ -1,13 +1,14 @@
-import boto3
 from fastapi import APIRouter, Request
 
+from backend.common import aws_clients
+
 router = APIRouter()
 
 
 # AWS IAM의 사용자, 역할, 그룹과 직접 연결된 정책 불러오기
 @router.post("/iam_list")
 async def get_detailed_inventory():
-    iam = boto3.client('iam')
+    iam = aws_clients.iam()
     inventory = {"user": [], "role": [], "group": []}
 
     try:
@@ -87,8 +88,8 @@ async def ec2_list(request: Request):
     
 
 
-    # boto3 EC2 클라이언트 생성
-    ec2_client = boto3.client('ec2', region_name=region)  # 필요 시 region 조정
+    # EC2 클라이언트 (리전별 공용 클라이언트 재사용)
+    ec2_client = aws_clients.ec2(region)  # 필요 시 region 조정
 
     # 모든 인스턴스 정보 가져오기
     response = ec2_client.describe_instances()
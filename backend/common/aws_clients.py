@@ -0,0 +1,67 @@
+# AWS 클라이언트 공용 팩토리
+# boto3.client() 는 호출할 때마다 자격 증명/엔드포인트 확인과 새 커넥션 풀 생성을 반복하므로
+# (서비스, 리전) 별로 프로세스 전체에서 클라이언트 1개만 만들어 재사용한다.
+# botocore 클라이언트는 스레드 간 공유해도 안전하며, 커넥션 풀 크기는 분석 스레드 수보다 넉넉하게 잡는다.
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+# --- 설정 ---
+AWS_REGION = os.getenv("MBV_AWS_REGION", "ap-northeast-1")
+# 클라이언트 1개가 유지하는 최대 HTTP 커넥션 수 (동시에 호출하는 스레드 수 이상)
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("MBV_AWS_MAX_POOL_CONNECTIONS", "32"))
+AWS_CONNECT_TIMEOUT_SEC = float(os.getenv("MBV_AWS_CONNECT_TIMEOUT_SEC", "5"))
+AWS_READ_TIMEOUT_SEC = float(os.getenv("MBV_AWS_READ_TIMEOUT_SEC", "60"))
+# LLM 응답(최대 4096 토큰 + reasoning)은 1분을 넘길 수 있어 Bedrock 은 읽기 타임아웃을 따로 둔다
+BEDROCK_READ_TIMEOUT_SEC = float(os.getenv("MBV_BEDROCK_READ_TIMEOUT_SEC", "300"))
+# 재시도 (최초 호출 포함 총 시도 횟수): adaptive 모드는 스로틀링 응답을 받으면 클라이언트 쪽에서 요청 속도도 줄인다
+AWS_MAX_ATTEMPTS = int(os.getenv("MBV_AWS_MAX_ATTEMPTS", "5"))
+
+_READ_TIMEOUTS = {"bedrock-runtime": BEDROCK_READ_TIMEOUT_SEC}
+
+# boto3 기본 세션은 스레드 안전하지 않으므로 전용 세션에서 잠금을 잡고 생성
+_session = boto3.session.Session()
+_clients = {}
+_lock = threading.Lock()
+
+
+def client_config(service_name: str) -> Config:
+    return Config(
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=AWS_CONNECT_TIMEOUT_SEC,
+        read_timeout=_READ_TIMEOUTS.get(service_name, AWS_READ_TIMEOUT_SEC),
+        retries={"total_max_attempts": AWS_MAX_ATTEMPTS, "mode": "adaptive"},
+    )
+
+
+def get_client(service_name: str, region_name: str = None):
+    """(서비스, 리전) 별 공용 클라이언트 (최초 1회만 생성)"""
+    key = (service_name, region_name or AWS_REGION)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _session.client(service_name, region_name=key[1], config=client_config(service_name))
+                _clients[key] = client
+    return client
+
+
+def bedrock_runtime(region_name: str = None):
+    return get_client("bedrock-runtime", region_name)
+
+
+def lambda_client(region_name: str = None):
+    return get_client("lambda", region_name)
+
+
+def iam():
+    # IAM 은 글로벌 서비스라 리전과 무관
+    return get_client("iam")
+
+
+def ec2(region_name: str = None):
+    return get_client("ec2", region_name)
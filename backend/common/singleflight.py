@@ -0,0 +1,111 @@
+# 동일 요청 합치기 (single-flight)
+# 같은 키(요청 지문)로 동시에 들어온 요청은 먼저 온 요청이 시작한 계산 1개를 함께 기다리고 같은 결과를 받는다.
+# 계산은 요청과 분리된 task 로 실행하므로 먼저 온 요청의 연결이 끊겨도 나머지 요청은 계속 기다릴 수 있다.
+# 계산이 끝나면 키를 지우므로 그 뒤에 들어온 요청은 새로 계산한다 (결과 재사용은 analysis_cache 가 담당).
+# 모든 메서드는 이벤트 루프 스레드에서만 호출한다 (잠금 불필요).
+import asyncio
+
+
+class _StreamFlight:
+    """스트리밍 계산 1개: 받은 이벤트를 모두 보관해서 늦게 합류한 구독자에게도 처음부터 보내준다"""
+
+    def __init__(self):
+        self.events = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task = None
+
+
+class SingleFlight:
+    """
+    사용 예:
+        flight = SingleFlight()
+        result = await flight.do(key, lambda: run_in_analysis_executor(func, *args))
+        async for event in flight.stream(key, lambda: iterate_in_analysis_executor(gen_func, *args)):
+            ...
+    """
+
+    def __init__(self, name: str = "single-flight"):
+        self.name = name
+        self._calls = {}      # 키 → asyncio.Task
+        self._streams = {}    # 키 → _StreamFlight
+        self.started = 0
+        self.joined = 0
+
+    async def do(self, key: str, coro_factory):
+        """coro_factory() 가 만드는 코루틴을 키당 1번만 실행하고 결과를 함께 받음"""
+        task = self._calls.get(key)
+        if task is None:
+            self.started += 1
+            task = asyncio.ensure_future(coro_factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish_call(key, t))
+        else:
+            self.joined += 1
+            print(f"🔁 [{self.name}] 진행 중인 동일 요청에 합류 (키 {key[:12]})")
+        # shield: 이 요청이 취소돼도(연결 종료) 공유 계산은 계속
+        return await asyncio.shield(task)
+
+    def _finish_call(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # 기다리던 요청이 모두 취소된 경우에도 "예외 미확인" 경고가 나지 않도록
+            task.exception()
+
+    async def stream(self, key: str, agen_factory):
+        """
+        agen_factory() 가 만드는 비동기 제너레이터를 키당 1개만 실행하고 이벤트를 모든 구독자에게 보냄.
+        구독자가 모두 떠나면 계산을 취소한다.
+        """
+        flight = self._streams.get(key)
+        if flight is None:
+            self.started += 1
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            flight.task = asyncio.ensure_future(self._pump(key, flight, agen_factory()))
+        else:
+            self.joined += 1
+            print(f"🔁 [{self.name}] 진행 중인 동일 스트림에 합류 (키 {key[:12]}, 받은 이벤트 {len(flight.events)}건부터 재생)")
+
+        flight.subscribers += 1
+        sent = 0
+        try:
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: len(flight.events) > sent or flight.done)
+                    pending = flight.events[sent:]
+                    done = flight.done
+                for item in pending:
+                    yield item
+                sent += len(pending)
+                if done and sent == len(flight.events):
+                    break
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                print(f"⏹️ [{self.name}] 구독자가 모두 떠나 스트림 계산 중단 (키 {key[:12]})")
+                flight.task.cancel()
+
+    async def _pump(self, key, flight: _StreamFlight, agen):
+        try:
+            async for item in agen:
+                async with flight.changed:
+                    flight.events.append(item)
+                    flight.changed.notify_all()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            flight.error = e
+        finally:
+            # 제너레이터 정리(취소 신호 전달 등)를 지금 실행
+            await agen.aclose()
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
@@ -0,0 +1,176 @@
+# 분석 파이프라인 단계별 지연 시간 / 토큰 수 계측
+# 단계(stage)마다 걸린 시간과 LLM 입력/출력 토큰 수를
+#   1) 프로세스 전체 히스토그램 → GET /metrics (Prometheus 텍스트 형식, 별도 라이브러리 없이 직접 출력)
+#   2) 요청 1건의 timings 블록 → /mbv_search 응답
+# 두 곳에 동시에 기록한다.
+#
+# 요청 단위 기록은 contextvars 로 넘기므로 함수 인자를 바꿀 필요가 없다.
+# 다른 스레드 풀(map_executor 등)로 넘기는 작업은 contextvars.copy_context().run 으로 감싸야 같은 요청에 기록된다.
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+# 단계 이름 (응답 timings / 메트릭 label 에 그대로 쓰임)
+STAGES = (
+    "file_read",        # 인프라 JSON 파일 읽기
+    "embedding",        # 검색 질의 임베딩 (캐시 적중 포함)
+    "vector_search",    # Qdrant(또는 numpy) 하이브리드 검색
+    "context_build",    # 문서 조회 + 권한 표 + 토큰 예산 맞추기
+    "llm_first_token",  # LLM 요청 → 첫 응답 조각
+    "llm_call",         # LLM 요청 → 응답 끝 (이어쓰기 호출은 각각 1회)
+    "json_parse",       # 응답 JSON 파싱 (스트리밍 중 파싱 시간 합계)
+)
+
+# 히스토그램 버킷 (초 / 토큰)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+
+
+class Histogram:
+    """label 값별 누적 히스토그램 (스레드 안전)"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}    # label 값 → [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        for label_value, series in sorted(snapshot.items()):
+            label = f'{self.label}="{label_value}"'
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{label}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{label}}} {series[-1]}")
+        return lines
+
+
+stage_duration = Histogram(
+    "mbv_stage_duration_seconds", "Analysis pipeline stage latency", "stage", DURATION_BUCKETS,
+)
+llm_tokens = Histogram(
+    "mbv_llm_tokens", "LLM tokens per call", "direction", TOKEN_BUCKETS,
+)
+request_duration = Histogram(
+    "mbv_request_duration_seconds", "End-to-end analysis request latency", "endpoint", DURATION_BUCKETS,
+)
+
+
+class RequestTimings:
+    """요청 1건의 단계별 시간 / 토큰 합계 (map 단계에서 여러 스레드가 동시에 기록)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}     # 단계 → {"count", "total_sec", "max_sec"}
+        self.tokens = {"input": 0, "output": 0, "calls": 0, "estimated": False}
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"count": 0, "total_sec": 0.0, "max_sec": 0.0})
+            entry["count"] += 1
+            entry["total_sec"] += seconds
+            entry["max_sec"] = max(entry["max_sec"], seconds)
+
+    def add_tokens(self, input_tokens: int, output_tokens: int, estimated: bool):
+        with self._lock:
+            self.tokens["input"] += input_tokens
+            self.tokens["output"] += output_tokens
+            self.tokens["calls"] += 1
+            self.tokens["estimated"] = self.tokens["estimated"] or estimated
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            stages = {
+                stage: {k: round(v, 4) if isinstance(v, float) else v for k, v in entry.items()}
+                for stage, entry in self.stages.items()
+            }
+            return {
+                "total_sec": round(time.perf_counter() - self.started, 4),
+                "stages": stages,
+                "tokens": dict(self.tokens),
+            }
+
+
+_current = contextvars.ContextVar("mbv_request_timings", default=None)
+
+
+def current_timings():
+    return _current.get()
+
+
+@contextmanager
+def request_timings(endpoint: str):
+    """요청 1건 계측 시작 (with 블록 안의 stage/record_tokens 가 이 요청에 기록됨)"""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        request_duration.observe(endpoint, time.perf_counter() - timings.started)
+        try:
+            _current.reset(token)
+        except ValueError:
+            # 제너레이터가 다른 스레드에서 닫힌 경우 (SSE 연결 종료 등)
+            pass
+
+
+def observe_stage(stage: str, seconds: float):
+    stage_duration.observe(stage, seconds)
+    timings = _current.get()
+    if timings is not None:
+        timings.add_stage(stage, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """with stage("embedding"): ... → 걸린 시간을 기록"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+
+def record_tokens(input_tokens: int, output_tokens: int, estimated: bool = False):
+    """LLM 호출 1회의 토큰 수 (estimated: 응답에 usage 가 없어 직접 센 값)"""
+    llm_tokens.observe("input", input_tokens)
+    llm_tokens.observe("output", output_tokens)
+    timings = _current.get()
+    if timings is not None:
+        timings.add_tokens(input_tokens, output_tokens, estimated)
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in (request_duration, stage_duration, llm_tokens):
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
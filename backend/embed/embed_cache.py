@@ -0,0 +1,184 @@
+# 임베딩 공용 모듈 (로컬 디스크 캐시 포함)
+# mbv_embed / mbv_search / backend/test 스크립트가 모두 이 모듈을 통해 임베딩한다.
+# 같은 (모델, input_type, 텍스트) 조합은 SQLite 캐시에서 바로 꺼내므로 Bedrock 호출이 발생하지 않는다.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+# 공용 AWS 클라이언트 (커넥션 풀/재시도/타임아웃 설정 포함)
+from backend.common.aws_clients import bedrock_runtime
+
+# --- 경로 설정 ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# 캐시 파일 위치 (환경변수로 변경 가능)
+CACHE_DB_PATH = os.getenv(
+    "MBV_EMBED_CACHE_PATH",
+    os.path.join(BASE_DIR, "..", "json", "cache", "embed_cache.sqlite3"),
+)
+
+# --- 설정 ---
+REGION = "ap-northeast-1"
+MODEL_ID = "cohere.embed-v4:0"
+# cohere.embed-v4 는 한 번의 invoke_model 호출에 texts 를 최대 96개까지 받음
+EMBED_BATCH_SIZE = 96
+# 캐시 최대 크기 (벡터 바이트 합계 기준). 초과하면 오래 안 쓴 항목부터 삭제
+CACHE_MAX_BYTES = int(os.getenv("MBV_EMBED_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def _get_bedrock(region):
+    """리전별 bedrock-runtime 클라이언트 (프로세스 전체에서 한 번만 생성)"""
+    return bedrock_runtime(region)
+
+
+class EmbeddingCache:
+    """
+    (model_id, input_type, SHA-256(text)) 를 키로 벡터를 저장하는 SQLite 캐시입니다.
+    벡터는 float32 바이트로 저장하고, 전체 크기가 max_bytes 를 넘으면 LRU 순서로 지웁니다.
+    """
+
+    def __init__(self, path: str = CACHE_DB_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = os.path.normpath(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id    TEXT NOT NULL,
+                input_type  TEXT NOT NULL,
+                text_sha256 TEXT NOT NULL,
+                vector      BLOB NOT NULL,
+                last_used   REAL NOT NULL,
+                PRIMARY KEY (model_id, input_type, text_sha256)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model_id: str, input_type: str, texts: list) -> dict:
+        """캐시에 있는 벡터만 {texts 인덱스: 벡터} 로 반환"""
+        hashes = [self.text_hash(t) for t in texts]
+        found = {}
+        with self._lock:
+            now = time.time()
+            for h in set(hashes):
+                row = self._conn.execute(
+                    "SELECT vector FROM embeddings WHERE model_id=? AND input_type=? AND text_sha256=?",
+                    (model_id, input_type, h),
+                ).fetchone()
+                if row is not None:
+                    found[h] = array("f", row[0]).tolist()
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used=? WHERE model_id=? AND input_type=? AND text_sha256=?",
+                    [(now, model_id, input_type, h) for h in found],
+                )
+                self._conn.commit()
+        result = {i: found[h] for i, h in enumerate(hashes) if h in found}
+        self.hits += len(result)
+        self.misses += len(texts) - len(result)
+        return result
+
+    def put_many(self, model_id: str, input_type: str, texts: list, vectors: list):
+        with self._lock:
+            now = time.time()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model_id, input_type, text_sha256, vector, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (model_id, input_type, self.text_hash(t), array("f", v).tobytes(), now)
+                    for t, v in zip(texts, vectors)
+                ],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """전체 벡터 크기가 max_bytes 를 넘으면 last_used 가 오래된 순으로 삭제 (lock 안에서 호출)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 매번 경계에서 다시 넘치지 않도록 90% 까지 비운다
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_used ASC"
+        ).fetchall()
+        evict_ids = []
+        for rowid, size in rows:
+            if total <= target:
+                break
+            evict_ids.append((rowid,))
+            total -= size
+        self._conn.executemany("DELETE FROM embeddings WHERE rowid=?", evict_ids)
+        print(f"🧹 임베딩 캐시 정리: {len(evict_ids)}건 삭제")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> EmbeddingCache:
+    """프로세스 전역 캐시 (처음 사용할 때 생성)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
+
+
+def embed_texts(texts, input_type="search_document", model_id=MODEL_ID, region=REGION):
+    """texts 리스트를 한 번의 invoke_model 호출로 임베딩 (캐시 사용 안 함, 입력 순서대로 반환)"""
+    native_request = {
+        "texts": texts,
+        "input_type": input_type,
+        "truncate": "NONE"
+    }
+    response = _get_bedrock(region).invoke_model(modelId=model_id, body=json.dumps(native_request))
+    res_body = json.loads(response.get('body').read())
+    embeddings = res_body.get('embeddings')
+    vectors = embeddings.get('float') if isinstance(embeddings, dict) else embeddings
+    if len(vectors) != len(texts):
+        raise ValueError(f"임베딩 개수 불일치: 요청 {len(texts)}건, 응답 {len(vectors)}건")
+    return vectors
+
+
+def get_embeddings(texts, input_type="search_document", model_id=MODEL_ID, region=REGION,
+                   batch_size=EMBED_BATCH_SIZE):
+    """
+    캐시를 거쳐 texts 를 임베딩합니다.
+    캐시에 없는 텍스트만 batch_size 개씩 묶어서 Bedrock 을 호출하고, 결과는 캐시에 저장합니다.
+    """
+    cache = get_cache()
+    vectors = cache.get_many(model_id, input_type, texts)
+    missing = [i for i in range(len(texts)) if i not in vectors]
+
+    # 같은 텍스트가 여러 번 들어온 경우 한 번만 요청
+    unique_missing = list(dict.fromkeys(texts[i] for i in missing))
+    fetched = {}
+    for start in range(0, len(unique_missing), batch_size):
+        batch = unique_missing[start:start + batch_size]
+        batch_vectors = embed_texts(batch, input_type=input_type, model_id=model_id, region=region)
+        cache.put_many(model_id, input_type, batch, batch_vectors)
+        fetched.update(zip(batch, batch_vectors))
+
+    for i in missing:
+        vectors[i] = fetched[texts[i]]
+    return [vectors[i] for i in range(len(texts))]
+
+
+def get_embedding(text, input_type="search_document", model_id=MODEL_ID, region=REGION):
+    """텍스트 하나를 벡터로 변환 (캐시 사용)"""
+    return get_embeddings([text], input_type=input_type, model_id=model_id, region=region)[0]
@@ -0,0 +1,72 @@
+# 인프라/시나리오 JSON 키워드 추출 (하이브리드 검색의 sparse 벡터용)
+# backend/test/test_keyword_overlap.py 에서 검증한 추출 규칙을 운영 검색 경로로 옮긴 모듈.
+# 추출한 키워드 집합을 해시 인덱스 sparse 벡터로 바꿔 Qdrant 에 dense 벡터와 함께 저장한다.
+import json
+import math
+import re
+import zlib
+
+
+def extract_keywords(json_data):
+    """JSON 데이터에서 의미있는 키워드를 추출"""
+    text = json.dumps(json_data) if not isinstance(json_data, str) else json_data
+
+    keywords = set()
+
+    # 1. Action 키워드 추출
+    # "Action": ["iam:Get*", ...] 또는 "Action": "sts:AssumeRole"
+    action_list_matches = re.findall(r'"Action":\s*\[([^\]]+)\]', text)
+    for match in action_list_matches:
+        for kw in re.findall(r'"([^"]+)"', match):
+            keywords.add(kw)
+
+    action_single_matches = re.findall(r'"Action":\s*"([^"]+)"', text)
+    for kw in action_single_matches:
+        keywords.add(kw)
+
+    # 2. 노드 타입 추출
+    for match in re.findall(r'"type":\s*"([^"]+)"', text):
+        keywords.add(f"type:{match}")
+    for match in re.findall(r'"node_type":\s*"([^"]+)"', text):
+        keywords.add(f"type:{match}")
+
+    # 3. Edge 관계 추출
+    for match in re.findall(r'"relation":\s*"([^"]+)"', text):
+        keywords.add(f"relation:{match}")
+
+    # 4. 정책 이름 추출
+    for match in re.findall(r'"PolicyName":\s*"([^"]+)"', text):
+        keywords.add(f"policy:{match}")
+
+    # 5. 서비스 접두사 추출 (Action에서)
+    service_prefixes = set()
+    for kw in list(keywords):
+        if ":" in kw and not kw.startswith(("type:", "relation:", "policy:")):
+            service_prefixes.add(f"service:{kw.split(':')[0]}")
+    keywords.update(service_prefixes)
+
+    return keywords
+
+
+def jaccard_similarity(set1, set2):
+    """두 집합의 Jaccard 유사도 계산"""
+    intersection = set1 & set2
+    union = set1 | set2
+    return len(intersection) / len(union) if union else 0
+
+
+def keyword_index(keyword):
+    """키워드 → sparse 벡터 인덱스 (프로세스/실행과 무관하게 항상 같은 값인 CRC32 사용)"""
+    return zlib.crc32(keyword.encode("utf-8"))
+
+
+def to_sparse_vector(keywords):
+    """
+    키워드 집합을 (indices, values) 로 변환.
+    값은 1/sqrt(n) 으로 정규화해서 두 sparse 벡터의 내적이 키워드 집합의 코사인 유사도가 되도록 한다.
+    """
+    indices = sorted({keyword_index(kw) for kw in keywords})
+    if not indices:
+        return [], []
+    weight = 1.0 / math.sqrt(len(indices))
+    return indices, [weight] * len(indices)
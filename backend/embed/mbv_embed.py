@@ -1,10 +1,22 @@
 # 벡터db 저장용 임베딩
 # 라우팅x - 개별 실행. 사이트에 들어가지 않는 내용이라 굳이 라우팅 할 필요 없음.
-import boto3
 import json
 import os  # 경로 계산을 위해 추가
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+import argparse
+import hashlib
+from botocore.exceptions import ClientError
+from qdrant_client.models import PointStruct, PointIdsList
+import sys
+
+# 개별 실행(python mbv_embed.py) 시에도 backend 패키지를 찾을 수 있도록 프로젝트 루트를 경로에 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+# 공용 임베딩 모듈 (디스크 캐시 포함)
+from backend.embed.embed_cache import get_embeddings, EMBED_BATCH_SIZE
+# 컬렉션/별칭 관리 공용 모듈
+from backend.embed import vector_store
+from backend.embed.vector_store import q_client, COLLECTION_ALIAS, ensure_collection, supports_sparse, make_vector
+# 하이브리드 검색용 키워드(sparse 벡터) 추출
+from backend.embed.keyword_extract import extract_keywords, to_sparse_vector
 
 # Request 임포트
 from fastapi import Request 
@@ -21,64 +33,253 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # mbv_embed.py 위치에서 한 단계 위(..)로 가서 json/pandyo/pandyo.json 불러오기
 JSON_FILE_PATH = os.path.join(BASE_DIR, "..", "json", "pandyo", "pandyo.json")
 
-# --- 설정 ---
-REGION = "ap-northeast-1"
-MODEL_ID = "cohere.embed-v4:0"
-COLLECTION_NAME = "pandyo"
-
-bedrock = boto3.client(service_name='bedrock-runtime', region_name=REGION)
-q_client = QdrantClient(url="http://localhost:6333")
-
 # 임베딩 함수
 def get_embedding(text):
     """JSON 구조 문자열을 1536차원 벡터로 변환"""
-    native_request = {
-        "texts": [text],
-        "input_type": "search_document",
-        "truncate": "NONE"
-    }
-    response = bedrock.invoke_model(modelId=MODEL_ID, body=json.dumps(native_request)) # 임베딩
-    response_body = json.loads(response.get('body').read()) # body정보 불러오기
-    embeddings = response_body.get('embeddings') # body에서 임베딩 결과물 추출
-    return embeddings.get('float')[0] if isinstance(embeddings, dict) else embeddings[0]
+    return get_embeddings([text], input_type="search_document")[0]
 
-# 메인 함수
-def main():
-    # 컬렉션이 없을 때 컬렉션 생성
-    if not q_client.collection_exists(COLLECTION_NAME):
-        q_client.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=1536, distance=Distance.COSINE),
-        )
+def _embed_batch(batch, vectors, failed):
+    """
+    batch: [(item_id, text), ...]
+    배치 호출이 실패하면 반으로 나눠 재시도해서 실패 원인이 된 항목만 failed 에 남긴다.
+    (스로틀링은 항목 문제가 아니므로 나누지 않고 배치 전체를 실패 처리)
+    """
+    try:
+        batch_vectors = get_embeddings([text for _, text in batch], input_type="search_document")
+    except Exception as e:
+        throttled = isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") == "ThrottlingException"
+        if len(batch) == 1 or throttled:
+            for item_id, _ in batch:
+                failed[item_id] = str(e)
+            print(f"⚠️ 임베딩 실패 {len(batch)}건 (ID: {[item_id for item_id, _ in batch]}) - {e}")
+            return
+        mid = len(batch) // 2
+        _embed_batch(batch[:mid], vectors, failed)
+        _embed_batch(batch[mid:], vectors, failed)
+        return
 
-    # 데이터 로드(pandyo.json)
+    for (item_id, _), vector in zip(batch, batch_vectors):
+        vectors[item_id] = vector
+
+def get_embeddings_batched(id_texts, batch_size=EMBED_BATCH_SIZE):
+    """
+    id_texts: [(item_id, text), ...]
+    batch_size 개씩 묶어서 임베딩하고 결과를 item_id 기준으로 돌려준다.
+    캐시에 이미 있는 텍스트는 Bedrock 호출 없이 캐시에서 가져온다.
+
+    Returns:
+        (vectors, failed): {item_id: vector}, {item_id: 에러 메시지}
+    """
+    vectors, failed = {}, {}
+    for start in range(0, len(id_texts), batch_size):
+        batch = id_texts[start:start + batch_size]
+        print(f"  배치 임베딩 {start + 1}~{start + len(batch)} / {len(id_texts)}")
+        _embed_batch(batch, vectors, failed)
+    return vectors, failed
+
+def content_hash(item):
+    """시나리오 항목의 내용 해시 (키 순서/공백과 무관하게 같은 내용이면 같은 값)"""
+    canonical = json.dumps(item, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def load_items():
+    """pandyo.json 로드 (파일이 없으면 None)"""
     if not os.path.exists(JSON_FILE_PATH):
         print(f"에러: 파일을 찾을 수 없습니다 -> {JSON_FILE_PATH}")
-        return
-
+        return None
     with open(JSON_FILE_PATH, "r", encoding="utf-8") as f:
-        vuln_data = json.load(f)
+        return json.load(f)
 
-    # 데이터 처리 및 임베딩
-    points = []
-    for item in vuln_data:
-        print(f"[ID: {item['id']}] '{item['title']}' - 임베딩 중...")
-        
+def build_points(items, batch_size=EMBED_BATCH_SIZE, with_sparse=True):
+    """
+    items 를 배치 임베딩해서 PointStruct 목록으로 만든다.
+    payload 에는 원본 항목과 함께 content_hash 를 저장해 다음 동기화 때 변경 여부를 판단한다.
+    with_sparse 이면 resources 의 키워드 sparse 벡터도 함께 저장한다 (API 호출 없이 로컬 계산).
+
+    Returns:
+        (points, failed)
+    """
+    id_texts = []
+    for item in items:
+        print(f"[ID: {item['id']}] '{item['title']}' - 임베딩 대기열 추가")
         target_resources = item.get("resources", [])
         raw_resources_str = json.dumps(target_resources, indent=2, ensure_ascii=False)
-        print(target_resources)
-        
-        vector = get_embedding(raw_resources_str)
-        
+        id_texts.append((item["id"], raw_resources_str))
+
+    # 배치 임베딩 (batch_size 개씩 한 번에 호출)
+    vectors, failed = get_embeddings_batched(id_texts, batch_size=batch_size)
+
+    points = []
+    for item in items:
+        if item["id"] not in vectors:
+            continue
+        sparse_indices, sparse_values = (None, None)
+        if with_sparse:
+            sparse_indices, sparse_values = to_sparse_vector(extract_keywords(item.get("resources", [])))
         points.append(PointStruct(
-            id=item["id"], 
-            vector=vector, 
-            payload=item
+            id=item["id"],
+            vector=make_vector(vectors[item["id"]], sparse_indices, sparse_values),
+            payload={**item, "content_hash": content_hash(item)},
         ))
+    return points, failed
+
+def fetch_indexed_hashes():
+    """컬렉션에 저장된 {point id: content_hash} (벡터는 가져오지 않음)"""
+    indexed = {}
+    offset = None
+    while True:
+        records, offset = q_client.scroll(
+            collection_name=COLLECTION_ALIAS,
+            with_payload=["content_hash"],
+            with_vectors=False,
+            limit=256,
+            offset=offset,
+        )
+        for record in records:
+            indexed[record.id] = (record.payload or {}).get("content_hash")
+        if offset is None:
+            return indexed
+
+def sync(batch_size=EMBED_BATCH_SIZE):
+    """
+    pandyo.json 과 컬렉션을 비교해서 바뀐 부분만 반영하는 증분 동기화.
+      - 새로 생기거나 내용이 바뀐 시나리오만 임베딩 후 upsert
+      - 파일에서 삭제된 id 의 포인트는 컬렉션에서 삭제
+
+    Returns:
+        dict: {"added": [...], "updated": [...], "deleted": [...], "unchanged": int, "failed": {...}}
+    """
+    ensure_collection()
+    items = load_items()
+    if items is None:
+        return None
+
+    indexed = fetch_indexed_hashes()
+    file_ids = {item["id"] for item in items}
+
+    added = [item for item in items if item["id"] not in indexed]
+    updated = [item for item in items if item["id"] in indexed and indexed[item["id"]] != content_hash(item)]
+    deleted = sorted(point_id for point_id in indexed if point_id not in file_ids)
+    unchanged = len(items) - len(added) - len(updated)
+
+    with_sparse = supports_sparse()
+    if not with_sparse:
+        print("ℹ️ 현재 컬렉션에 키워드 sparse 벡터가 없어 dense 만 저장합니다 (--rebuild 로 하이브리드 컬렉션 생성).")
+    points, failed = build_points(added + updated, batch_size=batch_size, with_sparse=with_sparse)
+    if points:
+        q_client.upsert(collection_name=COLLECTION_ALIAS, points=points)
+    if deleted:
+        q_client.delete(collection_name=COLLECTION_ALIAS, points_selector=PointIdsList(points=deleted))
+
+    report = {
+        "added": [item["id"] for item in added if item["id"] not in failed],
+        "updated": [item["id"] for item in updated if item["id"] not in failed],
+        "deleted": deleted,
+        "unchanged": unchanged,
+        "failed": failed,
+    }
+    print("\n" + "=" * 30 + " 동기화 결과 " + "=" * 30)
+    print(f"  추가: {len(report['added'])}건 {report['added']}")
+    print(f"  변경: {len(report['updated'])}건 {report['updated']}")
+    print(f"  삭제: {len(report['deleted'])}건 {report['deleted']}")
+    print(f"  변경 없음: {unchanged}건")
+    if failed:
+        print(f"  ⚠️ 임베딩 실패 {len(failed)}건 (반영 안 됨): {sorted(failed)}")
+    return report
+
+def validate_collection(name, points):
+    """
+    별칭 교체 전 새 컬렉션 검증
+      1. 포인트 수가 업로드한 개수와 같은지
+      2. 샘플 포인트의 벡터로 검색했을 때 자기 자신이 1위로 나오는지
+    """
+    count = q_client.count(collection_name=name, exact=True).count
+    if count != len(points):
+        print(f"❌ 검증 실패: 포인트 수 불일치 (기대 {len(points)}, 실제 {count})")
+        return False
+
+    sample = points[0]
+    sample_vector = sample.vector[""] if isinstance(sample.vector, dict) else sample.vector
+    hits = q_client.query_points(collection_name=name, query=sample_vector, limit=1).points
+    if not hits or hits[0].id != sample.id:
+        print(f"❌ 검증 실패: 샘플 검색 결과 불일치 (ID {sample.id} → {[h.id for h in hits]})")
+        return False
+
+    print(f"✅ 검증 통과: {count}개 포인트, 샘플 검색 1위 ID {hits[0].id} (유사도 {hits[0].score:.4f})")
+    return True
+
+def rebuild(batch_size=EMBED_BATCH_SIZE):
+    """
+    무중단 전체 재색인
+    pandyo_<버전> 컬렉션에 새로 색인 → 검증 → 별칭을 원자적으로 교체.
+    검색 중인 컬렉션에는 쓰지 않고, 이전 버전은 롤백용으로 남겨둔다.
+
+    Returns:
+        str | None: 새 컬렉션 이름 (검증 실패 시 None, 별칭은 그대로)
+    """
+    vuln_data = load_items()
+    if not vuln_data:
+        return None
+
+    name = vector_store.versioned_name(vector_store.new_version())
+    print(f"🏗️ 새 버전 컬렉션 생성: {name}")
+    vector_store.create_collection(name)
+
+    points, failed = build_points(vuln_data, batch_size=batch_size)
+    if failed or not points:
+        print(f"❌ 임베딩 실패 {len(failed)}건 → 별칭 교체 중단, {name} 삭제")
+        q_client.delete_collection(name)
+        return None
+
+    q_client.upsert(collection_name=name, points=points, wait=True)
+    if not vector_store.wait_until_indexed(name):
+        print(f"⚠️ {name} 인덱싱 완료 대기 시간 초과 (검증은 계속 진행)")
+
+    if not validate_collection(name, points):
+        q_client.delete_collection(name)
+        return None
+
+    previous = vector_store.swap_alias(name)
+    vector_store.prune_versions()
+    print(f"\n완료. '{COLLECTION_ALIAS}' → {name} ({len(points)}개), 롤백 대상: {previous}")
+    return name
+
+# 메인 함수
+def main(batch_size=EMBED_BATCH_SIZE):
+    ensure_collection()
+
+    # 데이터 로드(pandyo.json)
+    vuln_data = load_items()
+    if vuln_data is None:
+        return
+
+    points, failed = build_points(vuln_data, batch_size=batch_size, with_sparse=supports_sparse())
 
     # Qdrant 업로드
-    q_client.upsert(collection_name=COLLECTION_NAME, points=points)
+    if points:
+        q_client.upsert(collection_name=COLLECTION_ALIAS, points=points)
     print(f"\n완료. 총 {len(points)}개의 데이터가 저장되었습니다.")
+    if failed:
+        print(f"⚠️ 임베딩 실패 {len(failed)}건 (저장 안 됨): {sorted(failed)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="pandyo.json 임베딩 후 Qdrant 저장")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE,
+                        help=f"invoke_model 1회당 임베딩할 항목 수 (최대 {EMBED_BATCH_SIZE}, 1이면 항목별 호출)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--sync", action="store_true",
+                      help="증분 동기화: 새로 생기거나 바뀐 시나리오만 임베딩하고, 삭제된 id 는 컬렉션에서 제거")
+    mode.add_argument("--rebuild", action="store_true",
+                      help="무중단 전체 재색인: 새 버전 컬렉션에 색인/검증 후 별칭 교체")
+    mode.add_argument("--rollback", action="store_true",
+                      help="별칭을 직전 버전 컬렉션으로 되돌림")
+    args = parser.parse_args()
+    batch_size = max(1, min(args.batch_size, EMBED_BATCH_SIZE))
+    if args.sync:
+        sync(batch_size=batch_size)
+    elif args.rebuild:
+        rebuild(batch_size=batch_size)
+    elif args.rollback:
+        vector_store.rollback()
+    else:
+        main(batch_size=batch_size)
@@ -1,121 +1,258 @@
 # 벡터DB 검색용 임베딩
-import boto3
 import json
 import os
-from qdrant_client import QdrantClient
 
 
 # Request 임포트
 from fastapi import Request 
+from fastapi.responses import StreamingResponse
 
 # fastapi 라우터 설정
 from fastapi import APIRouter
 router = APIRouter()
 
 # mbv_llm_gpt.py 임포트
-from backend.llm.mbv_llm_gpt import run_mbv_llm
+from backend.llm.mbv_llm_gpt import (
+    stream_mbv_llm, iterate_in_analysis_executor, ANALYSIS_MODE,
+)
+# 요청 지문용 해시
+from backend.llm.analysis_cache import canonical_hash
+# 동시에 들어온 동일 요청 합치기
+from backend.common.singleflight import SingleFlight
+
+# 공용 임베딩 모듈 (디스크 캐시 포함)
+from backend.embed.embed_cache import get_embeddings
+# 하이브리드 검색 (컬렉션 별칭으로 조회하므로 재색인 중에도 검증된 버전을 사용)
+from backend.embed.vector_store import hybrid_search
+# 하이브리드 검색용 키워드(sparse 벡터) 추출
+from backend.embed.keyword_extract import extract_keywords, to_sparse_vector
+# 단계별 지연 시간 / 토큰 계측 (/metrics, 응답 timings)
+from backend.common.telemetry import request_timings, stage
 
 # --- 경로 설정 ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # 검색할 대상 파일 (사용자가 방금 올린 JSON 구조)
 SEARCH_TARGET_PATH = os.path.join(BASE_DIR, "..", "json", "pandyo", "search_pandyo.json")
 
-# --- 설정 ---
-REGION = "ap-northeast-1"
-MODEL_ID = "cohere.embed-v4:0"
-COLLECTION_NAME = "pandyo"
+# --- 검색 설정 ---
+# dense 코사인 유사도 기준 (이 값 이상인 dense 후보는 모두 LLM 에 전달)
+SIMILARITY_THRESHOLD = 0.7
+# dense 후보에 없고 키워드 검색에서만 나온 문서의 기준 (키워드 집합 코사인 유사도)
+SPARSE_SIMILARITY_THRESHOLD = float(os.getenv("MBV_SPARSE_THRESHOLD", "0.5"))
+# dense / sparse 후보 수
+DENSE_TOP_K = 10
+SPARSE_TOP_K = 5
 
-bedrock = boto3.client(service_name='bedrock-runtime', region_name=REGION)
-q_client = QdrantClient(url="http://localhost:6333")
+# 같은 인프라 + 같은 옵션으로 동시에 들어온 분석 요청은 계산 1개를 공유 (대시보드 여러 개가 동시에 열린 경우)
+search_flight = SingleFlight("mbv_search")
 
 
 # 임베딩 함수
 def get_embedding(text):
-    """Bedrock을 통해 데이터 구조를 벡터로 변환"""
-    native_request = {
-        "texts": [text], 
-        "input_type": "search_query", 
-        "truncate": "NONE"
-    }
-    response = bedrock.invoke_model(modelId=MODEL_ID, body=json.dumps(native_request)) # 임베딩
-    res_body = json.loads(response.get('body').read())
-    embeddings = res_body.get('embeddings') # 임베딩 값
-    return embeddings.get('float')[0] if isinstance(embeddings, dict) else embeddings[0]
+    """Bedrock을 통해 데이터 구조를 벡터로 변환 (같은 인프라는 캐시에서 바로 반환)"""
+    with stage("embedding"):
+        return get_embeddings([text], input_type="search_query")[0]
 
 
-@router.post("/mbv_search")
-async def mbv_search(request: Request):
-    print("mbv_search 함수 실행됨")
+def load_search_target():
+    """검색 대상 인프라 JSON 읽기 (파일이 없으면 None)"""
+    if not os.path.exists(SEARCH_TARGET_PATH):
+        print(f"❌ 파일을 찾을 수 없습니다: {SEARCH_TARGET_PATH}")
+        return None
+    with stage("file_read"), open(SEARCH_TARGET_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-    try:
-        if not os.path.exists(SEARCH_TARGET_PATH):
-            print(f"❌ 파일을 찾을 수 없습니다: {SEARCH_TARGET_PATH}")
-            return
-            
-        with open(SEARCH_TARGET_PATH, "r", encoding="utf-8") as f:
-            search_data = json.load(f)
-        
-        # 1. 검색 데이터 가공 (resources 내부의 content만 추출하여 문맥화)
-        # JSON의 핵심인 '어떤 리소스가 있고 어떤 상태인지'를 보존하여 텍스트로 만듭니다.
-        if "resources" in search_data:
-            # resources 리스트에서 각 파일의 내용(content)만 합칩니다.
-            context_list = [res.get("content", {}) for res in search_data["resources"]]
-            query_text = json.dumps(context_list, ensure_ascii=False)
-        else:
-            # resources 구조가 아닐 경우 전체를 사용
-            query_text = json.dumps(search_data, ensure_ascii=False)
-
-        print(f"🔎 인프라 구조 분석 중... (데이터 길이: {len(query_text)})")
-
-        # 2. 벡터 검색 수행 (유사도 ≥ 0.7 인 문서 전부 수집)
-        SIMILARITY_THRESHOLD = 0.7
-        query_vector = get_embedding(query_text)
-        search_response = q_client.query_points(
-            collection_name=COLLECTION_NAME,
-            query=query_vector,
-            limit=10
+
+def build_query_text(search_data) -> str:
+    """
+    검색 데이터 가공 (resources 내부의 content만 추출하여 문맥화)
+    JSON의 핵심인 '어떤 리소스가 있고 어떤 상태인지'를 보존하여 텍스트로 만듭니다.
+    """
+    if "resources" in search_data:
+        # resources 리스트에서 각 파일의 내용(content)만 합칩니다.
+        context_list = [res.get("content", {}) for res in search_data["resources"]]
+        return json.dumps(context_list, ensure_ascii=False)
+    # resources 구조가 아닐 경우 전체를 사용
+    return json.dumps(search_data, ensure_ascii=False)
+
+
+def is_qualified(hit) -> bool:
+    """
+    LLM 에 넘길 문서인지:
+      dense 후보에 있으면 dense 유사도 ≥ SIMILARITY_THRESHOLD,
+      키워드 검색에서만 나온 문서는 키워드 유사도 ≥ SPARSE_SIMILARITY_THRESHOLD
+    """
+    if hit.score is not None:
+        return hit.score >= SIMILARITY_THRESHOLD
+    return hit.sparse_score is not None and hit.sparse_score >= SPARSE_SIMILARITY_THRESHOLD
+
+
+def search_documents(query_text: str) -> list:
+    """
+    하이브리드 검색 (dense 임베딩 + 키워드 sparse, RRF 융합) 후 유사도 필터링.
+    Returns:
+        list[(문서 id, title, score)]: LLM 에 넘길 문서 (융합 순위대로, is_qualified 기준)
+        score 는 dense 유사도 (키워드 검색에서만 나온 문서는 키워드 유사도)
+        문서 id 는 pandyo 의 title (= 문서의 platform.scenario)
+    """
+    print(f"🔎 인프라 구조 분석 중... (데이터 길이: {len(query_text)})")
+
+    query_vector = get_embedding(query_text)
+    query_keywords = extract_keywords(query_text)
+    sparse_indices, sparse_values = to_sparse_vector(query_keywords)
+    with stage("vector_search"):
+        results = hybrid_search(
+            query_vector, sparse_indices, sparse_values,
+            dense_limit=DENSE_TOP_K, sparse_limit=SPARSE_TOP_K,
         )
-        
-        # 3. 유사도 필터링 및 결과 출력
-        results = search_response.points
 
-        # 유사도 ≥ 0.7 인 문서만 필터링
-        qualified_docs = [hit for hit in results if hit.score >= SIMILARITY_THRESHOLD]
+    qualified_docs = [hit for hit in results if is_qualified(hit)]
+
+    print("\n" + "="*30 + " 검색 결과 " + "="*30)
+    print(f"📊 전체 결과: {len(results)}건 | 기준 통과 (유사도 ≥ {SIMILARITY_THRESHOLD} 또는 키워드 전용 ≥ {SPARSE_SIMILARITY_THRESHOLD}): {len(qualified_docs)}건 | 키워드 {len(query_keywords)}개")
+
+    for i, hit in enumerate(results):
+        p = hit.payload
+        marker = "✅" if hit in qualified_docs else "❌"
+        dense = f"{hit.score:.4f}" if hit.score is not None else "-"
+        sparse = f"{hit.sparse_score:.4f}" if hit.sparse_score is not None else "-"
+        print(f"  {marker} [{i+1}위] {p.get('title')} | 유사도: {dense} | 키워드: {sparse} | 경로: {p.get('description')}")
+    print("-" * 71)
+
+    # 매칭 문서 id 리스트 구성 → mbv_llm_gpt 로 전달 (문서 내용은 document_store 에서 조회)
+    doc_info = [
+        (hit.payload.get("title", "unknown"), hit.payload.get("title", "unknown"),
+         hit.score if hit.score is not None else hit.sparse_score)
+        for hit in qualified_docs
+    ]
+    if doc_info:
+        print(f"\n📄 LLM 에 전달할 문서 {len(doc_info)}건:")
+        for i, (doc_id, title, score) in enumerate(doc_info, 1):
+            print(f"  [{i}] {title} (유사도: {score:.4f})")
+    else:
+        print("⚠️ 기준을 통과한 문서가 없습니다.")
+        print("  탐지된 취약점이 없습니다.")
+    return doc_info
 
-        print("\n" + "="*30 + " 검색 결과 " + "="*30)
-        print(f"📊 전체 결과: {len(results)}건 | 유사도 ≥ {SIMILARITY_THRESHOLD}: {len(qualified_docs)}건")
 
-        for i, hit in enumerate(results):
-            p = hit.payload
-            marker = "✅" if hit.score >= SIMILARITY_THRESHOLD else "❌"
-            print(f"  {marker} [{i+1}위] {p.get('title')} | 유사도: {hit.score:.4f} | 경로: {p.get('description')}")
-        print("-" * 71)
+def stream_mbv_search(use_cache: bool = True, cancel_event=None, mode: str = None):
+    """
+    검색 → LLM 분석 파이프라인 (블로킹 제너레이터, (이벤트 이름, 데이터) 를 yield).
+    /mbv_search, /mbv_search/stream, 분석 작업이 모두 이 제너레이터를 분석 전용 스레드 풀에서 실행한다.
+      infrastructure  사용자 인프라 JSON
+      documents       LLM 에 넘길 문서 목록
+      vulnerability   완성된 취약점 1건 (LLM 이 생성하는 대로)
+      done            {"analysis": 전체 분석 결과, "timings": 단계별 소요 시간} (문서가 없으면 analysis = 1)
+      error           {"error": 메시지}
+    """
+    with request_timings("mbv_search_stream") as timings:
+        try:
+            search_data = load_search_target()
+            if search_data is None:
+                yield "error", {"error": f"파일을 찾을 수 없습니다: {SEARCH_TARGET_PATH}"}
+                return
+            yield "infrastructure", search_data
 
-        if not qualified_docs:
-            print(f"⚠️ 유사도 ≥ {SIMILARITY_THRESHOLD} 인 문서가 없습니다.")
-            print("  탐지된 취약점이 없습니다.")
-            return {"infrastructure": search_data, "analysis": 1}
+            doc_info = search_documents(build_query_text(search_data))
+            yield "documents", [
+                {"id": doc_id, "title": title, "score": score} for doc_id, title, score in doc_info
+            ]
+            if not doc_info:
+                yield "done", {"analysis": 1, "timings": timings.as_dict()}
+                return
 
-        # 4. 매칭 문서 경로 리스트 구성 → mbv_llm_gpt 로 전달
-        doc_paths = [
-            (hit.payload.get("description", ""), hit.payload.get("title", "unknown"), hit.score)
-            for hit in qualified_docs
-        ]
+            print("\nstream_mbv_llm 실행 시작")
+            for event, data in stream_mbv_llm(doc_info, use_cache=use_cache, cancel_event=cancel_event, mode=mode):
+                if event == "done":
+                    print(f"⏱️ 단계별 소요 시간: {timings.as_dict()}")
+                    yield "done", {"analysis": data, "timings": timings.as_dict()}
+                else:
+                    yield event, data
+            print("stream_mbv_llm 실행 완료")
+
+        except Exception as e:
+            print(f"❌ 오류 발생: {e}")
+            yield "error", {"error": str(e)}
+
+
+def request_fingerprint(use_cache: bool, mode: str = None) -> str:
+    """
+    요청 지문 = (인프라 JSON 내용, 캐시 사용 여부, 분석 모드).
+    응답 형식(JSON / SSE)은 넣지 않는다: /mbv_search 도 같은 스트림 계산을 구독해서 done 이벤트로 응답을 만든다.
+    인프라 파일은 몇 KB 라 이벤트 루프에서 바로 읽는다. JSON 이 아니면 원문 그대로 해시.
+    """
+    try:
+        with open(SEARCH_TARGET_PATH, "rb") as f:
+            raw = f.read()
+        try:
+            infra = canonical_hash(json.loads(raw.decode("utf-8")))
+        except ValueError:
+            infra = canonical_hash(raw.decode("utf-8", "replace"))
+    except OSError:
+        infra = None
+    return canonical_hash({"infra": infra, "use_cache": use_cache, "mode": mode or ANALYSIS_MODE})
+
+
+def shared_analysis_stream(use_cache: bool, mode: str = None):
+    """
+    같은 지문의 분석 스트림 1개를 함께 구독 (/mbv_search, /mbv_search/stream 공용).
+    이미 실행 중이면 그 스트림에 합류한다 (이미 나간 이벤트부터 다시 받음).
+    """
+    return search_flight.stream(
+        request_fingerprint(use_cache, mode),
+        lambda: iterate_in_analysis_executor(stream_mbv_search, use_cache, mode=mode),
+    )
+
+
+def format_sse(event: str, data) -> str:
+    """Server-Sent Events 메시지 1건"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/mbv_search")
+async def mbv_search(request: Request):
+    print("mbv_search 함수 실행됨")
+    # 요청 본문 예: {"step": "vulnerability_analysis", "no_cache": true, "mode": "map_reduce"}
+    # no_cache 가 true 면 캐시된 분석 결과를 쓰지 않고 LLM 을 새로 호출
+    # mode 를 생략하면 서버 기본 분석 모드(MBV_ANALYSIS_MODE)
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    use_cache = not bool(body.get("no_cache", False))
 
-        print(f"\n📄 LLM 에 전달할 문서 {len(doc_paths)}건:")
-        for i, (path, title, score) in enumerate(doc_paths, 1):
-            print(f"  [{i}] {title} (유사도: {score:.4f}) → {path}")
+    mode = body.get("mode")
 
-        analysis_result = {"error": "분석이 실행되지 않음."}
+    # 블로킹 파이프라인은 스레드 풀에서 실행 → 분석 중에도 다른 요청(페이지, 정적 파일, CLI 생성 등)을 처리
+    # 같은 지문의 분석(JSON / SSE 요청 모두)이 이미 실행 중이면 그 스트림에 합류하고 done 이벤트로 응답을 만든다
+    result = {}
+    async for event, data in shared_analysis_stream(use_cache, mode):
+        if event == "infrastructure":
+            result["infrastructure"] = data
+        elif event == "done":
+            result.update(data)
+        elif event == "error":
+            return data
+    return result
 
-        print("\nrun_mbv_llm 실행 시작")
-        analysis_result = run_mbv_llm(doc_paths)
-        print("run_mbv_llm 실행 완료")
 
-        print("LLM 분석 결과:", analysis_result)
+@router.get("/mbv_search/stream")
+async def mbv_search_stream(no_cache: bool = False, mode: str = None):
+    """
+    /mbv_search 의 SSE 버전 (브라우저 EventSource 용).
+    LLM 응답을 스트리밍으로 받으면서 취약점이 하나 완성될 때마다 vulnerability 이벤트로 바로 보낸다.
+    같은 지문의 분석(/mbv_search 요청 포함)이 이미 실행 중이면 그 스트림에 합류한다.
+    """
+    print("mbv_search_stream 함수 실행됨")
+    use_cache = not no_cache
 
-        return {"infrastructure": search_data, "analysis": analysis_result}
+    async def event_stream():
+        async for event, data in shared_analysis_stream(use_cache, mode):
+            yield format_sse(event, data)
 
-    except Exception as e:
-        print(f"❌ 오류 발생: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 응답을 모아서 보내지 않도록
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,339 @@
+# 로컬 NumPy 벡터 저장소 (Qdrant 서버 없이 동작하는 대체 백엔드)
+# 문서 수가 수십~수천 건 수준이라 전수 비교(행렬-벡터 곱 1회)로도 충분히 빠르다.
+# vector_store.py 에서 MBV_VECTOR_BACKEND=numpy 일 때 QdrantClient 대신 사용하며,
+# mbv_embed / mbv_search 가 쓰는 QdrantClient 메서드와 같은 이름/반환 형태를 제공한다.
+#
+# 저장 구조 (base_dir 아래)
+#   aliases.json                    {별칭: 컬렉션 이름}
+#   <컬렉션>/CURRENT                 지금 읽을 세대 디렉터리 이름 (이 파일 하나만 교체해서 세대를 바꿈)
+#   <컬렉션>/<세대>/vectors.npy      정규화된 벡터 행렬 (N x D, float32 또는 float16), mmap 으로 읽음
+#   <컬렉션>/<세대>/payloads.json    [{"id": ..., "payload": {...}, "sparse": {이름: {"indices", "values"}}}, ...] (행 순서와 동일)
+#   <컬렉션>/config.json            {"size": 벡터 차원, "sparse_vectors": [sparse 벡터 이름, ...]}
+# 쓰기는 항상 새 세대 디렉터리에 두 파일을 다 쓴 뒤 CURRENT 를 바꾸므로, 읽는 쪽은 같은 세대의 벡터/payload 쌍만 본다.
+# (CURRENT 가 없는 예전 컬렉션은 <컬렉션>/vectors.npy, payloads.json 을 그대로 읽는다.)
+import json
+import os
+import shutil
+import threading
+from types import SimpleNamespace
+import numpy as np
+from qdrant_client.http.models import (
+    AliasDescription, CollectionDescription, CollectionsAliasesResponse, CollectionsResponse,
+    CountResult, QueryResponse, Record, ScoredPoint,
+)
+
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.json"
+ALIASES_FILE = "aliases.json"
+CONFIG_FILE = "config.json"
+CURRENT_FILE = "CURRENT"
+# 교체 후에도 남겨 두는 이전 세대 수 (이전 세대를 읽고 있는 중인 검색이 있을 수 있음)
+KEEP_GENERATIONS = 2
+# 세대가 바뀌는 도중에 읽은 경우 다시 시도하는 횟수
+LOAD_RETRIES = 5
+
+
+def _atomic_write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _sparse_dot(query, stored):
+    """sparse 벡터 내적 (stored 가 없으면 0)"""
+    if not stored:
+        return 0.0
+    weights = dict(zip(stored["indices"], stored["values"]))
+    return sum(v * weights.get(i, 0.0) for i, v in zip(query.indices, query.values))
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class _Collection:
+    """한 컬렉션의 벡터 행렬 + payload (CURRENT 가 가리키는 세대가 바뀌었을 때만 다시 읽음)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._key = None
+        self._snapshot = None
+
+    def current_generation(self):
+        """
+        (CURRENT 가 가리키는 세대 디렉터리 이름, 캐시 키)
+        예전 형식(CURRENT 없음)이면 ("", 두 파일의 mtime)
+        """
+        try:
+            with open(os.path.join(self.path, CURRENT_FILE), "r", encoding="utf-8") as f:
+                generation = f.read().strip()
+            return generation, generation
+        except FileNotFoundError:
+            stamp = tuple(os.stat(os.path.join(self.path, n)).st_mtime_ns for n in (VECTORS_FILE, PAYLOADS_FILE))
+            return "", stamp
+
+    def _read(self, generation):
+        directory = os.path.join(self.path, generation)
+        vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r")
+        with open(os.path.join(directory, PAYLOADS_FILE), "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        if len(vectors) != len(rows):
+            raise ValueError(f"벡터 {len(vectors)}개와 payload {len(rows)}개가 맞지 않습니다: {directory}")
+        return SimpleNamespace(
+            path=self.path,
+            vectors=vectors,
+            ids=[row["id"] for row in rows],
+            payloads=[row["payload"] for row in rows],
+            sparse=[row.get("sparse", {}) for row in rows],
+        )
+
+    def load(self):
+        """
+        현재 세대의 스냅샷 (vectors / ids / payloads / sparse 가 항상 같은 세대).
+        읽는 도중 세대가 바뀌어 파일이 없어졌거나 개수가 맞지 않으면 CURRENT 를 다시 읽고 재시도한다.
+        """
+        for attempt in range(LOAD_RETRIES):
+            try:
+                generation, key = self.current_generation()
+                if key == self._key:
+                    return self._snapshot
+                snapshot = self._read(generation)
+            except (FileNotFoundError, ValueError):
+                if attempt == LOAD_RETRIES - 1:
+                    raise
+                continue
+            self._key, self._snapshot = key, snapshot
+            return snapshot
+
+
+class NumpyVectorClient:
+    """
+    QdrantClient 중 이 프로젝트가 사용하는 부분만 구현한 로컬 저장소입니다.
+    코사인 거리만 지원하며 벡터는 저장 시점에 정규화해 두고 검색은 내적 한 번으로 처리합니다.
+    """
+
+    def __init__(self, base_dir, dtype="float32"):
+        self.base_dir = os.path.normpath(base_dir)
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._collections = {}
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    # --- 내부 헬퍼 ---
+    def _aliases(self):
+        path = os.path.join(self.base_dir, ALIASES_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _resolve(self, name):
+        return self._aliases().get(name, name)
+
+    def _collection_dir(self, name):
+        return os.path.join(self.base_dir, self._resolve(name))
+
+    def _load(self, name):
+        path = self._collection_dir(name)
+        if not os.path.isdir(path):
+            raise ValueError(f"컬렉션을 찾을 수 없습니다: {name}")
+        collection = self._collections.get(path)
+        if collection is None:
+            collection = self._collections[path] = _Collection(path)
+        return collection.load()
+
+    def _write(self, name, ids, vectors, payloads, sparse=None):
+        """
+        새 세대 디렉터리에 행렬/payload 를 모두 쓴 뒤 CURRENT 만 원자적으로 교체
+        (읽는 쪽은 항상 같은 세대의 완성된 파일 쌍만 봄)
+        """
+        path = self._collection_dir(name)
+        generations = sorted(g for g in os.listdir(path) if g.startswith("gen-"))
+        generation = f"gen-{int(generations[-1][4:]) + 1 if generations else 1:08d}"
+        directory = os.path.join(path, generation)
+        os.makedirs(directory)
+        with open(os.path.join(directory, VECTORS_FILE), "wb") as f:
+            np.save(f, np.asarray(vectors, dtype=self.dtype))
+        with open(os.path.join(directory, PAYLOADS_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                [
+                    {"id": i, "payload": p, "sparse": sp}
+                    for i, p, sp in zip(ids, payloads, sparse or [{}] * len(ids))
+                ],
+                f, ensure_ascii=False,
+            )
+        current_tmp = os.path.join(path, f"{CURRENT_FILE}.tmp")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(generation)
+        os.replace(current_tmp, os.path.join(path, CURRENT_FILE))
+
+        # 오래된 세대 / 예전 형식 파일 정리 (직전 세대는 읽는 중일 수 있어 남김)
+        for stale in generations[:max(len(generations) - (KEEP_GENERATIONS - 1), 0)]:
+            shutil.rmtree(os.path.join(path, stale), ignore_errors=True)
+        for legacy in (VECTORS_FILE, PAYLOADS_FILE):
+            if os.path.exists(os.path.join(path, legacy)):
+                os.remove(os.path.join(path, legacy))
+
+    # --- 컬렉션 관리 ---
+    def collection_exists(self, collection_name):
+        return os.path.isdir(self._collection_dir(collection_name))
+
+    def create_collection(self, collection_name, vectors_config=None, sparse_vectors_config=None, **kwargs):
+        size = vectors_config.size if vectors_config is not None else 0
+        with self._lock:
+            os.makedirs(os.path.join(self.base_dir, collection_name), exist_ok=False)
+            _atomic_write_json(
+                os.path.join(self.base_dir, collection_name, CONFIG_FILE),
+                {"size": size, "sparse_vectors": sorted(sparse_vectors_config or {})},
+            )
+            self._write(collection_name, [], np.zeros((0, size)), [])
+        return True
+
+    def delete_collection(self, collection_name, **kwargs):
+        with self._lock:
+            path = os.path.join(self.base_dir, collection_name)
+            self._collections.pop(path, None)
+            shutil.rmtree(path, ignore_errors=True)
+        return True
+
+    def get_collections(self):
+        names = sorted(
+            n for n in os.listdir(self.base_dir)
+            if os.path.isdir(os.path.join(self.base_dir, n))
+        )
+        return CollectionsResponse(collections=[CollectionDescription(name=n) for n in names])
+
+    def get_collection(self, collection_name):
+        # 전수 비교 방식이라 별도 인덱스 빌드가 없으므로 항상 green
+        collection = self._load(collection_name)
+        with open(os.path.join(collection.path, CONFIG_FILE), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        params = SimpleNamespace(sparse_vectors={name: None for name in config["sparse_vectors"]} or None)
+        return SimpleNamespace(status="green", points_count=len(collection.ids), config=SimpleNamespace(params=params))
+
+    def get_aliases(self):
+        return CollectionsAliasesResponse(aliases=[
+            AliasDescription(alias_name=alias, collection_name=target)
+            for alias, target in self._aliases().items()
+        ])
+
+    def update_collection_aliases(self, change_aliases_operations, **kwargs):
+        """별칭 변경 작업들을 모아서 aliases.json 을 한 번에 교체 (원자적)"""
+        with self._lock:
+            aliases = self._aliases()
+            for op in change_aliases_operations:
+                if getattr(op, "delete_alias", None) is not None:
+                    aliases.pop(op.delete_alias.alias_name, None)
+                if getattr(op, "create_alias", None) is not None:
+                    aliases[op.create_alias.alias_name] = op.create_alias.collection_name
+            _atomic_write_json(os.path.join(self.base_dir, ALIASES_FILE), aliases)
+        return True
+
+    # --- 포인트 ---
+    def upsert(self, collection_name, points, **kwargs):
+        with self._lock:
+            collection = self._load(collection_name)
+            ids = list(collection.ids)
+            payloads = list(collection.payloads)
+            sparse = list(collection.sparse)
+            vectors = list(np.asarray(collection.vectors, dtype=np.float32))
+            index = {point_id: row for row, point_id in enumerate(ids)}
+            for point in points:
+                # vector 는 dense 리스트 또는 {"": dense, 이름: SparseVector} 형태
+                named = point.vector if isinstance(point.vector, dict) else {"": point.vector}
+                vector = _normalize(np.asarray(named[""], dtype=np.float32))
+                point_sparse = {
+                    name: {"indices": list(v.indices), "values": list(v.values)}
+                    for name, v in named.items() if name
+                }
+                if point.id in index:
+                    row = index[point.id]
+                    vectors[row] = vector
+                    payloads[row] = point.payload or {}
+                    sparse[row] = point_sparse
+                else:
+                    index[point.id] = len(ids)
+                    ids.append(point.id)
+                    vectors.append(vector)
+                    payloads.append(point.payload or {})
+                    sparse.append(point_sparse)
+            matrix = np.vstack(vectors) if vectors else np.asarray(collection.vectors)
+            self._write(collection_name, ids, matrix, payloads, sparse)
+        return True
+
+    def delete(self, collection_name, points_selector, **kwargs):
+        remove = set(getattr(points_selector, "points", points_selector))
+        with self._lock:
+            collection = self._load(collection_name)
+            keep = [row for row, point_id in enumerate(collection.ids) if point_id not in remove]
+            self._write(
+                collection_name,
+                [collection.ids[row] for row in keep],
+                np.asarray(collection.vectors)[keep],
+                [collection.payloads[row] for row in keep],
+                [collection.sparse[row] for row in keep],
+            )
+        return True
+
+    def count(self, collection_name, exact=True, **kwargs):
+        return CountResult(count=len(self._load(collection_name).ids))
+
+    def scroll(self, collection_name, limit=10, offset=None, with_payload=True, with_vectors=False, **kwargs):
+        collection = self._load(collection_name)
+        start = offset or 0
+        end = min(start + limit, len(collection.ids))
+        records = []
+        for row in range(start, end):
+            payload = collection.payloads[row]
+            if isinstance(with_payload, list):
+                payload = {k: payload[k] for k in with_payload if k in payload}
+            elif not with_payload:
+                payload = None
+            vector = collection.vectors[row].tolist() if with_vectors else None
+            records.append(Record(id=collection.ids[row], payload=payload, vector=vector))
+        next_offset = end if end < len(collection.ids) else None
+        return records, next_offset
+
+    def query_points(self, collection_name, query, limit=10, with_payload=True, using=None, **kwargs):
+        """
+        dense: 정규화된 행렬과 질의 벡터의 내적 1회로 코사인 top-k 계산
+        sparse(using 지정): 저장된 sparse 벡터와 내적
+        """
+        collection = self._load(collection_name)
+        if not collection.ids:
+            return QueryResponse(points=[])
+        if using:
+            scores = np.asarray([_sparse_dot(query, row.get(using)) for row in collection.sparse], dtype=np.float32)
+        else:
+            query_vector = _normalize(np.asarray(query, dtype=np.float32))
+            scores = np.asarray(collection.vectors @ query_vector.astype(collection.vectors.dtype), dtype=np.float32)
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if using:
+            # Qdrant 와 동일하게 겹치는 키워드가 없는 포인트는 결과에서 제외
+            top = [row for row in top if scores[row] > 0]
+        return QueryResponse(points=[
+            ScoredPoint(
+                id=collection.ids[row],
+                version=0,
+                score=float(scores[row]),
+                payload=collection.payloads[row] if with_payload else None,
+            )
+            for row in top
+        ])
+
+    def query_batch_points(self, collection_name, requests, **kwargs):
+        return [
+            self.query_points(
+                collection_name,
+                query=r.query,
+                limit=r.limit,
+                with_payload=r.with_payload if r.with_payload is not None else True,
+                using=r.using,
+            )
+            for r in requests
+        ]
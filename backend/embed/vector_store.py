@@ -0,0 +1,214 @@
+# 벡터DB 컬렉션 관리 공용 모듈
+# 검색(mbv_search)은 항상 별칭(alias) COLLECTION_ALIAS 로 조회하고,
+# 전체 재색인(mbv_embed --rebuild)은 pandyo_<버전> 컬렉션을 새로 만든 뒤 별칭만 원자적으로 바꿔 끼운다.
+import os
+import time
+from datetime import datetime
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, SparseVectorParams, SparseVector, QueryRequest,
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation,
+)
+
+# --- 경로 설정 ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- 설정 ---
+# 벡터 저장소 백엔드: "qdrant" (Qdrant 서버) 또는 "numpy" (로컬 파일, 서버 불필요)
+VECTOR_BACKEND = os.getenv("MBV_VECTOR_BACKEND", "qdrant").lower()
+QDRANT_URL = os.getenv("MBV_QDRANT_URL", "http://localhost:6333")
+# 검색이 바라보는 별칭 이름 (실제 데이터는 pandyo_<버전> 컬렉션에 있음)
+COLLECTION_ALIAS = os.getenv("MBV_COLLECTION_ALIAS", "pandyo")
+VECTOR_SIZE = 1536
+# 키워드 sparse 벡터 이름 (dense 벡터는 기본(이름 없는) 벡터)
+SPARSE_VECTOR_NAME = "keywords"
+# RRF(Reciprocal Rank Fusion) 상수
+RRF_K = 60
+# 별칭 교체 후 남겨둘 버전 수 (현재 + 롤백용 이전 버전)
+KEEP_VERSIONS = 2
+
+# numpy 백엔드 설정 (저장 위치, 벡터 dtype: float32 또는 float16)
+NUMPY_INDEX_DIR = os.getenv("MBV_NUMPY_INDEX_DIR", os.path.join(BASE_DIR, "..", "json", "vector_index"))
+NUMPY_DTYPE = os.getenv("MBV_NUMPY_DTYPE", "float32")
+
+
+def _create_client():
+    """설정된 백엔드의 클라이언트 생성 (두 백엔드 모두 같은 메서드로 사용)"""
+    if VECTOR_BACKEND == "numpy":
+        from backend.embed.numpy_store import NumpyVectorClient
+        return NumpyVectorClient(NUMPY_INDEX_DIR, dtype=NUMPY_DTYPE)
+    if VECTOR_BACKEND != "qdrant":
+        raise ValueError(f"지원하지 않는 벡터 저장소 백엔드입니다: {VECTOR_BACKEND} (qdrant 또는 numpy)")
+    return QdrantClient(url=QDRANT_URL)
+
+
+q_client = _create_client()
+
+
+def versioned_name(version: str) -> str:
+    return f"{COLLECTION_ALIAS}_{version}"
+
+
+def new_version() -> str:
+    """버전 문자열 (시간순 정렬 가능, 같은 초에 두 번 만들어도 겹치지 않도록 마이크로초까지)"""
+    return datetime.now().strftime("%Y%m%d%H%M%S%f")
+
+
+def create_collection(name: str):
+    q_client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+        sparse_vectors_config={SPARSE_VECTOR_NAME: SparseVectorParams()},
+    )
+
+
+# 컬렉션 이름 → sparse 벡터 지원 여부 (검색마다 get_collection 을 부르지 않도록, 별칭 교체 시 비움)
+_sparse_support = {}
+
+
+def supports_sparse(name: str = COLLECTION_ALIAS) -> bool:
+    """컬렉션에 키워드 sparse 벡터가 설정되어 있는지 (예전 컬렉션은 --rebuild 전까지 dense 전용)"""
+    supported = _sparse_support.get(name)
+    if supported is None:
+        sparse_vectors = q_client.get_collection(name).config.params.sparse_vectors or {}
+        supported = _sparse_support[name] = SPARSE_VECTOR_NAME in sparse_vectors
+    return supported
+
+
+def make_vector(dense, sparse_indices=None, sparse_values=None):
+    """PointStruct.vector 값 (sparse 가 없으면 dense 만)"""
+    if sparse_indices is None:
+        return dense
+    return {"": dense, SPARSE_VECTOR_NAME: SparseVector(indices=sparse_indices, values=sparse_values)}
+
+
+def list_versions() -> list:
+    """pandyo_<버전> 컬렉션 이름 목록 (오래된 순)"""
+    prefix = f"{COLLECTION_ALIAS}_"
+    names = [c.name for c in q_client.get_collections().collections]
+    return sorted(n for n in names if n.startswith(prefix) and n[len(prefix):].isdigit())
+
+
+def current_collection():
+    """별칭이 현재 가리키는 컬렉션 이름 (별칭이 없으면 None)"""
+    for alias in q_client.get_aliases().aliases:
+        if alias.alias_name == COLLECTION_ALIAS:
+            return alias.collection_name
+    return None
+
+
+def ensure_collection():
+    """
+    증분 동기화용: 별칭(또는 예전 방식의 단일 컬렉션)이 없으면
+    첫 버전 컬렉션을 만들고 별칭을 연결한다.
+    """
+    if current_collection() or q_client.collection_exists(COLLECTION_ALIAS):
+        return
+    name = versioned_name(new_version())
+    create_collection(name)
+    swap_alias(name)
+
+
+def wait_until_indexed(name: str, timeout_sec: float = 300.0, interval_sec: float = 1.0) -> bool:
+    """컬렉션 상태가 green(세그먼트/HNSW 최적화 완료)이 될 때까지 대기"""
+    deadline = time.time() + timeout_sec
+    while time.time() < deadline:
+        if str(q_client.get_collection(name).status).lower().endswith("green"):
+            return True
+        time.sleep(interval_sec)
+    return False
+
+
+def swap_alias(name: str):
+    """
+    별칭을 name 컬렉션으로 원자적으로 교체한다 (삭제+생성을 한 번의 요청으로 처리).
+    예전 방식으로 별칭과 같은 이름의 실제 컬렉션이 있으면 최초 1회 삭제 후 별칭으로 전환한다.
+    """
+    previous = current_collection()
+    if previous is None and q_client.collection_exists(COLLECTION_ALIAS):
+        print(f"⚠️ 기존 단일 컬렉션 '{COLLECTION_ALIAS}' 를 별칭 방식으로 전환합니다 (기존 컬렉션 삭제).")
+        q_client.delete_collection(COLLECTION_ALIAS)
+
+    operations = []
+    if previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=COLLECTION_ALIAS)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=name, alias_name=COLLECTION_ALIAS)))
+    q_client.update_collection_aliases(change_aliases_operations=operations)
+    _sparse_support.clear()
+    print(f"🔀 별칭 '{COLLECTION_ALIAS}': {previous} → {name}")
+    return previous
+
+
+def rollback():
+    """별칭을 현재 버전 직전의 컬렉션으로 되돌린다. 되돌릴 버전이 없으면 None."""
+    current = current_collection()
+    older = [n for n in list_versions() if current is None or n < current]
+    if not older:
+        print("⚠️ 롤백할 이전 버전이 없습니다.")
+        return None
+    swap_alias(older[-1])
+    return older[-1]
+
+
+def prune_versions(keep: int = KEEP_VERSIONS):
+    """최신 keep 개(현재 별칭 대상은 항상 포함)를 제외한 오래된 버전 컬렉션 삭제"""
+    current = current_collection()
+    versions = list_versions()
+    keep_names = set(versions[-keep:]) | {current}
+    removed = [n for n in versions if n not in keep_names]
+    for name in removed:
+        q_client.delete_collection(name)
+        print(f"🗑️ 이전 버전 컬렉션 삭제: {name}")
+    return removed
+
+
+class HybridHit:
+    """하이브리드 검색 결과 1건 (dense 코사인 점수와 sparse 점수를 따로 보존)"""
+
+    def __init__(self, id, payload):
+        self.id = id
+        self.payload = payload
+        self.score = None          # dense 코사인 유사도 (dense 후보에 없으면 None)
+        self.sparse_score = None   # 키워드 집합 코사인 유사도 (sparse 후보에 없으면 None)
+        self.fused_score = 0.0     # RRF 점수 (정렬 기준)
+
+
+def hybrid_search(dense_vector, sparse_indices, sparse_values, dense_limit=5, sparse_limit=5):
+    """
+    dense + sparse 두 질의를 한 번의 요청(query_batch_points)으로 보내고 RRF 로 합친다.
+    컬렉션에 sparse 벡터가 없으면 dense 결과만 사용한다.
+
+    Returns:
+        list[HybridHit]: fused_score 내림차순
+    """
+    requests = [QueryRequest(query=dense_vector, limit=dense_limit, with_payload=True)]
+    use_sparse = bool(sparse_indices) and supports_sparse()
+    if use_sparse:
+        requests.append(QueryRequest(
+            query=SparseVector(indices=sparse_indices, values=sparse_values),
+            using=SPARSE_VECTOR_NAME,
+            limit=sparse_limit,
+            with_payload=True,
+        ))
+    try:
+        responses = q_client.query_batch_points(collection_name=COLLECTION_ALIAS, requests=requests)
+    except Exception:
+        if not use_sparse:
+            raise
+        # 다른 프로세스(mbv_embed --rollback 등)가 별칭을 sparse 없는 컬렉션으로 바꾼 경우: 다시 확인하고 dense 만
+        _sparse_support.clear()
+        if supports_sparse():
+            raise
+        print("⚠️ 컬렉션에 키워드 sparse 벡터가 없어 dense 검색만 사용합니다.")
+        responses = q_client.query_batch_points(collection_name=COLLECTION_ALIAS, requests=requests[:1])
+
+    hits = {}
+    for kind, response in zip(("dense", "sparse"), responses):
+        for rank, point in enumerate(response.points, 1):
+            hit = hits.setdefault(point.id, HybridHit(point.id, point.payload))
+            if kind == "dense":
+                hit.score = point.score
+            else:
+                hit.sparse_score = point.score
+            hit.fused_score += 1.0 / (RRF_K + rank)
+    return sorted(hits.values(), key=lambda h: h.fused_score, reverse=True)
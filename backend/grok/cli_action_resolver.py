@@ -0,0 +1,345 @@
+# AWS CLI 명령어 → 최소 IAM 정책 (로컬 계산, LLM 호출 없음)
+# botocore 에 들어 있는 서비스 모델(service-2.json)로 CLI 명령(iam put-user-policy)을
+# API 작업(PutUserPolicy)과 IAM 서비스 접두사(iam)로 바꾸고, --user-name / --role-name 같은 인자로 리소스 ARN 을 채운다.
+# 해석할 수 없는 명령(aws s3 cp 같은 고수준 명령, 모르는 서비스/작업, 액션 이름을 확인하지 않은 s3 작업)은
+# None 을 돌려주고 호출한 쪽이 Grok 으로 넘긴다.
+#
+# 인덱스는 처음 해석할 때 1번 만든다 (get_action_index): 서비스 목록 + 자주 쓰는 서비스(MBV_CLI_RESOLVER_PRELOAD)의 작업 표.
+# 나머지 서비스는 처음 나온 순간 그 서비스 모델 1개만 읽어서 인덱스에 추가한다 (전체 400여 개를 읽으면 5초 정도 걸림).
+import json
+import os
+import shlex
+import threading
+from functools import lru_cache
+
+import botocore.session
+from botocore import xform_name
+
+# --- 설정 ---
+# 인덱스를 만들 때 작업 표를 미리 만들어 둘 서비스 (cliCreate 가 만드는 명령 기준)
+CLI_RESOLVER_PRELOAD = [
+    s for s in os.getenv("MBV_CLI_RESOLVER_PRELOAD", "iam,ec2,s3,sts,lambda").split(",") if s
+]
+# ARN 의 계정 자리 (모르면 * )
+AWS_ACCOUNT_ID = os.getenv("MBV_AWS_ACCOUNT_ID", "*")
+
+# CLI 서비스 이름 → botocore 서비스 이름 (다른 것만)
+CLI_SERVICE_ALIASES = {
+    "s3api": "s3",
+    "configservice": "config",
+    "deploy": "codedeploy",
+}
+# 고수준 명령 (여러 API 를 조합하므로 작업 1개로 정할 수 없음)
+HIGH_LEVEL_SERVICES = {"s3", "configure", "history", "ddb"}
+# IAM 접두사가 HTTP 메서드라서 작업 이름으로 정할 수 없는 서비스
+UNRESOLVABLE_SERVICES = {"apigateway", "apigatewayv2"}
+
+# botocore 서비스 → IAM 접두사 (signingName / endpointPrefix 와 다른 것만)
+IAM_PREFIX_OVERRIDES = {
+    "cloudwatch": "cloudwatch",
+    "iot-data": "iot",
+}
+
+# API 작업 이름과 IAM 액션 이름이 다른 경우
+ACTION_OVERRIDES = {
+    ("s3", "ListObjectsV2"): ["s3:ListBucket"],
+    ("s3", "ListObjects"): ["s3:ListBucket"],
+    ("s3", "HeadBucket"): ["s3:ListBucket"],
+    ("s3", "HeadObject"): ["s3:GetObject"],
+    ("s3", "DeleteObjects"): ["s3:DeleteObject"],
+    ("s3", "CopyObject"): ["s3:GetObject", "s3:PutObject"],
+    ("s3", "CreateMultipartUpload"): ["s3:PutObject"],
+    ("s3", "UploadPart"): ["s3:PutObject"],
+    ("s3", "CompleteMultipartUpload"): ["s3:PutObject"],
+    ("s3", "ListBuckets"): ["s3:ListAllMyBuckets"],
+    ("s3", "ListObjectVersions"): ["s3:ListBucketVersions"],
+    ("s3", "ListMultipartUploads"): ["s3:ListBucketMultipartUploads"],
+    ("s3", "PutBucketEncryption"): ["s3:PutEncryptionConfiguration"],
+    ("s3", "GetBucketEncryption"): ["s3:GetEncryptionConfiguration"],
+    ("s3", "PutPublicAccessBlock"): ["s3:PutBucketPublicAccessBlock"],
+    ("s3", "GetPublicAccessBlock"): ["s3:GetBucketPublicAccessBlock"],
+    ("s3", "PutBucketLifecycleConfiguration"): ["s3:PutLifecycleConfiguration"],
+    ("s3", "GetBucketLifecycleConfiguration"): ["s3:GetLifecycleConfiguration"],
+    ("lambda", "Invoke"): ["lambda:InvokeFunction"],
+}
+
+# API 작업 이름과 IAM 액션 이름이 자주 다른 서비스: ACTION_OVERRIDES 또는 여기 있는 작업만 로컬에서 해석하고
+# (작업 이름 = 액션 이름인 것을 확인한 목록) 나머지는 None → Grok
+VERIFIED_OPERATIONS = {
+    "s3": {
+        "GetObject", "PutObject", "DeleteObject", "CreateBucket", "DeleteBucket",
+        "GetBucketPolicy", "PutBucketPolicy", "DeleteBucketPolicy", "GetBucketAcl", "PutBucketAcl",
+        "GetObjectAcl", "PutObjectAcl", "GetBucketTagging", "PutBucketTagging", "GetObjectTagging",
+        "PutObjectTagging", "DeleteObjectTagging", "GetBucketVersioning", "PutBucketVersioning",
+        "GetBucketLocation", "GetBucketLogging", "PutBucketLogging", "GetBucketWebsite", "PutBucketWebsite",
+        "DeleteBucketWebsite",
+    },
+    "s3control": set(),
+}
+
+# 인자가 있을 때만 추가로 필요한 액션: {(서비스, 작업): {CLI 인자: [액션]}}
+ARGUMENT_ACTIONS = {
+    ("ec2", "RunInstances"): {
+        "tag-specifications": ["ec2:CreateTags"],
+        "iam-instance-profile": ["iam:PassRole"],
+    },
+    ("ec2", "CreateVolume"): {"tag-specifications": ["ec2:CreateTags"]},
+    ("ec2", "CreateLaunchTemplate"): {"tag-specifications": ["ec2:CreateTags"]},
+    ("lambda", "CreateFunction"): {"role": ["iam:PassRole"]},
+}
+
+# 리소스 ARN 템플릿: {서비스: {CLI 인자: ARN}} ({value}, {account}, {region} 치환)
+RESOURCE_ARGUMENTS = {
+    "iam": {
+        "user-name": "arn:aws:iam::{account}:user/{value}",
+        "role-name": "arn:aws:iam::{account}:role/{value}",
+        "group-name": "arn:aws:iam::{account}:group/{value}",
+        "instance-profile-name": "arn:aws:iam::{account}:instance-profile/{value}",
+    },
+    "lambda": {"function-name": "arn:aws:lambda:{region}:{account}:function:{value}"},
+    "dynamodb": {"table-name": "arn:aws:dynamodb:{region}:{account}:table/{value}"},
+    "sns": {"topic-arn": "{value}"},
+    "sts": {"role-arn": "{value}"},
+    "secretsmanager": {"secret-id": "arn:aws:secretsmanager:{region}:{account}:secret:{value}*"},
+}
+# 인자가 여러 개일 때 권한 검사 대상 리소스가 일부뿐인 작업
+RESOURCE_ARGUMENT_OVERRIDES = {
+    ("iam", "AddUserToGroup"): ["group-name"],
+    ("iam", "RemoveUserFromGroup"): ["group-name"],
+}
+
+# API 작업이 없는 IAM 전용 액션 (와일드카드가 이 액션까지 허용하는지 검사할 때 포함)
+IAM_ONLY_ACTIONS = {
+    "iam": ["PassRole"],
+    "sts": ["TagSession", "SetSourceIdentity", "SetContext"],
+    "lambda": ["InvokeFunction", "InvokeFunctionUrl", "EnableReplication", "DisableReplication"],
+    "dynamodb": ["ConditionCheckItem", "PartiQLSelect", "PartiQLInsert", "PartiQLUpdate", "PartiQLDelete"],
+    "ec2": ["CreateTags"],
+    "ssm": ["GetParameters"],
+}
+
+# 값을 받는 전역 옵션 (작업 인자가 아님)
+GLOBAL_OPTIONS_WITH_VALUE = {
+    "--region", "--profile", "--output", "--endpoint-url", "--query",
+    "--color", "--cli-read-timeout", "--cli-connect-timeout", "--ca-bundle",
+}
+
+
+def parse_command(command: str):
+    """
+    "aws iam put-user-policy --user-name alice ..."
+      → ("iam", "put-user-policy", {"user-name": "alice", ...}, region, [나머지 위치 인자])
+    값이 없는 플래그는 True. aws 명령이 아니면 None.
+    """
+    try:
+        tokens = shlex.split(command.strip())
+    except ValueError:
+        return None
+    if tokens and tokens[0] == "aws":
+        tokens = tokens[1:]
+    positional, args, region = [], {}, None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.startswith("--"):
+            name, _, inline_value = token.partition("=")
+            if inline_value:
+                value = inline_value
+            elif i + 1 < len(tokens) and not tokens[i + 1].startswith("--"):
+                i += 1
+                value = tokens[i]
+            else:
+                value = True
+            if name == "--region":
+                region = value
+            elif name not in GLOBAL_OPTIONS_WITH_VALUE:
+                args[name[2:]] = value
+        else:
+            positional.append(token)
+        i += 1
+    if len(positional) < 2:
+        return None
+    return positional[0], positional[1], args, region, positional[2:]
+
+
+def _quote_state(text: str, quote: str = "") -> str:
+    """text 끝에서 열려 있는 따옴표 ("" 이면 모두 닫힘). quote: text 앞에서 이미 열려 있던 따옴표"""
+    escaped = False
+    for ch in text:
+        if escaped:
+            escaped = False
+        elif ch == "\\" and quote != "'":
+            escaped = True
+        elif quote:
+            if ch == quote:
+                quote = ""
+        elif ch in ("'", '"'):
+            quote = ch
+    return quote
+
+
+def split_commands(cli_input: str) -> list:
+    """
+    여러 줄 CLI 입력 → 명령 목록.
+    따옴표 안의 줄바꿈(--policy-document '{...}' 의 들여쓴 JSON)과 줄 끝 \\ 는 같은 명령으로 이어 붙인다.
+    줄마다 따옴표 상태만 이어서 계산하므로 입력 길이에 비례한다.
+    """
+    commands, pending, quote = [], [], ""
+    for line in cli_input.splitlines():
+        if not pending and not line.strip():
+            continue
+        quote = _quote_state(line, quote)
+        if not quote and line.rstrip().endswith("\\"):
+            pending.append(line.rstrip()[:-1])
+            continue
+        pending.append(line)
+        if quote:
+            # 따옴표가 아직 닫히지 않음
+            continue
+        commands.append("\n".join(pending).strip())
+        pending = []
+    if pending:
+        commands.append("\n".join(pending).strip())
+    return commands
+
+
+class ActionIndex:
+    """(botocore 서비스, CLI 작업 이름) → (IAM 접두사, API 작업 이름) 인덱스"""
+
+    def __init__(self, preload=CLI_RESOLVER_PRELOAD):
+        self._session = botocore.session.get_session()
+        self._loader = self._session.get_component("data_loader")
+        self.services = set(self._session.get_available_services())
+        self._operations = {}    # 서비스 → {CLI 작업 이름: API 작업 이름}
+        self._prefixes = {}      # 서비스 → IAM 접두사
+        self._iam_actions = {}   # IAM 접두사 → 액션 이름 집합
+        self._prefix_services = None  # IAM 접두사 → botocore 서비스 목록 (처음 필요할 때 전체 모델로 만듦)
+        self._lock = threading.Lock()
+        for service in preload:
+            if service in self.services:
+                self._load(service)
+        print(f"🗂️ CLI → IAM 액션 인덱스: 서비스 {len(self.services)}개 (미리 로딩 {sorted(self._operations)})")
+
+    def _load(self, service: str):
+        with self._lock:
+            if service in self._operations:
+                return
+            model = self._loader.load_service_model(service, "service-2")
+            metadata = model["metadata"]
+            self._prefixes[service] = self._service_prefix(metadata, service)
+            self._operations[service] = {xform_name(op, "-"): op for op in model["operations"]}
+
+    def _service_prefix(self, metadata: dict, service: str) -> str:
+        return IAM_PREFIX_OVERRIDES.get(service, metadata.get("signingName") or metadata["endpointPrefix"])
+
+    def prefix_services(self) -> dict:
+        """
+        IAM 접두사 → 그 접두사로 서명하는 botocore 서비스 전체 (dynamodb → dynamodb, dynamodbstreams).
+        서비스 모델 400여 개를 모두 읽어야 해서(수 초) 와일드카드 검사에서 처음 필요할 때 1번만 만든다.
+        """
+        with self._lock:
+            if self._prefix_services is None:
+                mapping = {}
+                for service in sorted(self.services):
+                    metadata = self._loader.load_service_model(service, "service-2")["metadata"]
+                    mapping.setdefault(self._service_prefix(metadata, service), []).append(service)
+                self._prefix_services = mapping
+                print(f"🗂️ IAM 접두사 → 서비스 표: 접두사 {len(mapping)}개")
+            return self._prefix_services
+
+    def iam_actions(self, prefix: str) -> frozenset:
+        """
+        IAM 접두사에 속한 액션 이름 전체
+        (그 접두사로 서명하는 모든 botocore 서비스의 작업 + IAM 전용 액션, 서비스를 모르면 빈 집합).
+        botocore 작업 목록이 실제 IAM 액션 목록과 완전히 같지는 않으므로 이 집합은 와일드카드 검사에만 쓴다.
+        """
+        actions = self._iam_actions.get(prefix)
+        if actions is None:
+            services = self.prefix_services().get(prefix, [])
+            names = set(IAM_ONLY_ACTIONS.get(prefix, []))
+            for service in services:
+                self._load(service)
+                names.update(self._operations[service].values())
+            names.update(
+                a.split(":", 1)[1] for a in (
+                    [x for v in ACTION_OVERRIDES.values() for x in v]
+                    + [x for m in ARGUMENT_ACTIONS.values() for v in m.values() for x in v]
+                ) if a.startswith(prefix + ":")
+            )
+            actions = self._iam_actions[prefix] = frozenset(names) if services else frozenset()
+        return actions
+
+    def lookup(self, cli_service: str, cli_operation: str):
+        """Returns: (botocore 서비스, IAM 접두사, API 작업 이름) 또는 None"""
+        if cli_service in HIGH_LEVEL_SERVICES:
+            return None
+        service = CLI_SERVICE_ALIASES.get(cli_service, cli_service)
+        if service not in self.services or service in UNRESOLVABLE_SERVICES:
+            return None
+        if service not in self._operations:
+            self._load(service)
+        operation = self._operations[service].get(cli_operation)
+        if operation is None:
+            return None
+        return service, self._prefixes[service], operation
+
+
+@lru_cache(maxsize=1)
+def get_action_index() -> ActionIndex:
+    """프로세스 전역 인덱스 (import 시점이 아니라 처음 해석/압축할 때 만듦)"""
+    return ActionIndex()
+
+
+def resolve_command(command: str, account: str = AWS_ACCOUNT_ID):
+    """
+    CLI 명령 1줄 → 정책 Statement 목록 (해석할 수 없으면 None)
+    첫 Statement 는 명령의 작업 (인자로 ARN 을 알 수 있으면 그 ARN, 아니면 "*"),
+    다른 서비스의 부가 권한(iam:PassRole, ssm:GetParameters 등)이 있으면 Resource "*" 인 Statement 를 하나 더 둔다.
+    """
+    parsed = parse_command(command)
+    if parsed is None:
+        return None
+    cli_service, cli_operation, args, region, _ = parsed
+    found = get_action_index().lookup(cli_service, cli_operation)
+    if found is None:
+        return None
+    service, prefix, operation = found
+    if service in VERIFIED_OPERATIONS and (service, operation) not in ACTION_OVERRIDES \
+            and operation not in VERIFIED_OPERATIONS[service]:
+        return None
+
+    actions = list(ACTION_OVERRIDES.get((service, operation), [f"{prefix}:{operation}"]))
+    for arg, extra in ARGUMENT_ACTIONS.get((service, operation), {}).items():
+        if arg in args:
+            actions.extend(extra)
+    # EC2 의 resolve:ssm: AMI 는 SSM 파라미터 조회 권한도 필요
+    if str(args.get("image-id", "")).startswith("resolve:ssm:"):
+        actions.append("ssm:GetParameters")
+
+    templates = RESOURCE_ARGUMENTS.get(service, {})
+    resource_args = RESOURCE_ARGUMENT_OVERRIDES.get((service, operation), templates)
+    # 값이 이미 ARN 이면 (--function-name arn:aws:lambda:...) 템플릿 없이 그대로 사용
+    resources = [
+        args[arg] if args[arg].startswith("arn:")
+        else templates[arg].format(value=args[arg], account=account, region=region or "*")
+        for arg in resource_args
+        if arg in templates and isinstance(args.get(arg), str)
+    ]
+    if service == "s3" and isinstance(args.get("bucket"), str):
+        bucket_arn = f"arn:aws:s3:::{args['bucket']}"
+        resources.append(f"{bucket_arn}/{args['key']}" if isinstance(args.get("key"), str) else bucket_arn)
+
+    own = [a for a in dict.fromkeys(actions) if a.startswith(prefix + ":")]
+    extra = [a for a in dict.fromkeys(actions) if not a.startswith(prefix + ":")]
+    statements = [{"Effect": "Allow", "Action": own, "Resource": resources or "*"}]
+    if extra:
+        statements.append({"Effect": "Allow", "Action": extra, "Resource": "*"})
+    return statements
+
+
+def as_grok_response(policy: dict) -> dict:
+    """/grok_exe 가 그대로 읽을 수 있게 OpenRouter 응답 모양으로 감쌈"""
+    return {
+        "model": "local/botocore-resolver",
+        "choices": [{"message": {"role": "assistant", "content": json.dumps(policy, indent=2)}}],
+    }
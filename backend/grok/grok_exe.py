@@ -1,8 +1,5 @@
 #박혜수 작업물
-import boto3
 import json
-import requests 
-import re
 
 # 필요한 라이브러리 추가
 import os
@@ -13,16 +10,24 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
 
+# 공용 AWS 클라이언트 (커넥션 풀/재시도/타임아웃 설정 포함)
+from backend.common.aws_clients import lambda_client as get_lambda_client
+# 명령 단위 정책 생성 (로컬 해석 → 정책 캐시 → Grok) + 병합
+from backend.grok.policy_generator import generate_policy
+from backend.grok.cli_action_resolver import as_grok_response
+# 정책 압축 (중복 제거 / Statement 합치기 / 안전한 와일드카드 / 크기 제한 검사)
+from backend.grok.policy_compactor import compact_policy, compaction_report
+# 정규화한 CLI 명령 → Grok 정책 캐시 (SQLite, TTL)
+from backend.grok.policy_cache import get_cache as get_policy_cache
+from backend.llm.stream_parser import extract_json_from_text
+
 load_dotenv()
 
 router = APIRouter()
 
 # 리전 설정 추가
-lambda_client = boto3.client("lambda", region_name="ap-northeast-1")
-
-
+lambda_client = get_lambda_client("ap-northeast-1")
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
 
 class GrokRequest(BaseModel):
@@ -37,55 +42,39 @@ async def grok_json(request: Request):
 
         data = await request.json()
         user_cli_input = data.get('customCLI')
+        # no_cache 가 true 면 캐시된 정책을 쓰지 않고 Grok 을 새로 호출
+        use_cache = not bool(data.get('no_cache', False))
 
         print("사용자 입력 CLI(grok_json):", user_cli_input)
         if not user_cli_input:
             return {"error":"사용자 CLI 입력이 비어 있습니다."}
 
-        system_prompt = """
-        You are an AWS IAM least-privilege policy generator.
-
-        Rules (MANDATORY): 
-        - Determine permissions required to EXECUTE the CLI command only.
-        - NEVER analyze or reuse permissions inside --policy-document.
-        - NEVER invent AWS actions.
-        - Return the MINIMUM required IAM permissions.
-        - Scope Resource as narrowly as possible.
-        - Prefer specific ARN over "*".
-        - Output ONLY valid IAM policy JSON.
-        - No explanations. No markdown.
-        """
-
-        user_prompt = f"""
-        AWS CLI command:
-        {user_cli_input}
-
-        Return the minimum IAM policy required to execute this command.
-        """
-
-        response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            data=json.dumps({
-                "model": "x-ai/grok-4.1-fast",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "reasoning": {"enabled": True}
-        })
-    )
-
-        #응답에서 JSON 부분 추출
-        result = response.json()
-        print("Grok(json):",result)
-        return {"message": "success","grok_result": result, "user_cli_input": user_cli_input}
+        # 명령 단위로 나눠서 로컬 해석 → 정책 캐시 → Grok 순서로 정책을 구하고 하나로 병합
+        # (응답 모양은 Grok 과 같아서 /grok_exe 는 그대로 사용)
+        generated = await generate_policy(user_cli_input, use_cache=use_cache)
+        sources = sorted({entry["source"] for entry in generated["provenance"]})
+        print(f"정책 생성(grok_json): 명령 {len(generated['provenance'])}개, 고유 {generated['unique_commands']}개, 출처 {sources}")
+        if generated["policy"] is None:
+            failed = [entry for entry in generated["provenance"] if "error" in entry]
+            return {"message": "error", "error": failed[0]["error"] if failed else "정책을 만들 명령이 없습니다.",
+                    "provenance": generated["provenance"]}
+        print("정책 압축(grok_json):", generated["compaction"])
+        return {"message": "success", "grok_result": as_grok_response(generated["policy"]),
+                "user_cli_input": user_cli_input,
+                "source": sources[0] if len(sources) == 1 else "mixed",
+                "provenance": generated["provenance"],
+                "compaction": generated["compaction"]}
     except Exception as e:
-        print(f"오류발생:{e}")
-        return {"message":"error","error":str(e)}
+        # httpx 타임아웃 예외는 메시지가 비어 있을 수 있어 예외 이름으로 대신
+        error = str(e) or type(e).__name__
+        print(f"오류발생:{error}")
+        return {"message":"error","error":error}
+
+
+# 정책 캐시 적중/미스 통계
+@router.get("/grok_json/cache")
+async def grok_policy_cache_stats():
+    return get_policy_cache().stats()
 
 
 # Grok으로 JSON 실행
@@ -99,11 +88,20 @@ def run_grok_exe(data: GrokRequest):
         print("JSON실행 실행")
         content = result["choices"][0]["message"]["content"]
 
-        match = re.search(r'\{[\s\S]*\}', content)
-        if not match:
+        # 설명문 / 코드 블록이 섞여 있어도 첫 번째 JSON 객체만 읽음
+        policy_document = extract_json_from_text(content)
+        if not isinstance(policy_document, dict):
             raise RuntimeError("No valid JSON policy returned from Grok")
 
-        policy_document = json.loads(match.group(0))
+        # 중복 제거 / Statement 합치기 / 안전한 와일드카드 → 검증 Lambda 에 넘기는 정책을 줄임
+        compacted = compact_policy(policy_document)
+        report = compaction_report(policy_document, compacted)
+        print("정책 압축(grok_exe):", report)
+        if not report["within_limit"]:
+            # IAM 이 거부할 정책이므로 Lambda 검증을 돌리지 않음
+            return {"message": "error", "error": f"정책 크기 {report['size'][1]}자가 IAM 제한 {report['limit']}자를 넘습니다.",
+                    "compaction": report}
+        policy_document = compacted
 
         lambda_event = {
             "policy_name": "codebuild-assume-policy",
@@ -0,0 +1,97 @@
+# OpenRouter(Grok) 비동기 공용 클라이언트
+# requests.post 는 이벤트 루프를 막아서 Grok 추론 1건을 기다리는 동안 서버 전체가 멈췄다.
+# 프로세스 전체에서 httpx.AsyncClient 1개를 재사용해 커넥션 풀 / keep-alive / HTTP/2 를 쓰고,
+# 연결 / 읽기 타임아웃과 동시 호출 수 제한을 둔다.
+# MBV_OPENROUTER_BASE_URL 을 바꾸면 로컬 모의 서버로 테스트할 수 있다.
+import asyncio
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- 설정 ---
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_BASE_URL = os.getenv("MBV_OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+GROK_MODEL_ID = os.getenv("MBV_GROK_MODEL_ID", "x-ai/grok-4.1-fast")
+OPENROUTER_CONNECT_TIMEOUT_SEC = float(os.getenv("MBV_OPENROUTER_CONNECT_TIMEOUT_SEC", "5"))
+# reasoning 을 켜면 응답까지 1분을 넘길 수 있다
+OPENROUTER_READ_TIMEOUT_SEC = float(os.getenv("MBV_OPENROUTER_READ_TIMEOUT_SEC", "120"))
+# 동시에 보내는 Grok 요청 수 (넘는 요청은 대기)
+OPENROUTER_MAX_CONCURRENCY = int(os.getenv("MBV_OPENROUTER_MAX_CONCURRENCY", "8"))
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("MBV_OPENROUTER_MAX_CONNECTIONS", "16"))
+OPENROUTER_KEEPALIVE_SEC = float(os.getenv("MBV_OPENROUTER_KEEPALIVE_SEC", "60"))
+
+# HTTP/2 는 h2 패키지가 있을 때만 (없으면 HTTP/1.1 keep-alive)
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+_client = None
+# 동시 호출 수 제한 (프로세스에 1개, 클라이언트를 다시 만들어도 대기 중인 요청이 같은 한도를 공유)
+_semaphore = asyncio.Semaphore(OPENROUTER_MAX_CONCURRENCY)
+
+
+def create_client(transport: httpx.AsyncBaseTransport = None) -> httpx.AsyncClient:
+    """설정값으로 AsyncClient 생성 (transport 는 테스트용 httpx.MockTransport)"""
+    return httpx.AsyncClient(
+        base_url=OPENROUTER_BASE_URL,
+        http2=HTTP2_ENABLED,
+        timeout=httpx.Timeout(
+            connect=OPENROUTER_CONNECT_TIMEOUT_SEC,
+            read=OPENROUTER_READ_TIMEOUT_SEC,
+            write=OPENROUTER_CONNECT_TIMEOUT_SEC,
+            pool=OPENROUTER_READ_TIMEOUT_SEC,
+        ),
+        limits=httpx.Limits(
+            max_connections=OPENROUTER_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENROUTER_MAX_CONNECTIONS,
+            keepalive_expiry=OPENROUTER_KEEPALIVE_SEC,
+        ),
+        headers={
+            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+            "Content-Type": "application/json",
+        },
+        transport=transport,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """공용 AsyncClient (최초 호출 시 생성, 이벤트 루프 스레드에서만 호출)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def close_client():
+    """공용 클라이언트 종료 (서버 종료 시 lifespan 에서 호출, 테스트 정리용)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def chat_completion(messages: list, model: str = GROK_MODEL_ID, reasoning: bool = True) -> dict:
+    """
+    OpenRouter chat completions 호출.
+    Returns:
+        OpenRouter 응답 JSON (choices[0].message.content 에 모델 출력)
+    Raises:
+        httpx.HTTPError: 연결 실패 / 타임아웃 / 4xx·5xx 응답
+    """
+    client = get_client()
+    async with _semaphore:
+        response = await client.post(
+            "/chat/completions",
+            json={
+                "model": model,
+                "messages": messages,
+                "reasoning": {"enabled": reasoning},
+            },
+        )
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,150 @@
+# Grok 최소 권한 정책 캐시 (로컬 SQLite)
+# 같은 CLI 명령(IAMHandler 가 만드는 put-user-policy / attach-role-policy 등)을 Grok 에 반복해서 보내지 않도록
+# 정규화한 명령 → Grok 응답을 저장한다. 서버를 재시작해도 유지되고 TTL 이 지나면 다시 묻는다.
+#
+# 정규화: 명령마다 서비스/작업 + 인자를 이름순으로 정렬하고, 권한과 무관한 값(--policy-document 본문 등,
+# 시스템 프롬프트에서도 무시하라고 한 값)은 자리표시자로 바꾼다. 인자 순서나 정책 본문만 다른 명령은 같은 키가 된다.
+import hashlib
+import json
+import os
+import shlex
+import sqlite3
+import threading
+import time
+
+from backend.grok.cli_action_resolver import parse_command
+
+# --- 경로 설정 ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+POLICY_CACHE_PATH = os.getenv(
+    "MBV_POLICY_CACHE_PATH",
+    os.path.join(BASE_DIR, "..", "json", "cache", "policy_cache.sqlite3"),
+)
+
+# --- 설정 ---
+POLICY_CACHE_TTL_SEC = int(os.getenv("MBV_POLICY_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+
+# 값이 필요한 권한에 영향을 주지 않는 인자 (값 대신 자리표시자)
+OPAQUE_ARGUMENTS = {
+    "policy-document",
+    "assume-role-policy-document",
+    "user-data",
+    "description",
+}
+OPAQUE_VALUE = "<opaque>"
+
+
+def normalize_command(command: str) -> str:
+    """CLI 명령 1개 → 정규화 문자열 (aws 명령으로 읽을 수 없으면 공백만 정리)"""
+    parsed = parse_command(command)
+    if parsed is None:
+        return " ".join(command.split())
+    service, operation, args, region, positional = parsed
+    if region:
+        args = {**args, "region": region}
+    parts = ["aws", service, operation] + [shlex.quote(p) for p in positional]
+    for name in sorted(args):
+        value = args[name]
+        if value is True:
+            parts.append(f"--{name}")
+        else:
+            parts.append(f"--{name} {OPAQUE_VALUE if name in OPAQUE_ARGUMENTS else shlex.quote(value)}")
+    return " ".join(parts)
+
+
+class PolicyCache:
+    """(모델, 정규화 명령) → Grok 응답 JSON"""
+
+    def __init__(self, path: str = POLICY_CACHE_PATH, ttl_sec: int = POLICY_CACHE_TTL_SEC):
+        self.path = os.path.normpath(path)
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS policies (
+                key        TEXT PRIMARY KEY,
+                model_id   TEXT NOT NULL,
+                command    TEXT NOT NULL,
+                result     TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                hit_count  INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.invalidated = 0
+
+    @staticmethod
+    def make_key(model_id: str, normalized: str) -> str:
+        return hashlib.sha256(f"{model_id}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, model_id: str, normalized: str):
+        key = self.make_key(model_id, normalized)
+        with self._lock:
+            row = self._conn.execute("SELECT result, created_at FROM policies WHERE key=?", (key,)).fetchone()
+            if row is not None and time.time() - row[1] > self.ttl_sec:
+                self._conn.execute("DELETE FROM policies WHERE key=?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE policies SET hit_count=hit_count+1 WHERE key=?", (key,))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, model_id: str, normalized: str, result: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO policies (key, model_id, command, result, created_at) VALUES (?, ?, ?, ?, ?)",
+                (self.make_key(model_id, normalized), model_id, normalized,
+                 json.dumps(result, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+            self.stores += 1
+
+    def delete(self, model_id: str, normalized: str) -> bool:
+        """항목 삭제 (저장된 응답을 쓸 수 없을 때, 지웠으면 True)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM policies WHERE key=?", (self.make_key(model_id, normalized),)
+            )
+            self._conn.commit()
+            if cursor.rowcount:
+                self.invalidated += 1
+        return cursor.rowcount > 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM policies").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "stores": self.stores,
+            "invalidated": self.invalidated,
+            "ttl_sec": self.ttl_sec,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> PolicyCache:
+    """프로세스 전역 캐시 (처음 사용할 때 생성)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PolicyCache()
+        return _cache
@@ -0,0 +1,186 @@
+# IAM 정책 압축 (최소화)
+# Grok 응답과 IAMHandler._generate_policy_json() 이 만드는 정책은 호출마다 Statement 1개, 액션을 나열한 형태라
+# 명령이 많아지면 IAM 크기 제한에 걸리고 mbv_Codebuild_Lambda 검증도 느려진다. 의미(허용 범위)는 그대로 두고
+#   1) 액션 중복 제거 (대소문자 무시, 같은 Statement 의 와일드카드가 이미 포함하는 액션 제거)
+#   2) Effect / Resource / Condition 이 같은 Statement 의 액션 합치기
+#   3) Effect / 액션 집합 / Condition 이 같은 Statement 의 Resource 합치기
+#   4) (MBV_POLICY_WILDCARDS=1 일 때만) 와일드카드가 현재 액션 집합보다 더 허용하지 않는 경우에만
+#      액션 묶음을 와일드카드로 줄이기 (iam:GetUser + iam:GetUserPolicy → iam:GetUser*).
+#      접두사에 속한 액션 전체는 그 접두사로 서명하는 모든 botocore 서비스의 작업 + IAM 전용 액션 기준이고,
+#      목록을 확인한 접두사(WILDCARD_PREFIXES)만 대상이다. 와일드카드는 AWS 가 나중에 추가하는 액션도 허용하므로
+#      기본값은 꺼짐.
+#   5) 관리형 정책 크기 제한(공백 제외 6,144자) 검사
+import fnmatch
+import json
+import os
+from bisect import bisect_left
+
+from backend.grok.cli_action_resolver import get_action_index
+
+# --- 설정 ---
+# 관리형 정책 최대 크기 (공백 제외 문자 수)
+POLICY_SIZE_LIMIT = int(os.getenv("MBV_POLICY_SIZE_LIMIT", "6144"))
+# 와일드카드 압축 사용 여부 (기본 꺼짐)
+# stem* 은 지금 있는 액션뿐 아니라 AWS 가 나중에 추가하는 같은 stem 의 액션까지 허용한다
+POLICY_WILDCARDS = os.getenv("MBV_POLICY_WILDCARDS", "0") == "1"
+# 와일드카드를 만들 수 있는 접두사: botocore 작업 + IAM_ONLY_ACTIONS 가 실제 IAM 액션 목록과 맞는지 확인한 것만
+WILDCARD_PREFIXES = {
+    p for p in os.getenv("MBV_POLICY_WILDCARD_PREFIXES", "iam,sts").split(",") if p
+}
+# 와일드카드 앞부분 최소 길이 (iam:G* 처럼 너무 넓은 패턴은 만들지 않음)
+WILDCARD_MIN_STEM = 4
+
+def as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def statements_of(policy: dict) -> list:
+    """Statement 목록 (단일 객체로 온 경우 포함)"""
+    return [s for s in as_list(policy.get("Statement", [])) if isinstance(s, dict)]
+
+
+def policy_size(policy: dict) -> int:
+    """IAM 이 세는 정책 크기 (공백 제외)"""
+    return len(json.dumps(policy, separators=(",", ":"), ensure_ascii=False))
+
+
+def check_policy_size(policy: dict, limit: int = POLICY_SIZE_LIMIT) -> dict:
+    size = policy_size(policy)
+    return {"size": size, "limit": limit, "within_limit": size <= limit}
+
+
+def dedupe_actions(actions) -> list:
+    """중복 / 같은 목록의 와일드카드에 이미 포함된 액션 제거 (IAM 액션은 대소문자를 구분하지 않음)"""
+    unique = {}
+    for action in as_list(actions):
+        unique.setdefault(action.lower(), action)
+    patterns = [a for a in unique if "*" in a or "?" in a]
+    return sorted(
+        action for key, action in unique.items()
+        if not any(p != key and fnmatch.fnmatchcase(key, p) for p in patterns)
+    )
+
+
+def merge_statements(statements: list) -> list:
+    """
+    Allow/Deny Statement 병합:
+      1) Effect / Resource / Condition 이 같으면 액션을 합침 (중복 제거)
+      2) Effect / 액션 집합 / Condition 이 같으면 Resource 를 합침
+    NotAction / NotResource / Principal 이 있는 Statement 는 그대로 둔다.
+    """
+    kept, by_resource = [], {}
+    for statement in statements:
+        if any(k in statement for k in ("NotAction", "NotResource", "Principal", "NotPrincipal")) \
+                or "Action" not in statement:
+            if statement not in kept:
+                kept.append(statement)
+            continue
+        resources = tuple(sorted(set(as_list(statement.get("Resource", "*")))))
+        key = (statement.get("Effect", "Allow"), resources, json.dumps(statement.get("Condition"), sort_keys=True))
+        entry = by_resource.setdefault(key, {"condition": statement.get("Condition"), "actions": []})
+        entry["actions"].extend(as_list(statement["Action"]))
+
+    by_actions = {}
+    for (effect, resources, condition_key), entry in by_resource.items():
+        key = (effect, tuple(dedupe_actions(entry["actions"])), condition_key)
+        merged = by_actions.setdefault(key, {"condition": entry["condition"], "resources": set()})
+        merged["resources"].update(resources)
+
+    result = []
+    for (effect, actions, _), entry in by_actions.items():
+        # "*" 가 있으면 다른 ARN 은 의미 없음
+        resources = ["*"] if "*" in entry["resources"] else sorted(entry["resources"])
+        statement = {
+            "Effect": effect,
+            "Action": list(actions) if len(actions) > 1 else actions[0],
+            "Resource": resources if len(resources) > 1 else resources[0],
+        }
+        if entry["condition"] is not None:
+            statement["Condition"] = entry["condition"]
+        result.append(statement)
+    return result + kept
+
+
+def _matching(universe: list, stem: str) -> list:
+    """정렬된 universe 에서 stem 으로 시작하는 이름 (대소문자 무시)"""
+    start = bisect_left(universe, stem)
+    end = start
+    while end < len(universe) and universe[end].startswith(stem):
+        end += 1
+    return universe[start:end]
+
+
+def collapse_wildcards(actions: list) -> list:
+    """
+    같은 접두사의 액션 묶음을 와일드카드로 줄임.
+    stem* 이 가리키는 액션(접두사의 전체 액션 중 stem 으로 시작하는 것)이 모두 원래 목록에 있을 때만 바꾼다.
+    WILDCARD_PREFIXES 에 없는 접두사, 액션 목록을 모르는 접두사, 목록에 없는 액션이 섞인 경우는 그대로 둔다.
+    stem* 은 AWS 가 나중에 추가하는 같은 stem 의 액션도 허용한다.
+    """
+    by_prefix = {}
+    for action in actions:
+        prefix, _, name = action.partition(":")
+        by_prefix.setdefault(prefix.lower(), []).append(name)
+
+    result = []
+    for prefix, names in by_prefix.items():
+        universe = sorted(n.lower() for n in get_action_index().iam_actions(prefix)) \
+            if prefix in WILDCARD_PREFIXES else []
+        known = {n.lower() for n in names if "*" not in n and "?" not in n}
+        if not universe or not known or not known <= set(universe):
+            result.extend(f"{prefix}:{n}" for n in names)
+            continue
+
+        remaining = {n.lower(): n for n in names}
+        # 긴 이름부터: 각 액션을 포함하면서 가장 많은 액션을 묶는 안전한 stem 을 찾음
+        for name in sorted(known, key=len, reverse=True):
+            if name not in remaining:
+                continue
+            best = None
+            for k in range(len(name), WILDCARD_MIN_STEM - 1, -1):
+                covered = _matching(universe, name[:k])
+                if not all(c in known for c in covered):
+                    break
+                # 같은 액션 집합이면 긴 stem 을 유지 (iam:GetU* 대신 iam:GetUser*)
+                if len(covered) >= 2 and (best is None or len(covered) > len(best[1])):
+                    best = (name[:k], covered)
+            if best is None:
+                continue
+            stem, covered = best
+            if not all(c in remaining for c in covered):
+                continue
+            # 원래 대소문자 유지 (첫 액션 기준)
+            result.append(f"{prefix}:{remaining[name][:len(stem)]}*")
+            for c in covered:
+                remaining.pop(c, None)
+        result.extend(f"{prefix}:{n}" for n in remaining.values())
+    return sorted(result)
+
+
+def compact_policy(policy: dict, wildcards: bool = None) -> dict:
+    """정책 압축 (입력은 바꾸지 않음, wildcards 를 생략하면 MBV_POLICY_WILDCARDS 설정)"""
+    if wildcards is None:
+        wildcards = POLICY_WILDCARDS
+    statements = merge_statements(statements_of(policy))
+    if wildcards:
+        for i, statement in enumerate(statements):
+            if "Action" in statement and "Principal" not in statement:
+                actions = collapse_wildcards(dedupe_actions(statement["Action"]))
+                statements[i] = {**statement, "Action": actions if len(actions) > 1 else actions[0]}
+        # 와일드카드로 줄어든 액션 집합이 같아진 Statement 끼리 다시 합침
+        statements = merge_statements(statements)
+    compacted = {"Version": policy.get("Version", "2012-10-17"), "Statement": statements}
+    if "Id" in policy:
+        compacted["Id"] = policy["Id"]
+    return compacted
+
+
+def compaction_report(before: dict, after: dict, limit: int = POLICY_SIZE_LIMIT) -> dict:
+    count = lambda p: sum(len(as_list(s.get("Action", []))) for s in statements_of(p))
+    return {
+        "statements": [len(statements_of(before)), len(statements_of(after))],
+        "actions": [count(before), count(after)],
+        "size": [policy_size(before), policy_size(after)],
+        "limit": limit,
+        "within_limit": policy_size(after) <= limit,
+    }
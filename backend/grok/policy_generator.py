@@ -0,0 +1,143 @@
+# CLI 스크립트 → 최소 IAM 정책 (명령 단위 생성 + 병합)
+# IAMHandler 는 줄바꿈으로 구분한 명령 여러 개를 만든다. 스크립트 전체를 프롬프트 1개로 보내지 않고
+#   1) 명령 단위로 나눠서 정규화 (policy_cache.normalize_command) → 같은 명령은 1번만 처리
+#   2) 명령마다 로컬 해석(cli_action_resolver) → 정책 캐시 → Grok 순서로 정책을 구함 (Grok 호출은 동시에)
+#   3) 명령별 정책을 하나로 병합 + 압축 (policy_compactor: 중복 제거, Statement 합치기, 안전한 와일드카드)
+# 처리 시간 / 비용은 스크립트 길이가 아니라 고유 명령 수에 비례한다.
+import asyncio
+
+from backend.grok.openrouter_client import chat_completion, GROK_MODEL_ID
+from backend.grok.cli_action_resolver import resolve_command, split_commands
+from backend.grok.policy_cache import get_cache as get_policy_cache, normalize_command
+from backend.grok.policy_compactor import compact_policy, compaction_report, statements_of, as_list
+from backend.llm.stream_parser import extract_json_from_text
+
+SYSTEM_PROMPT = """
+        You are an AWS IAM least-privilege policy generator.
+
+        Rules (MANDATORY):
+        - Determine permissions required to EXECUTE the CLI command only.
+        - NEVER analyze or reuse permissions inside --policy-document.
+        - NEVER invent AWS actions.
+        - Return the MINIMUM required IAM permissions.
+        - Scope Resource as narrowly as possible.
+        - Prefer specific ARN over "*".
+        - Output ONLY valid IAM policy JSON.
+        - No explanations. No markdown.
+        """
+
+
+def build_user_prompt(cli_input: str) -> str:
+    return f"""
+        AWS CLI command:
+        {cli_input}
+
+        Return the minimum IAM policy required to execute this command.
+        """
+
+
+def policy_from_grok(result: dict):
+    """Grok 응답에서 정책 JSON (Statement 가 없으면 None)"""
+    try:
+        content = result["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError):
+        return None
+    policy = extract_json_from_text(content)
+    if isinstance(policy, dict) and "Statement" in policy:
+        return policy
+    return None
+
+
+async def generate_command_policy(command: str, normalized: str, use_cache: bool = True):
+    """
+    명령 1개의 정책.
+    Returns:
+        (정책 dict 또는 None, 출처 "resolver" | "cache" | "grok", 오류 메시지 또는 None)
+    """
+    try:
+        statements = resolve_command(command)
+    except Exception as e:
+        print(f"⚠️ 로컬 정책 해석 실패, Grok 사용: {e}")
+        statements = None
+    if statements is not None:
+        return {"Version": "2012-10-17", "Statement": statements}, "resolver", None
+
+    policy_cache = get_policy_cache()
+    if use_cache:
+        cached = policy_cache.get(GROK_MODEL_ID, normalized)
+        if cached is not None:
+            policy = policy_from_grok(cached)
+            if policy is not None:
+                return policy, "cache", None
+            # 정책 JSON 을 꺼낼 수 없는 항목 (파서가 바뀌기 전에 저장된 응답 등) → 지우고 캐시 미스로 처리
+            print(f"⚠️ 정책 캐시 항목을 쓸 수 없어 삭제 후 Grok 에 다시 요청: {normalized}")
+            policy_cache.delete(GROK_MODEL_ID, normalized)
+
+    try:
+        # 이벤트 루프를 막지 않고 기다림 (동시 호출 수는 openrouter_client 가 제한)
+        result = await chat_completion([
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_user_prompt(command)},
+        ])
+    except Exception as e:
+        # httpx 타임아웃 예외는 메시지가 비어 있을 수 있어 예외 이름으로 대신
+        return None, "grok", str(e) or type(e).__name__
+    print("Grok(json):", result)
+    policy = policy_from_grok(result)
+    if policy is None:
+        return None, "grok", "Grok 응답에 정책 JSON 이 없습니다."
+    # 정책 JSON 이 들어 있는 응답만 저장 (빈 응답 / 설명문은 다음에 다시 물음)
+    policy_cache.put(GROK_MODEL_ID, normalized, result)
+    return policy, "grok", None
+
+
+async def generate_policy(cli_input: str, use_cache: bool = True) -> dict:
+    """
+    CLI 스크립트 → 병합 정책 + 명령별 출처.
+    Returns:
+        {"policy": 병합 정책 (실패한 명령이 있으면 None),
+         "provenance": [{"index", "command", "normalized", "source", "actions", "duplicate_of"?, "error"?}],
+         "unique_commands": 고유 명령 수, "errors": 실패한 명령 수,
+         "compaction": 압축 전후 Statement / 액션 수, 크기, 크기 제한 통과 여부}
+    """
+    commands = split_commands(cli_input)
+    normalized = [normalize_command(c) for c in commands]
+
+    # 같은 정규화 명령은 처음 나온 것만 처리
+    first_index = {}
+    for i, key in enumerate(normalized):
+        first_index.setdefault(key, i)
+    unique = sorted(first_index.values())
+    outcomes = await asyncio.gather(*[
+        generate_command_policy(commands[i], normalized[i], use_cache) for i in unique
+    ])
+    by_key = {normalized[i]: outcome for i, outcome in zip(unique, outcomes)}
+
+    provenance, statements, errors = [], [], 0
+    for i, (command, key) in enumerate(zip(commands, normalized)):
+        policy, source, error = by_key[key]
+        entry = {
+            "index": i,
+            "command": command.splitlines()[0] + (" ..." if "\n" in command else ""),
+            "normalized": key,
+            "source": source,
+            "actions": sorted({
+                a for s in statements_of(policy or {}) for a in as_list(s.get("Action", []))
+            }),
+        }
+        if first_index[key] != i:
+            entry["duplicate_of"] = first_index[key]
+        elif error is not None:
+            entry["error"] = error
+            errors += 1
+        else:
+            statements.extend(statements_of(policy))
+        provenance.append(entry)
+
+    merged, report = None, None
+    if commands and not errors:
+        combined = {"Version": "2012-10-17", "Statement": statements}
+        merged = compact_policy(combined)
+        report = compaction_report(combined, merged)
+    return {"policy": merged, "provenance": provenance, "unique_commands": len(unique), "errors": errors,
+            "compaction": report}
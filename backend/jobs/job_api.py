@@ -0,0 +1,146 @@
+# 분석 작업 API
+# /mbv_search 는 임베딩 + LLM 분석(30~90초) 동안 HTTP 연결을 붙잡고 있어서 프록시/브라우저 타임아웃이나
+# 탭 닫힘으로 연결이 끊기면 분석도 버려진다. 여기서는 작업을 등록하자마자 작업 id 를 돌려주고,
+# 분석은 워커 스레드에서 끝까지 진행한다. 상태/결과는 작업 id 로 조회하거나 SSE 로 받는다.
+#   POST /jobs/mbv_search          → {"job_id", "status", "created"}
+#   GET  /jobs/{job_id}            → 작업 상태 (+ 끝났으면 결과 / 오류)
+#   GET  /jobs/{job_id}/stream     → 저장된 이벤트를 처음부터(또는 Last-Event-ID 이후부터) 보내고 끝날 때까지 이어서 보냄
+#   POST /jobs/{job_id}/cancel     → 작업 취소
+import asyncio
+import os
+import threading
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from backend.embed.mbv_search import stream_mbv_search, request_fingerprint, format_sse
+from backend.jobs.job_store import JobStore, SUCCEEDED, FINAL_STATUSES
+from backend.jobs.job_queue import JobQueue
+
+router = APIRouter()
+
+# --- 설정 ---
+# 작업 스트림이 새 이벤트를 확인하는 간격 (초)
+JOB_STREAM_POLL_SEC = float(os.getenv("MBV_JOB_STREAM_POLL_SEC", "0.5"))
+
+# 저장소 / 대기열은 import 시점이 아니라 서버 시작(lifespan) 또는 처음 사용할 때 만듦
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """프로세스 전역 작업 대기열 (없으면 저장소와 함께 만듦, 워커는 start() 해야 돈다)"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(JobStore(), {"mbv_search": stream_mbv_search})
+        return _job_queue
+
+
+def shutdown_job_queue():
+    """서버 종료 시: 워커 / 실행 프로세스 잠금 해제 후 저장소 연결 닫기"""
+    global _job_queue
+    with _job_queue_lock:
+        job_queue, _job_queue = _job_queue, None
+    if job_queue is not None:
+        job_queue.stop()
+        job_queue.store.close()
+
+
+def job_status(job: dict) -> dict:
+    """응답용 작업 상태 (params / 지문 등 내부 값 제외)"""
+    status = {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+    if job["result"] is not None:
+        status["result"] = job["result"]
+    if job["error"] is not None:
+        status["error"] = job["error"]
+    return status
+
+
+def _not_found(job_id: str):
+    return JSONResponse(status_code=404, content={"error": f"작업을 찾을 수 없습니다: {job_id}"})
+
+
+@router.post("/jobs/mbv_search")
+async def submit_mbv_search_job(request: Request):
+    # 요청 본문은 /mbv_search 와 같음: {"no_cache": true, "mode": "map_reduce"}
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    use_cache = not bool(body.get("no_cache", False))
+    mode = body.get("mode")
+
+    # 같은 지문의 작업이 대기/실행 중이면 그 작업 id 를 돌려줌
+    job, created = get_job_queue().submit(
+        "mbv_search",
+        {"use_cache": use_cache, "mode": mode},
+        fingerprint=request_fingerprint(use_cache, mode),
+    )
+    return {"job_id": job["job_id"], "status": job["status"], "created": created}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        return _not_found(job_id)
+    return job_status(job)
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job_queue = get_job_queue()
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return _not_found(job_id)
+    cancelled = job["status"] not in FINAL_STATUSES and job_queue.cancel(job_id)
+    return {"job_id": job_id, "cancelled": cancelled, "status": job_queue.store.get(job_id)["status"]}
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, request: Request):
+    """
+    작업 이벤트 SSE (이벤트 이름/데이터는 /mbv_search/stream 과 같음).
+    이벤트마다 id(순번)를 붙이므로 EventSource 가 다시 연결하면 Last-Event-ID 이후부터 이어서 받는다.
+    이 연결이 끊겨도 작업은 계속 진행된다.
+    """
+    job_store = get_job_queue().store
+    if job_store.get(job_id) is None:
+        return _not_found(job_id)
+    try:
+        last_seq = int(request.headers.get("last-event-id", "-1"))
+    except ValueError:
+        last_seq = -1
+
+    async def event_stream():
+        nonlocal last_seq
+        last_event = None
+        while True:
+            # 상태를 먼저 읽고 이벤트를 읽어야 마지막 이벤트를 놓치지 않음
+            job = job_store.get(job_id)
+            for seq, event, data in job_store.events(job_id, last_seq):
+                yield f"id: {seq}\n" + format_sse(event, data)
+                last_seq, last_event = seq, event
+            if job is None or job["status"] in FINAL_STATUSES:
+                if job is not None and job["status"] != SUCCEEDED and last_event != "error":
+                    # 취소 / 워커 오류 등으로 error 이벤트 없이 끝난 경우
+                    yield format_sse("error", {
+                        "error": job["error"] or f"작업이 {job['status']} 상태로 끝났습니다.",
+                        "status": job["status"],
+                    })
+                break
+            await asyncio.sleep(JOB_STREAM_POLL_SEC)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,226 @@
+# 분석 작업 대기열 + 워커 스레드
+# 작업은 SQLite(JobStore)에 먼저 기록한 뒤 대기열에 넣고, 고정 개수의 워커 스레드가 하나씩 꺼내 실행한다.
+# 실행 중 나오는 이벤트는 모두 저장소에 남기므로 브라우저 연결과 무관하게 분석이 끝까지 진행되고,
+# 결과는 나중에 작업 id 로 조회/스트리밍할 수 있다.
+#
+# uvicorn 워커가 여러 개여도 워커 스레드는 저장소 잠금 파일(<job db>.lock)을 잡은 프로세스 1개에서만 돈다.
+# 다른 프로세스는 작업을 저장소에 등록만 하고, 실행 프로세스가 저장소의 대기 작업을 가져가 실행한다.
+# 실행 프로세스가 죽거나 stop() 으로 종료하면 잠금이 풀리고 대기 중이던 프로세스가 이어받아 끝나지 못한 작업을 다시 넣는다.
+import os
+import queue
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 1개로 실행한다고 보고 잠금 없이 동작
+    fcntl = None
+
+from backend.jobs.job_store import (
+    JobStore, QUEUED, SUCCEEDED, FAILED, CANCELLED,
+)
+
+# --- 설정 ---
+# 동시에 실행하는 작업 수 (나머지는 대기열에서 기다림)
+JOB_WORKERS = int(os.getenv("MBV_JOB_WORKERS", "2"))
+# 다른 프로세스가 등록한 작업을 저장소에서 확인하는 간격 (초)
+JOB_POLL_SEC = float(os.getenv("MBV_JOB_POLL_SEC", "1.0"))
+# 실행 프로세스가 아닐 때 잠금을 다시 시도하는 간격 (초)
+JOB_OWNER_RETRY_SEC = float(os.getenv("MBV_JOB_OWNER_RETRY_SEC", "5.0"))
+# 종료 시 실행 중인 작업이 끝나기를 기다리는 시간 (초, 넘으면 작업은 다음 실행 프로세스가 다시 실행)
+JOB_STOP_TIMEOUT_SEC = float(os.getenv("MBV_JOB_STOP_TIMEOUT_SEC", "10.0"))
+
+
+class JobQueue:
+    """
+    runners: {작업 종류: 제너레이터 함수}
+      제너레이터 함수는 작업 params 를 키워드 인자로, cancel_event 를 추가로 받아
+      (이벤트 이름, 데이터) 를 yield 한다 (stream_mbv_search 와 같은 모양).
+      "done" 이벤트 데이터가 결과, "error" 이벤트는 실패로 기록된다.
+    """
+
+    def __init__(self, store: JobStore, runners: dict, workers: int = JOB_WORKERS):
+        self.store = store
+        self.runners = runners
+        self.workers = workers
+        self._queue = queue.Queue()
+        self._cancel_events = {}     # 실행 중인 작업 id → threading.Event
+        self._lock = threading.Lock()
+        self._started = False
+        self._owner = False
+        self._lock_file = None
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def _acquire_owner_lock(self) -> bool:
+        """작업 실행 프로세스 잠금 (다른 프로세스가 잡고 있으면 False, 프로세스가 끝나면 자동으로 풀림)"""
+        if fcntl is None:
+            return True
+        lock_file = open(f"{self.store.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def start(self):
+        """
+        FastAPI 시작 시 호출 (여러 번 호출해도 한 번만).
+        잠금을 잡으면 이 프로세스가 작업을 실행하고, 못 잡으면 잡을 때까지 대기 스레드에서 다시 시도한다.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._stopping.clear()
+        if self._acquire_owner_lock():
+            self._become_owner()
+        else:
+            print(f"⏸️ 다른 프로세스가 분석 작업을 실행 중 → 이 프로세스는 작업 등록만 함 (pid {os.getpid()})")
+            self._spawn(self._standby, "mbv-job-standby")
+
+    def stop(self, timeout: float = JOB_STOP_TIMEOUT_SEC):
+        """
+        FastAPI 종료 시 호출: 워커 / 대기 스레드를 멈추고 실행 프로세스 잠금을 푼다.
+        실행 중인 작업은 timeout 동안 기다리고, 그래도 안 끝나면 running 상태로 남겨
+        다음 실행 프로세스가 requeue_interrupted 로 다시 실행한다.
+        """
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        unfinished = [t.name for t in self._threads if t.is_alive()]
+        if unfinished:
+            print(f"⚠️ 종료 시간 안에 끝나지 않은 작업 스레드: {unfinished}")
+        self._threads = []
+        self._owner = False
+        if self._lock_file is not None:
+            # 파일을 닫으면 flock 도 풀림
+            self._lock_file.close()
+            self._lock_file = None
+        print(f"🛑 분석 작업 대기열 종료 (pid {os.getpid()})")
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _standby(self):
+        while not self._acquire_owner_lock():
+            if self._stopping.wait(JOB_OWNER_RETRY_SEC):
+                return
+        if self._stopping.is_set():
+            self._lock_file.close()
+            self._lock_file = None
+            return
+        self._become_owner()
+
+    def _become_owner(self):
+        """워커 시작 + 이전 실행 프로세스가 끝내지 못한 작업 다시 실행 (잠금을 잡은 프로세스만)"""
+        self._owner = True
+        resumed = self.store.requeue_interrupted()
+        if resumed:
+            print(f"♻️ 끝나지 않은 작업 {len(resumed)}건 다시 대기열에 넣음")
+        for job_id in resumed:
+            self._queue.put(job_id)
+        for i in range(self.workers):
+            self._spawn(self._worker, f"mbv-job-worker-{i}")
+        print(f"👷 분석 작업 워커 {self.workers}개 시작 (pid {os.getpid()})")
+
+    def submit(self, kind: str, params: dict, fingerprint: str = None):
+        """
+        작업 등록. 같은 지문의 작업이 대기/실행 중이면 새로 만들지 않고 그 작업을 돌려준다.
+        Returns:
+            (작업 dict, 새로 만들었는지)
+        """
+        if kind not in self.runners:
+            raise ValueError(f"알 수 없는 작업 종류입니다: {kind}")
+        if fingerprint is not None:
+            existing = self.store.find_active(fingerprint)
+            if existing is not None:
+                print(f"🔁 같은 분석 작업이 이미 진행 중 → {existing['job_id']}")
+                return existing, False
+        self.store.purge()
+        job = self.store.create(kind, params, fingerprint)
+        print(f"📥 작업 등록: {job['job_id']} ({kind}, 대기 {self._queue.qsize()}건)")
+        if self._owner:
+            # 실행 프로세스면 바로 깨움 (아니면 실행 프로세스가 저장소에서 가져감)
+            self._queue.put(job["job_id"])
+        return job, True
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        대기 중이면 바로 취소, 실행 중이면 저장소에 취소로 기록 (실행 프로세스의 워커가 다음 이벤트 경계에서 멈춤)
+        """
+        if self.store.cancel_queued(job_id):
+            return True
+        if not self.store.cancel_running(job_id):
+            return False
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+        if cancel_event is not None:
+            cancel_event.set()
+        return True
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                job_id, from_queue = self._queue.get(timeout=JOB_POLL_SEC), True
+            except queue.Empty:
+                # 다른 프로세스가 등록한 작업 (같은 작업을 두 워커가 집어도 mark_running 에서 하나만 실행)
+                job_id, from_queue = self.store.next_queued(), False
+                if job_id is None:
+                    continue
+            try:
+                self._run(job_id)
+            except Exception as e:
+                print(f"❌ 작업 실행 오류: {job_id} ({e})")
+                self.store.finish(job_id, FAILED, error=str(e))
+            finally:
+                if from_queue:
+                    self._queue.task_done()
+
+    def _run(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None or job["status"] != QUEUED or not self.store.mark_running(job_id):
+            # 대기 중 취소/삭제됨
+            return
+        cancel_event = threading.Event()
+        with self._lock:
+            self._cancel_events[job_id] = cancel_event
+        print(f"▶️ 작업 시작: {job_id} ({job['kind']})")
+
+        result, error = {}, None
+        try:
+            generator = self.runners[job["kind"]](**job["params"], cancel_event=cancel_event)
+            for seq, (event, data) in enumerate(generator):
+                self.store.add_event(job_id, seq, event, data)
+                if event == "infrastructure":
+                    result["infrastructure"] = data
+                elif event == "done":
+                    result.update(data)
+                elif event == "error":
+                    error = data.get("error") if isinstance(data, dict) else str(data)
+                # 다른 프로세스에서 받은 취소 요청은 저장소 상태로 확인
+                if not cancel_event.is_set() and self.store.status(job_id) == CANCELLED:
+                    cancel_event.set()
+                if cancel_event.is_set():
+                    generator.close()
+                    break
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+        if cancel_event.is_set() or self.store.status(job_id) == CANCELLED:
+            status = CANCELLED
+        elif error is not None or "analysis" not in result:
+            status = FAILED
+            error = error or "분석 결과 없이 작업이 끝났습니다."
+        else:
+            status = SUCCEEDED
+        self.store.finish(job_id, status, result=result if status == SUCCEEDED else None, error=error)
+        print(f"⏹️ 작업 종료: {job_id} ({status})")
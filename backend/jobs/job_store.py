@@ -0,0 +1,204 @@
+# 분석 작업(job) 저장소 (로컬 SQLite)
+# 작업 상태/결과와 작업 중 발생한 이벤트(infrastructure, documents, vulnerability, done, error)를 저장한다.
+# 서버가 재시작돼도 작업 기록이 남고, 끝나지 않은 작업은 다시 대기열에 넣을 수 있다.
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# --- 경로 설정 ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOB_DB_PATH = os.getenv(
+    "MBV_JOB_DB_PATH",
+    os.path.join(BASE_DIR, "..", "json", "cache", "jobs.sqlite3"),
+)
+
+# --- 설정 ---
+# 끝난 작업 보관 기간 (초). 새 작업을 넣을 때 이보다 오래된 작업은 지운다.
+JOB_RETENTION_SEC = int(os.getenv("MBV_JOB_RETENTION_SEC", str(24 * 3600)))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+FINAL_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobStore:
+    """작업 / 작업 이벤트 저장소 (스레드 안전)"""
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = os.path.normpath(path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id      TEXT PRIMARY KEY,
+                kind        TEXT NOT NULL,
+                params      TEXT NOT NULL,
+                fingerprint TEXT,
+                status      TEXT NOT NULL,
+                created_at  REAL NOT NULL,
+                started_at  REAL,
+                finished_at REAL,
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                result      TEXT,
+                error       TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_fingerprint ON jobs(fingerprint, status);
+            CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
+            CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT NOT NULL,
+                seq    INTEGER NOT NULL,
+                event  TEXT NOT NULL,
+                data   TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def create(self, kind: str, params: dict, fingerprint: str = None) -> dict:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, params, fingerprint, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params), fingerprint, QUEUED, time.time()),
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def find_active(self, fingerprint: str):
+        """같은 지문으로 대기/실행 중인 작업 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE fingerprint=? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (fingerprint, *ACTIVE_STATUSES),
+            ).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def mark_running(self, job_id: str) -> bool:
+        """대기 중인 작업만 실행 상태로 바꿈 (그 사이 취소됐으면 False)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status=?, started_at=?, attempts=attempts+1 WHERE job_id=? AND status=?",
+                (RUNNING, time.time(), job_id, QUEUED),
+            )
+            claimed = cursor.rowcount == 1
+            if claimed:
+                # 재시도(재시작 후 다시 실행)면 이전 시도의 이벤트는 지움
+                self._conn.execute("DELETE FROM job_events WHERE job_id=?", (job_id,))
+            self._conn.commit()
+        return claimed
+
+    def next_queued(self):
+        """가장 오래 기다린 대기 작업 id (없으면 None, 다른 프로세스가 등록한 작업도 포함)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status=? ORDER BY created_at LIMIT 1", (QUEUED,),
+            ).fetchone()
+        return row["job_id"] if row is not None else None
+
+    def status(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+        return row["status"] if row is not None else None
+
+    def finish(self, job_id: str, status: str, result=None, error: str = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status=?, finished_at=?, result=?, error=? WHERE job_id=?",
+                (status, time.time(), json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, job_id),
+            )
+            self._conn.commit()
+
+    def cancel_queued(self, job_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status=?, finished_at=? WHERE job_id=? AND status=?",
+                (CANCELLED, time.time(), job_id, QUEUED),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def cancel_running(self, job_id: str) -> bool:
+        """실행 중인 작업을 취소 상태로 (실행 중인 워커가 다음 이벤트 경계에서 확인하고 멈춤)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status=?, finished_at=? WHERE job_id=? AND status=?",
+                (CANCELLED, time.time(), job_id, RUNNING),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def add_event(self, job_id: str, seq: int, event: str, data):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_events (job_id, seq, event, data) VALUES (?, ?, ?, ?)",
+                (job_id, seq, event, json.dumps(data, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def events(self, job_id: str, after_seq: int = -1) -> list:
+        """[(seq, 이벤트 이름, 데이터)] (after_seq 이후만)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event, data FROM job_events WHERE job_id=? AND seq>? ORDER BY seq",
+                (job_id, after_seq),
+            ).fetchall()
+        return [(row["seq"], row["event"], json.loads(row["data"])) for row in rows]
+
+    def requeue_interrupted(self) -> list:
+        """서버 재시작 등으로 끝나지 못한 작업을 다시 대기 상태로 (생성 순서대로 작업 id 반환)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", ACTIVE_STATUSES,
+            ).fetchall()
+            self._conn.execute(
+                "UPDATE jobs SET status=?, started_at=NULL WHERE status=?", (QUEUED, RUNNING),
+            )
+            self._conn.commit()
+        return [row["job_id"] for row in rows]
+
+    def purge(self, retention_sec: int = JOB_RETENTION_SEC) -> int:
+        """보관 기간이 지난 끝난 작업 삭제"""
+        cutoff = time.time() - retention_sec
+        with self._lock:
+            expired = [
+                (row["job_id"],) for row in self._conn.execute(
+                    "SELECT job_id FROM jobs WHERE created_at<? AND status IN (?, ?, ?)",
+                    (cutoff, *FINAL_STATUSES),
+                ).fetchall()
+            ]
+            self._conn.executemany("DELETE FROM job_events WHERE job_id=?", expired)
+            self._conn.executemany("DELETE FROM jobs WHERE job_id=?", expired)
+            self._conn.commit()
+        if expired:
+            print(f"🧹 작업 기록 정리: {len(expired)}건 삭제")
+        return len(expired)
+
+    def close(self):
+        """DB 연결 닫기 (서버 종료 시)"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,72 @@
+# LLM 분석 결과 캐시
+# 같은 인프라 + 같은 검색 문서 + 같은 프롬프트/모델 설정이면 LLM 을 다시 호출하지 않고 이전 결과를 돌려준다.
+# 프로세스 메모리에 보관하며 TTL 이 지나거나 최대 개수를 넘으면 오래 안 쓴 항목부터 버린다 (LRU).
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- 설정 ---
+ANALYSIS_CACHE_TTL_SEC = int(os.getenv("MBV_ANALYSIS_CACHE_TTL_SEC", "3600"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("MBV_ANALYSIS_CACHE_MAX_ENTRIES", "128"))
+
+
+def canonical_hash(data) -> str:
+    """키 순서/공백과 무관한 JSON 해시"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def make_key(infra, doc_ids, prompt_version, model_params) -> str:
+    """
+    캐시 키 = (인프라 그래프, 검색된 문서 id 목록, 프롬프트 버전, 모델 파라미터) 의 해시.
+    문서 순서도 프롬프트에 영향을 주므로 정렬하지 않는다.
+    """
+    return canonical_hash({
+        "infra": canonical_hash(infra),
+        "docs": list(doc_ids),
+        "prompt_version": prompt_version,
+        "model": model_params,
+    })
+
+
+class AnalysisCache:
+    """TTL + LRU 분석 결과 캐시 (스레드 안전)"""
+
+    def __init__(self, ttl_sec: int = ANALYSIS_CACHE_TTL_SEC, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """캐시된 결과의 복사본 (없거나 만료되면 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl_sec:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 프로세스 전역 캐시
+analysis_cache = AnalysisCache()
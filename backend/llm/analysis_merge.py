@@ -0,0 +1,78 @@
+# map-reduce 분석의 reduce 단계
+# 문서별로 따로 받은 LLM 분석 결과를 하나로 합치고, 같은 취약점(제목 기준)은 한 건으로 묶는다.
+# 묶인 취약점은 severity/CVSS 가 더 높은 쪽을 남기고 근거 문서(sources)를 모두 기록한다.
+import re
+
+from backend.llm.stream_parser import summarize
+
+SEVERITY_RANK = {"high": 3, "medium": 2, "low": 1}
+
+
+def dedupe_key(vuln: dict) -> str:
+    """중복 판단 키: 공백/문장부호/대소문자를 무시한 제목"""
+    return re.sub(r"[\W_]+", "", str(vuln.get("title", "")).lower())
+
+
+def _rank(vuln: dict):
+    try:
+        cvss = float(vuln.get("cvss_score") or 0.0)
+    except (TypeError, ValueError):
+        cvss = 0.0
+    return SEVERITY_RANK.get(str(vuln.get("severity")).lower(), 0), cvss
+
+
+class AnalysisMerger:
+    """
+    사용 예:
+        merger = AnalysisMerger()
+        for title, result in 문서별_결과:
+            new_vulns = merger.add(result, source=title)
+        merged = merger.result()
+    """
+
+    def __init__(self):
+        self._vulns = {}          # dedupe_key → 취약점 (sources 포함)
+        self.documents = []       # 분석에 성공한 문서
+        self.failed = []          # LLM 호출/파싱에 실패한 문서
+        self.partial = []         # 응답이 잘려 일부 취약점만 복구된 문서
+        self.duplicates = 0
+
+    def add(self, analysis, source: str) -> list:
+        """문서 1건의 분석 결과를 합치고, 처음 등장한 취약점 목록을 반환"""
+        if analysis is None or "raw_output" in analysis:
+            self.failed.append(source)
+            return []
+        self.documents.append(source)
+        if "parse" in analysis:
+            self.partial.append(source)
+
+        new_vulns = []
+        for vuln in analysis.get("vulnerabilities", []):
+            key = dedupe_key(vuln)
+            existing = self._vulns.get(key)
+            if existing is None:
+                merged = dict(vuln, sources=[source])
+                self._vulns[key] = merged
+                new_vulns.append(merged)
+                continue
+            self.duplicates += 1
+            sources = existing["sources"] + [s for s in [source] if s not in existing["sources"]]
+            if _rank(vuln) > _rank(existing):
+                existing.clear()
+                existing.update(vuln)
+            existing["sources"] = sources
+        return new_vulns
+
+    def result(self) -> dict:
+        """합친 결과 (severity → CVSS 내림차순 정렬, summary 재계산)"""
+        vulnerabilities = sorted(self._vulns.values(), key=_rank, reverse=True)
+        return {
+            "summary": summarize(vulnerabilities),
+            "vulnerabilities": vulnerabilities,
+            "map_reduce": {
+                "documents": list(self.documents),
+                "failed": list(self.failed),
+                "partial": list(self.partial),
+                "duplicates_removed": self.duplicates,
+            },
+        }
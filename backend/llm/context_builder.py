@@ -0,0 +1,196 @@
+# 보안 분석 프롬프트 컨텍스트 빌더 (토큰 예산 관리)
+# 인프라 그래프와 RAG 문서를 최소화(minify)하고 분석에 쓰이지 않는 필드를 뺀 뒤,
+# 입력 토큰 예산 안에 들어가는 만큼만 프롬프트에 넣는다. 무엇을 뺐는지는 report 로 돌려준다.
+#
+# 빼는 필드
+#   level 0 (항상)  : schema_version, 엣지 id (src/relation/dst 로 만들어진 값),
+#                    node_id 끝부분과 같은 name, 빈 값([], {}, None, "")
+#   level 1 (예산 초과 시) : 엣지 conditions 설명 문장 (relation 이름과 같은 내용의 영어 설명)
+# 문서는 상위 순위부터 넣고, 예산을 넘는 하위 문서는 통째로 뺀다 (문서를 중간에서 자르지 않음).
+import json
+import math
+import os
+from collections import Counter
+
+# 토큰 계산: tiktoken 이 설치되어 있으면 사용, 없으면 문자 수 기반 근사
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _encoding = None
+    print("⚠️ tiktoken 을 불러오지 못해 토큰 수를 문자 수로 근사합니다 (pip install -r requirements.txt).")
+
+# --- 설정 ---
+# 모델 컨텍스트 창 (gpt-oss-120b)
+MODEL_CONTEXT_WINDOW = int(os.getenv("MBV_MODEL_CONTEXT_WINDOW", "131072"))
+# 입력(시스템 + 프롬프트 + 인프라 + 문서) 토큰 예산
+CONTEXT_INPUT_BUDGET = int(os.getenv("MBV_CONTEXT_INPUT_BUDGET", "16000"))
+
+MAX_DROP_LEVEL = 1
+
+
+def tokenizer_name() -> str:
+    return "tiktoken:o200k_base" if _encoding is not None else "heuristic"
+
+
+def count_tokens(text: str) -> int:
+    """
+    토큰 수.
+    근사식: ASCII 는 4자당 1토큰, 한글 등 비ASCII 는 1자당 1토큰 (실제보다 약간 크게 잡힘)
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return math.ceil((len(text) - non_ascii) / 4) + non_ascii
+
+
+def minify(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _strip_empty(value, dropped: Counter, key=None):
+    """빈 값 재귀 제거"""
+    if isinstance(value, dict):
+        cleaned = {}
+        for k, v in value.items():
+            v = _strip_empty(v, dropped, k)
+            if _is_empty(v):
+                dropped[f"empty:{k}"] += 1
+                continue
+            cleaned[k] = v
+        return cleaned
+    if isinstance(value, list):
+        return [v for v in (_strip_empty(v, dropped, key) for v in value) if not _is_empty(v)]
+    return value
+
+
+def _compact_graph(graph: dict, level: int, dropped: Counter) -> dict:
+    graph = dict(graph)
+    if graph.pop("schema_version", None) is not None:
+        dropped["schema_version"] += 1
+
+    nodes = []
+    for node in graph.get("nodes", []) or []:
+        if not isinstance(node, dict):
+            nodes.append(node)
+            continue
+        node = dict(node)
+        node_id = str(node.get("node_id", ""))
+        if node.get("name") and node_id.endswith(str(node["name"])):
+            del node["name"]
+            dropped["node.name"] += 1
+        nodes.append(node)
+    if "nodes" in graph:
+        graph["nodes"] = nodes
+
+    edges = []
+    for edge in graph.get("edges", []) or []:
+        if not isinstance(edge, dict):
+            edges.append(edge)
+            continue
+        edge = dict(edge)
+        if "id" in edge and "src" in edge and "dst" in edge:
+            del edge["id"]
+            dropped["edge.id"] += 1
+        if level >= 1 and isinstance(edge.get("conditions"), str):
+            del edge["conditions"]
+            dropped["edge.conditions"] += 1
+        edges.append(edge)
+    if "edges" in graph:
+        graph["edges"] = edges
+    return graph
+
+
+def compact_infra(infra, level: int = 0):
+    """
+    인프라 JSON 에서 분석에 쓰이지 않는 필드 제거.
+    그래프 형식({nodes, edges}) 과 search_pandyo 형식({resources: [{fileName, content}]}) 모두 처리.
+    Returns:
+        (정리된 인프라, Counter{필드: 제거 횟수})
+    """
+    dropped = Counter()
+    if isinstance(infra, dict) and "resources" in infra:
+        compacted = dict(infra)
+        compacted["resources"] = [
+            dict(res, content=_compact_graph(res["content"], level, dropped))
+            if isinstance(res, dict) and isinstance(res.get("content"), dict) else res
+            for res in infra["resources"]
+        ]
+    elif isinstance(infra, dict):
+        compacted = _compact_graph(infra, level, dropped)
+    else:
+        compacted = infra
+    return _strip_empty(compacted, dropped), dropped
+
+
+def compact_document(data):
+    """RAG 문서 정리 (출처 URL 등 분석과 무관한 필드 제거) → minify 문자열"""
+    if isinstance(data, dict) and isinstance(data.get("platform"), dict):
+        data = dict(data, platform={k: v for k, v in data["platform"].items() if k != "reference"})
+    return minify(_strip_empty(data, Counter()))
+
+
+def input_budget(output_reserve: int, budget: int = CONTEXT_INPUT_BUDGET) -> int:
+    """입력 예산 (출력 토큰 자리를 컨텍스트 창에서 먼저 빼 둠)"""
+    return min(budget, MODEL_CONTEXT_WINDOW - output_reserve)
+
+
+def build_context(infra, documents, overhead_tokens: int, output_reserve: int, budget: int = CONTEXT_INPUT_BUDGET):
+    """
+    인프라 + 문서를 입력 예산 안에 맞춘다.
+
+    Args:
+        infra: 인프라 JSON (dict)
+        documents: [(title, 컨텍스트 블록 문자열)] 순위순
+        overhead_tokens: 시스템 메시지 + 프롬프트 템플릿 토큰 수
+        output_reserve: 출력용으로 남겨둘 토큰 수 (max_tokens)
+    Returns:
+        (인프라 JSON 문자열, 문서 컨텍스트 문자열, report)
+    """
+    limit = input_budget(output_reserve, budget)
+    doc_tokens = [(title, block, count_tokens(block)) for title, block in documents]
+
+    for level in range(MAX_DROP_LEVEL + 1):
+        compacted, dropped = compact_infra(infra, level)
+        infra_json = minify(compacted)
+        infra_tokens = count_tokens(infra_json)
+        remaining = limit - overhead_tokens - infra_tokens
+        included, excluded = [], []
+        for title, block, tokens in doc_tokens:
+            # 구분용 빈 줄 2개 몫 포함
+            if tokens + 2 <= remaining:
+                included.append((title, block, tokens))
+                remaining -= tokens + 2
+            else:
+                excluded.append(title)
+        if included or not doc_tokens:
+            break
+
+    over_budget = False
+    if doc_tokens and not included:
+        # 1순위 문서 하나도 못 넣으면 분석 자체가 무의미하므로 예산을 넘더라도 넣는다
+        included = [doc_tokens[0]]
+        excluded = [title for title, _, _ in doc_tokens[1:]]
+        over_budget = True
+
+    retrieved_context = "\n\n".join(block for _, block, _ in included)
+    used = overhead_tokens + infra_tokens + sum(t + 2 for _, _, t in included)
+    report = {
+        "tokenizer": tokenizer_name(),
+        "budget": limit,
+        "output_reserve": output_reserve,
+        "input_tokens": used,
+        "infra_tokens": infra_tokens,
+        "document_tokens": {title: tokens for title, _, tokens in included},
+        "drop_level": level,
+        "dropped_fields": dict(dropped),
+        "dropped_documents": excluded,
+        "over_budget": over_budget or used > limit,
+    }
+    return infra_json, retrieved_context, report
@@ -0,0 +1,117 @@
+# 분석 응답 이어쓰기 (max_tokens 로 응답이 잘린 경우)
+# 같은 분석을 max_tokens 를 늘려 처음부터 다시 돌리는 대신, 이미 받은 취약점 제목을 알려주고
+# "나머지만" 출력하는 짧은 후속 호출을 보낸 뒤 결과를 이어 붙인다. 후속 호출 횟수는 상한을 둔다.
+import os
+
+from backend.llm.analysis_merge import dedupe_key
+from backend.llm.stream_parser import summarize
+
+# --- 설정 ---
+# 응답 1건당 최대 이어쓰기 호출 수 (0 이면 이어쓰기 안 함)
+MAX_CONTINUATIONS = int(os.getenv("MBV_MAX_CONTINUATIONS", "2"))
+
+# 응답 길이 제한으로 끝났음을 뜻하는 finish_reason / stop_reason 값
+LENGTH_FINISH_REASONS = ("length", "max_tokens")
+
+
+def build_continuation_prompt(prompt: str, reported: list) -> str:
+    """원래 프롬프트 + 이미 보고된 취약점 제목 (이 항목 이후부터 이어서 출력하도록)"""
+    titles = "\n".join(f"- {v.get('title')}" for v in reported) or "- (없음)"
+    return prompt + f"""
+
+[이어서 작성 (이전 응답이 출력 길이 제한으로 중간에 잘림)]
+아래 취약점은 이미 보고되었다. 이 항목들은 다시 출력하지 말고, 마지막 항목 다음부터 나머지 취약점만 위 스키마의 JSON 객체로 출력하라.
+더 보고할 취약점이 없으면 "vulnerabilities" 를 빈 배열로 출력하라. 분석 과정(reasoning)은 최소화하라.
+{titles}
+"""
+
+
+class AnalysisContinuation:
+    """
+    응답(원본 + 이어쓰기) 별 파서를 모아 하나의 결과로 합친다.
+
+    사용 예:
+        cont = AnalysisContinuation(prompt)
+        while True:
+            parser = VulnerabilityStreamParser()
+            for vuln in parser.feed(text):
+                if cont.accept(vuln):
+                    ...  # 새 취약점
+            cont.add(parser, finish_reason, text)
+            if not cont.needed():
+                break
+            prompt = cont.next_prompt()
+        result = cont.result()
+    """
+
+    def __init__(self, prompt: str, max_continuations: int = MAX_CONTINUATIONS):
+        self.prompt = prompt
+        self.max_continuations = max_continuations
+        self.continuations = 0
+        self.parsers = []
+        self.finish_reasons = []
+        self.texts = []
+        self.vulnerabilities = []
+        self._keys = set()
+        self._new_in_response = 0   # 지금 받고 있는 응답에서 나온 새 취약점 수
+        self._last_new = 0          # 직전에 끝난 응답에서 나온 새 취약점 수
+
+    def accept(self, vuln: dict) -> bool:
+        """새 취약점이면 기록하고 True (이어쓰기 응답이 앞 내용을 반복한 경우 False)"""
+        key = dedupe_key(vuln)
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        self.vulnerabilities.append(vuln)
+        self._new_in_response += 1
+        return True
+
+    def add(self, parser, finish_reason=None, text: str = ""):
+        """응답 1건이 끝났을 때 호출"""
+        self.parsers.append(parser)
+        self.finish_reasons.append(finish_reason)
+        self.texts.append(text or parser.buffer)
+        self._last_new = self._new_in_response
+        self._new_in_response = 0
+
+    @property
+    def truncated(self) -> bool:
+        """마지막 응답이 길이 제한으로 잘렸는지 (finish_reason 을 모르면 JSON 이 닫혔는지로 판단)"""
+        parser, finish_reason = self.parsers[-1], self.finish_reasons[-1]
+        if finish_reason is not None:
+            return finish_reason in LENGTH_FINISH_REASONS
+        return parser.truncated
+
+    def needed(self) -> bool:
+        if not self.truncated or self.continuations >= self.max_continuations:
+            return False
+        # 이어쓰기 응답에서 새 항목이 하나도 안 나오면 더 호출해도 진전이 없다고 본다
+        return len(self.parsers) == 1 or self._last_new > 0
+
+    def next_prompt(self) -> str:
+        self.continuations += 1
+        return build_continuation_prompt(self.prompt, self.vulnerabilities)
+
+    def result(self):
+        """
+        합친 결과 (어느 응답에서도 JSON 을 얻지 못했으면 None)
+        이어쓰기를 했으면 "continuation" 에 호출 수를 남기고, 마지막 응답까지 잘렸으면 "parse" 보고를 붙인다.
+        """
+        if not any(p.parse_root() is not None or p.items for p in self.parsers):
+            return None
+        if len(self.parsers) == 1:
+            return self.parsers[0].result()
+
+        result = {
+            "summary": summarize(self.vulnerabilities),
+            "vulnerabilities": list(self.vulnerabilities),
+            "continuation": {"calls": self.continuations, "finish_reasons": list(self.finish_reasons)},
+        }
+        last = self.parsers[-1]
+        report = last.report()
+        if self.truncated or report["lost"]:
+            result["parse"] = report
+        return result
+
+    def raw_output(self) -> str:
+        return "\n".join(t.strip() for t in self.texts if t and t.strip())
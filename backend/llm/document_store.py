@@ -0,0 +1,117 @@
+# RAG 문서 저장소 (메모리 상주)
+# backend/document/*.json 을 시작 시 한 번 읽어서 시나리오 id(platform.scenario) 별로 보관한다.
+# 분석 요청마다 파일을 열지 않고, 일정 간격으로 디렉터리만 확인해서 mtime 이 바뀐 파일만 다시 읽는다
+# (mtime 이 바뀌어도 내용 해시가 같으면 파싱을 건너뜀).
+# 요청으로 들어온 값은 메모리의 id 목록에서만 찾으므로 파일 경로로 쓰이지 않는다 (경로 조작 불가).
+import hashlib
+import json
+import os
+import threading
+import time
+
+from backend.llm.context_builder import compact_document, count_tokens
+
+# --- 경로 설정 ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DOCUMENT_DIR = os.path.normpath(os.path.join(BASE_DIR, "..", "document"))
+
+# --- 설정 ---
+# 디렉터리 변경 확인 간격 (초). 이 간격 안의 요청은 디스크를 전혀 보지 않는다.
+DOC_RELOAD_INTERVAL_SEC = float(os.getenv("MBV_DOC_RELOAD_INTERVAL_SEC", "2"))
+
+
+class RagDocument:
+    """문서 1건 (파싱된 JSON + 프롬프트에 넣을 본문(minify) + 본문 토큰 수)"""
+
+    def __init__(self, doc_id, filename, mtime_ns, sha256, data):
+        self.doc_id = doc_id
+        self.filename = filename
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+        self.data = data
+        self.content = compact_document(data)
+        self.tokens = count_tokens(self.content)
+
+    def render(self, index: int, title: str, score: float) -> str:
+        """프롬프트 컨텍스트 블록"""
+        return f"[문서 {index} - {title} (유사도: {score:.4f})]\n{self.content}"
+
+
+def _read_document(path, filename, mtime_ns):
+    with open(path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw.decode("utf-8"))
+    # 시나리오 id 가 없는 문서는 파일 이름으로 구분
+    doc_id = (data.get("platform") or {}).get("scenario") or os.path.splitext(filename)[0]
+    return RagDocument(doc_id, filename, mtime_ns, hashlib.sha256(raw).hexdigest(), data)
+
+
+class DocumentStore:
+    """시나리오 id → RagDocument (스레드 안전)"""
+
+    def __init__(self, directory: str = DOCUMENT_DIR, reload_interval_sec: float = DOC_RELOAD_INTERVAL_SEC):
+        self.directory = directory
+        self.reload_interval_sec = reload_interval_sec
+        self._by_file = {}       # 파일 이름 → RagDocument
+        self._by_id = {}         # 시나리오 id / 파일 이름(확장자 제외) → RagDocument
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def refresh(self, force: bool = False):
+        """mtime 이 바뀐 파일만 다시 읽음 (force 가 아니면 reload_interval_sec 에 한 번만 확인)"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval_sec:
+            return
+        with self._lock:
+            if not force and now - self._checked_at < self.reload_interval_sec:
+                return
+            by_file = {}
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                mtime_ns = entry.stat().st_mtime_ns
+                doc = self._by_file.get(entry.name)
+                if doc is None or doc.mtime_ns != mtime_ns:
+                    try:
+                        loaded = _read_document(entry.path, entry.name, mtime_ns)
+                    except (OSError, ValueError) as e:
+                        print(f"⚠️ 문서 로딩 실패 (건너뜀): {entry.name} ({e})")
+                        continue
+                    if doc is None or doc.sha256 != loaded.sha256:
+                        print(f"📚 문서 로딩: {loaded.doc_id} ({entry.name})")
+                        self.reloads += 1
+                        doc = loaded
+                    else:
+                        doc.mtime_ns = mtime_ns
+                by_file[entry.name] = doc
+
+            by_id = {}
+            for doc in by_file.values():
+                by_id.setdefault(os.path.splitext(doc.filename)[0], doc)
+            for doc in by_file.values():
+                by_id[doc.doc_id] = doc
+            self._by_file = by_file
+            self._by_id = by_id
+            self._checked_at = time.monotonic()
+
+    def get(self, ref: str):
+        """
+        시나리오 id 로 문서 조회 (없으면 None).
+        하위호환: 'document/sqs_flag_shop.json' 같은 예전 경로도 파일 이름만 떼어서 id 로 찾는다.
+        """
+        self.refresh()
+        if not ref:
+            return None
+        doc = self._by_id.get(ref)
+        if doc is None:
+            doc = self._by_id.get(os.path.splitext(os.path.basename(str(ref)))[0])
+        return doc
+
+    def ids(self) -> list:
+        self.refresh()
+        return sorted({doc.doc_id for doc in self._by_id.values()})
+
+
+# 프로세스 전역 저장소
+document_store = DocumentStore()
@@ -1,14 +1,38 @@
 # 양유상 작업물
 #현재 2번 방법 채택중
 import json
-import boto3
 import os  # 경로 처리를 위해 추가
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, Optional
 from botocore.exceptions import ClientError
 
 from fastapi import APIRouter, Request
 
-import re
+
+# 분석 결과 캐시
+from backend.llm.analysis_cache import analysis_cache, make_key
+# LLM 응답 JSON 파서 (스트리밍/전체 텍스트 공용, 잘린 응답 복구)
+from backend.llm.stream_parser import VulnerabilityStreamParser
+# max_tokens 로 잘린 응답 이어쓰기
+from backend.llm.continuation import AnalysisContinuation, MAX_CONTINUATIONS
+# 입력 크기 기반 모델 / reasoning_effort / 출력 토큰 라우팅
+from backend.llm.model_router import measure, route, max_output_tokens, ROUTING_RULES_VERSION
+# map-reduce 분석 결과 병합
+from backend.llm.analysis_merge import AnalysisMerger
+# RAG 문서 저장소 (메모리 상주, 시나리오 id 로 조회)
+from backend.llm.document_store import document_store
+# 토큰 예산 기반 컨텍스트 구성 (인프라/문서 minify, 불필요 필드 제거)
+from backend.llm.context_builder import build_context, count_tokens, CONTEXT_INPUT_BUDGET
+# IAM 유효 권한 / AssumeRole·PassRole 도달성 사전 계산
+from backend.llm.permission_engine import analyze as analyze_permissions, format_summary
+# 공용 AWS 클라이언트 (커넥션 풀/재시도/타임아웃 설정 포함, 프로세스 전체에서 재사용)
+from backend.common.aws_clients import bedrock_runtime
+# 단계별 지연 시간 / 토큰 계측
+from backend.common.telemetry import stage, observe_stage, record_tokens
 
 router = APIRouter()
 
@@ -18,63 +42,92 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # 1. 분석 대상 파일 (backend/json/pandyo/search_pandyo.json) - search_pandyo.py에서 인프라 받아오기(사용자 인프라)
 TARGET_JSON_PATH = os.path.join(BASE_DIR, "..", "json", "pandyo", "search_pandyo.json")
 
+# --- 모델 설정 (기본값, 실제 호출 값은 model_router 규칙 표가 입력 크기에 따라 정함) ---
+MODEL_ID = 'openai.gpt-oss-120b-1:0'
+MODEL_PARAMS = {
+    "max_tokens": 4096,
+    "temperature": 0.2,
+    "top_p": 0.9,
+    "reasoning_effort": "medium"
+}
+# 이어쓰기 호출은 남은 취약점만 출력하면 되므로 reasoning 을 줄여 출력 토큰을 아낀다
+CONTINUATION_OVERRIDES = {"reasoning_effort": "low"}
+# 프롬프트(템플릿/스키마)를 바꾸면 올려야 함 → 이전 프롬프트로 만든 캐시 결과를 쓰지 않게 됨
+PROMPT_VERSION = "2026-10-rag-permission-table-advisory"
+
+# --- 분석 실행 풀 ---
+# 임베딩/벡터 검색/LLM 호출은 모두 블로킹이라 이벤트 루프 밖의 전용 스레드 풀에서 실행한다.
+# 동시에 실행되는 분석 수는 워커 수로 제한되고, 초과 요청은 풀 대기열에서 기다린다.
+ANALYSIS_MAX_WORKERS = int(os.getenv("MBV_ANALYSIS_MAX_WORKERS", "4"))
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_MAX_WORKERS, thread_name_prefix="mbv-analysis")
+
+# --- 분석 모드 ---
+# single     : 검색된 문서를 모두 하나의 프롬프트에 넣어 1회 호출 (기존 방식)
+# map_reduce : 문서마다 작은 프롬프트로 동시에 호출(map) → 결과 병합/중복 제거(reduce)
+#              전체 소요 시간이 문서 수의 합이 아니라 가장 느린 문서 1건 수준이 된다.
+ANALYSIS_MODES = ("single", "map_reduce")
+ANALYSIS_MODE = os.getenv("MBV_ANALYSIS_MODE", "single")
+# map 단계 LLM 동시 호출 상한 (프로세스 전체 기준)
+# analysis_executor 안에서 제출하므로 별도 풀을 써야 워커끼리 서로 기다리며 멈추지 않는다.
+MAP_MAX_CONCURRENCY = int(os.getenv("MBV_MAP_MAX_CONCURRENCY", "3"))
+map_executor = ThreadPoolExecutor(max_workers=MAP_MAX_CONCURRENCY, thread_name_prefix="mbv-map")
+
+
+async def run_in_analysis_executor(func, *args):
+    """블로킹 분석 함수를 분석 전용 스레드 풀에서 실행하고 결과를 기다린다 (이벤트 루프는 막지 않음)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(analysis_executor, func, *args)
+
+
+async def iterate_in_analysis_executor(gen_func, *args, **kwargs):
+    """
+    블로킹 제너레이터를 분석 전용 스레드 풀에서 돌리면서 yield 값을 비동기로 하나씩 넘겨받는다 (SSE 용).
+    gen_func 는 cancel_event 키워드 인자를 받아야 하며,
+    소비하는 쪽이 중간에 멈추면 (브라우저 연결 종료) cancel_event 를 set 해서 작업 스레드도 멈추게 한다.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancel_event = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in gen_func(*args, cancel_event=cancel_event, **kwargs):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+                if cancel_event.is_set():
+                    break
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    loop.run_in_executor(analysis_executor, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancel_event.set()
+
 
 '''
 # 2. RAG용 지식 베이스 (backend/document/sqs_flag_shop.json) - mbv_search.py에서 경로 받아오기
 CONTEXT_PATH = os.path.join(BASE_DIR, "..", "document", "sqs_flag_shop.json")
 '''
 
-def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
-    if not text:
-        return None
+SYSTEM_PROMPT = "너는 전 세계 기업 환경을 대상으로 실전 침투 시나리오를 설계하고 검증하는 Tier-1 클라우드 보안 아키텍트이자 레드팀 리더이다."
 
-    # 1. <reasoning> 태그가 있다면 제거 (비탐욕적 매칭)
-    text = re.sub(r'<reasoning>.*?</reasoning>', '', text, flags=re.DOTALL)
-    
-    # 2. 마크다운 코드 블록(```json ... ```)이 있다면 제거
-    text = re.sub(r'```(?:json)?\s*([\s\S]*?)\s*```', r'\1', text)
 
-    # 3. 가장 바깥쪽의 { } 구간 찾기
-    try:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1:
-            json_str = text[start:end+1]
-            parsed = json.loads(json_str)
-            
-            # 요약 데이터 보정 로직 (기존 유지)
-            if "vulnerabilities" in parsed and "summary" not in parsed:
-                v = parsed["vulnerabilities"]
-                parsed["summary"] = {
-                    "high": len([x for x in v if str(x.get("severity")).lower() == "high"]),
-                    "medium": len([x for x in v if str(x.get("severity")).lower() == "medium"]),
-                    "low": len([x for x in v if str(x.get("severity")).lower() == "low"]),
-                }
-            return parsed
-    except Exception as e:
-        print(f"JSON 파싱 최종 실패: {e}")
-    
-    return None
-
-
-def run_security_analysis(target_infra_json: str, retrieved_context: str) -> Optional[Dict[str, Any]]:
+def build_prompt(target_infra_json: str, retrieved_context: str, permission_summary: str = "") -> str:
     """
-    EC2에서 지정된 모델을 사용하여 클라우드 보안 분석을 수행합니다.
+    분석 프롬프트 생성 (일반 호출 / 스트리밍 호출 공용)
+    (주의: f-string 내의 중괄호는 {{ }}로 이중 처리해야 합니다.)
     """
-
-    print("target_infra:",target_infra_json)
-    # # 1. 취약점 지식 베이스(RAG) 파일 읽기
-    # try:
-    #     with open(CONTEXT_PATH, "r", encoding="utf-8") as f:
-    #         retrieved_context = f.read()
-    # except FileNotFoundError:
-    #     print(f"Error: {CONTEXT_PATH} 파일을 찾을 수 없습니다.")
-    #     return None
-
-
-    # 2. 프롬프트 템플릿 정의
-    # (주의: f-string 내의 중괄호는 {{ }}로 이중 처리해야 합니다.)
-    prompt_template = f"""
+    return f"""
 역할: 너는 전 세계 기업 환경을 대상으로 실전 침투 시나리오를 설계하고 검증하는 Tier-1 클라우드 보안 아키텍트이자 레드팀 리더이다.
 목표: 단순한 설정 오류 나열이 아니라, 현실적인 공격자가 실제로 악용 가능한 권한 조합과 신뢰 경계 붕괴 시나리오를 논리적으로 증명한다.
 
@@ -84,6 +137,9 @@ def run_security_analysis(target_infra_json: str, retrieved_context: str) -> Opt
 입력: 분석 대상 인프라 구성 (JSON)
 {target_infra_json}
 
+입력: IAM 유효 권한 사전 계산 결과 (참고용: 정책 평가 엔진이 인프라 JSON 에서 계산한 값, '?' 는 Condition/신뢰 정보 부족으로 미확정)
+{permission_summary or "(IAM 주체 없음)"}
+
 [분석 실행 전략 (반드시 준수)]
 1. **Primary Task (RAG 시나리오 검증):**
    - 최우선적으로 상기 '컨텍스트'에 명시된 공격 기법이 '입력된 인프라'에서 실제로 재현 가능한지 검증하라.
@@ -94,9 +150,9 @@ def run_security_analysis(target_infra_json: str, retrieved_context: str) -> Opt
    - 컨텍스트에 없는 치명적인 취약점(IAM 권한 오남용, 리소스 노출, 암호화 미비 등)을 식별하여 보고하라.
 
 [심층 검증 및 오탐 제거 지침]
-1. **[Effective Permission Calculation]**: Allow 뿐만 아니라 Deny, SCP, Permissions Boundary 등을 모두 대조하여 실제 유효 권한을 계산하라.
+1. **[Effective Permission Calculation]**: 주체별 유효 권한(Allow/Deny 반영)은 'IAM 유효 권한 사전 계산 결과' 를 참고하되, 인프라 JSON 의 정책 문서와 직접 대조해 검증하라. 사전 계산은 단순화된 평가이므로 미확정('?') 항목, 누락된 주체/경로, SCP, Permissions Boundary 는 인프라 JSON 에서 스스로 판단하라.
 2. **[Identity vs Resource-based Policy Interaction]**: IAM 정책과 리소스 기반 정책의 상호작용을 분석하여 신뢰 경계 붕괴를 식별하라.
-3. **[Multi-hop Attack Simulation]**: sts:AssumeRole, iam:PassRole 등을 포함한 연쇄 공격 경로를 시뮬레이션하라.
+3. **[Multi-hop Attack Simulation]**: sts:AssumeRole, iam:PassRole 연쇄 경로는 사전 계산 결과의 reachability/chains 를 참고하되 그 밖의 경로도 직접 찾고, 각 단계에서 얻는 권한으로 가능한 공격을 시뮬레이션하라.
 4. **[False Positive Filtering]**: MFA, SourceIp 등 제어 조건을 검토하여 실제 공격 불가능한 오탐을 제거하라.
 
 
@@ -121,120 +177,495 @@ def run_security_analysis(target_infra_json: str, retrieved_context: str) -> Opt
 }}
 """
 
-    # 3. Bedrock/LLM 클라이언트 및 페이로드 설정
-    client = boto3.client(service_name='bedrock-runtime', region_name='ap-northeast-1')
-    model_id = 'openai.gpt-oss-120b-1:0'
 
-    # f-string 중괄호 오류 방지를 위해 딕셔너리 먼저 생성 후 json.dumps
+# 인프라/문서/권한 표를 뺀 고정 프롬프트(시스템 메시지 + 템플릿) 토큰 수
+PROMPT_OVERHEAD_TOKENS = count_tokens(SYSTEM_PROMPT + build_prompt("", "", " "))
+
+
+def build_payload(prompt: str, params: dict = None) -> str:
+    """Bedrock 요청 본문 (f-string 중괄호 오류 방지를 위해 딕셔너리 먼저 생성 후 json.dumps)"""
     payload = {
         "messages": [
-   {
-                "role": "system",
-                "content": "너는 전 세계 기업 환경을 대상으로 실전 침투 시나리오를 설계하고 검증하는 Tier-1 클라우드 보안 아키텍트이자 레드팀 리더이다."
-            },
-            {
-                "role": "user",
-                "content": prompt_template  # 기존에 정의한 prompt_template을 여기에 넣습니다.
-            }
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
         ],
-        "max_tokens": 4096,
-        "temperature": 0.2,
-        "top_p": 0.9,
-        "reasoning_effort": "medium"
+        **(params or MODEL_PARAMS)
     }
-    body = json.dumps(payload)
+    return json.dumps(payload)
+
+
+def invoke_prompt(prompt: str, params: dict = None, meta: dict = None, cancel_event=None, model_id: str = MODEL_ID):
+    """
+    invoke_model 1회 → 응답 텍스트 전체를 조각 1개로 yield (stream_prompt 와 같은 모양)
+    meta 가 있으면 meta["finish_reason"] 을 채운다.
+    """
+    client = bedrock_runtime('ap-northeast-1')
+    response = client.invoke_model(
+        body=build_payload(prompt, params),
+        modelId=model_id,
+        accept='application/json',
+        contentType='application/json'
+    )
+    response_body = json.loads(response.get('body').read())
+    # 모델 응답 구조에 따라 텍스트 추출 (choices 또는 completion)
+    if 'choices' in response_body:
+        choice = response_body['choices'][0]
+        result_text = choice['message']['content']
+        finish_reason = choice.get('finish_reason')
+    else:
+        result_text = response_body.get('completion', "")
+        finish_reason = response_body.get('stop_reason')
+    if meta is not None:
+        meta["finish_reason"] = finish_reason
+        usage = _usage_tokens(response_body)
+        if usage is not None:
+            meta["usage"] = usage
+    yield result_text
+
+
+def _stream_chunk_text(chunk: dict) -> str:
+    """스트림 이벤트 1개에서 응답 본문 텍스트 추출 (choices[0].delta.content 또는 completion)"""
+    if chunk.get("choices"):
+        delta = chunk["choices"][0].get("delta") or {}
+        return delta.get("content") or ""
+    return chunk.get("completion") or ""
+
+
+def _usage_tokens(body: dict):
+    """응답 본문/스트림 이벤트의 (입력 토큰, 출력 토큰) (없으면 None)"""
+    usage = body.get("usage")
+    if usage:
+        return (usage.get("prompt_tokens", usage.get("input_tokens")),
+                usage.get("completion_tokens", usage.get("output_tokens")))
+    metrics = body.get("amazon-bedrock-invocationMetrics")
+    if metrics:
+        return metrics.get("inputTokenCount"), metrics.get("outputTokenCount")
+    return None
+
 
+def _stream_finish_reason(chunk: dict):
+    if chunk.get("choices"):
+        return chunk["choices"][0].get("finish_reason")
+    return chunk.get("stop_reason")
+
+
+def stream_prompt(prompt: str, params: dict = None, meta: dict = None, cancel_event=None, model_id: str = MODEL_ID):
+    """
+    invoke_model_with_response_stream → 응답 텍스트 조각을 생성되는 대로 yield.
+    cancel_event(threading.Event)가 set 되면 (브라우저 연결 종료 등) 스트림 읽기를 중단한다.
+    meta 가 있으면 마지막 이벤트의 finish_reason 을 meta["finish_reason"] 에 채운다.
+    """
+    client = bedrock_runtime('ap-northeast-1')
+    response = client.invoke_model_with_response_stream(
+        body=build_payload(prompt, params),
+        modelId=model_id,
+        accept='application/json',
+        contentType='application/json'
+    )
+    stream = response.get('body')
     try:
-        response = client.invoke_model(
-            body=body,
-            modelId=model_id,
-            accept='application/json',
-            contentType='application/json'
-        )
-        response_body = json.loads(response.get('body').read())
-# 모델 응답 구조에 따라 텍스트 추출 (choices 또는 completion)
-        if 'choices' in response_body:
-            result_text = response_body['choices'][0]['message']['content']
-        else:
-            result_text = response_body.get('completion', "")
-        
-        # ⭐ 핵심 수정: json.loads()를 절대 하지 말고 텍스트 그대로 리턴합니다.
-        parsed = extract_json_from_text(result_text)
-        if parsed is not None:
-            return parsed
-        print("LLM 응답:", result_text.strip())
-        return {
+        for event in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                print("⏹️ 스트리밍 분석 중단 (클라이언트 연결 종료)")
+                break
+            if 'chunk' not in event:
+                continue
+            chunk = json.loads(event['chunk']['bytes'])
+            finish_reason = _stream_finish_reason(chunk)
+            if finish_reason and meta is not None:
+                meta["finish_reason"] = finish_reason
+            usage = _usage_tokens(chunk)
+            if usage is not None and meta is not None:
+                meta["usage"] = usage
+            text = _stream_chunk_text(chunk)
+            if text:
+                yield text
+    finally:
+        if hasattr(stream, 'close'):
+            stream.close()
+
+
+def _record_usage(prompt: str, output_text: str, meta: dict):
+    """LLM 호출 1회 토큰 수 기록 (응답에 usage 가 없으면 직접 세서 estimated 로 표시)"""
+    usage = meta.get("usage")
+    if usage is not None and None not in usage:
+        record_tokens(*usage)
+    else:
+        record_tokens(count_tokens(SYSTEM_PROMPT + prompt), count_tokens(output_text), estimated=True)
+
+
+def iterate_analysis(prompt: str, call=stream_prompt, cancel_event=None, routing: dict = None):
+    """
+    LLM 분석 1건 (응답이 max_tokens 로 잘리면 MAX_CONTINUATIONS 번까지 이어쓰기 호출).
+    call: stream_prompt (스트리밍) 또는 invoke_prompt (일반 호출)
+    routing: model_router.route() 결정 (None 이면 기본 모델 설정)
+    새 취약점은 ("vulnerability", v) 로 받는 대로, 마지막에 ("done", 결과) 를 yield 한다.
+    결과는 JSON 을 하나도 얻지 못했으면 raw_output 이 붙은 빈 결과.
+    """
+    cont = AnalysisContinuation(prompt)
+    model_id = routing["model_id"] if routing else MODEL_ID
+    params = routing["params"] if routing else MODEL_PARAMS
+    while True:
+        parser = VulnerabilityStreamParser()
+        meta = {}
+        started = time.perf_counter()
+        first_token = False
+        parse_sec = 0.0
+        for text in call(prompt, params, meta, cancel_event=cancel_event, model_id=model_id):
+            if not first_token:
+                first_token = True
+                observe_stage("llm_first_token", time.perf_counter() - started)
+            parse_started = time.perf_counter()
+            new_vulns = parser.feed(text)
+            parse_sec += time.perf_counter() - parse_started
+            for vuln in new_vulns:
+                if cont.accept(vuln):
+                    yield "vulnerability", vuln
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        observe_stage("llm_call", time.perf_counter() - started - parse_sec)
+        observe_stage("json_parse", parse_sec)
+        _record_usage(prompt, parser.buffer, meta)
+        cont.add(parser, meta.get("finish_reason"))
+        if not cont.needed():
+            break
+        print(f"✂️ 응답이 출력 길이 제한으로 잘림 → 이어쓰기 {cont.continuations + 1}/{cont.max_continuations} "
+              f"(지금까지 {len(cont.vulnerabilities)}건)")
+        prompt = cont.next_prompt()
+        params = {**params, **CONTINUATION_OVERRIDES}
+
+    result = cont.result()
+    if result is None:
+        print("LLM 응답:", cont.raw_output())
+        result = {
             "summary": {"high": 0, "medium": 0, "low": 0},
             "vulnerabilities": [],
-            "raw_output": result_text.strip()
+            "raw_output": cont.raw_output()
         }
+    elif "parse" in result:
+        lost = result["parse"]["lost"]
+        print(f"⚠️ 응답 일부 복구: {len(cont.vulnerabilities)}건 복구 / {len(lost)}건 손실 {[x['title'] for x in lost]}")
+    yield "done", result
 
-    except Exception as e:
-        print(f"오류 발생: {e}")
-        return None
-    
-def resolve_doc_path(relative_path: str) -> str:
+
+def run_security_analysis(target_infra_json: str, retrieved_context: str, permission_summary: str = "", routing: dict = None) -> Optional[Dict[str, Any]]:
     """
-    relative_path가 'document/sqs_flag_shop.json'으로 들어올 경우를 대비
+    EC2에서 지정된 모델을 사용하여 클라우드 보안 분석을 수행합니다.
     """
-    # 1. 넘겨받은 경로가 비어있는지 확인
-    if not relative_path:
-        return "경로 없음"
-        
-    # 2. BASE_DIR(backend/llm) -> ..(backend) -> relative_path(document/...)
-    full_path = os.path.normpath(os.path.join(BASE_DIR, "..", relative_path))
-    return full_path
 
-def run_mbv_llm(doc_info) -> str:
+    print("target_infra:",target_infra_json)
+
+    prompt = build_prompt(target_infra_json, retrieved_context, permission_summary)
+    try:
+        for event, data in iterate_analysis(prompt, call=invoke_prompt, routing=routing):
+            if event == "done":
+                return data
+    except Exception as e:
+        print(f"오류 발생: {e}")
+    return None
+
+
+def stream_security_analysis(target_infra_json: str, retrieved_context: str, permission_summary: str = "", routing: dict = None, cancel_event=None):
     """
-    doc_info: str (하위호환, 단일 문서 경로)
-             또는 list[(path, title, score)] (다중 문서)
+    run_security_analysis 의 스트리밍 버전 (invoke_model_with_response_stream, 이어쓰기 포함).
+    ("vulnerability", v) 를 받는 대로, 마지막에 ("done", 결과) 를 yield 한다.
     """
+    prompt = build_prompt(target_infra_json, retrieved_context, permission_summary)
+    yield from iterate_analysis(prompt, call=stream_prompt, cancel_event=cancel_event, routing=routing)
+
 
-# 사용자 인프라 읽기
+def load_target_infra() -> dict:
+    """사용자 인프라 읽기"""
     if not os.path.exists(TARGET_JSON_PATH):
         raise FileNotFoundError(f"분석 대상 파일 없음:{TARGET_JSON_PATH}")
-    with open(TARGET_JSON_PATH, "r", encoding='utf-8') as f:
-        target_infra_json = json.dumps(json.load(f), ensure_ascii=False)
+    with stage("file_read"), open(TARGET_JSON_PATH, "r", encoding='utf-8') as f:
+        return json.load(f)
 
 
-# RAG 문서 읽기 (다중 문서 지원)
-
-    # 하위호환: 기존처럼 str 하나만 넘어온 경우
+def normalize_doc_info(doc_info) -> list:
+    """
+    doc_info 를 [(문서 id, title, score)] 로 정리.
+    하위호환: str 하나만 넘어온 경우, 'document/x.json' 같은 예전 경로로 넘어온 경우도 문서 id 로 바꾼다.
+    """
     if isinstance(doc_info, str):
         doc_info = [(doc_info, "unknown", 0.0)]
+    normalized = []
+    for ref, title, score in doc_info:
+        doc = document_store.get(ref)
+        normalized.append((doc.doc_id if doc else ref, title, score))
+    return normalized
+
+
+def resolve_mode(mode=None) -> str:
+    """요청에 지정된 분석 모드 (없으면 MBV_ANALYSIS_MODE)"""
+    mode = mode or ANALYSIS_MODE
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"지원하지 않는 분석 모드입니다: {mode} ({' 또는 '.join(ANALYSIS_MODES)})")
+    return mode
+
+
+def analysis_cache_key(target_infra, doc_info, mode: str = "single") -> str:
+    """분석 결과 캐시 키 (인프라 + 문서 목록 + 프롬프트 버전 + 모델 설정 + 분석 모드)"""
+    return make_key(
+        target_infra,
+        [doc_id for doc_id, _, _ in doc_info],
+        PROMPT_VERSION,
+        {"model_id": MODEL_ID, "mode": mode, "input_budget": CONTEXT_INPUT_BUDGET,
+         "max_continuations": MAX_CONTINUATIONS, "routing_rules": ROUTING_RULES_VERSION, **MODEL_PARAMS},
+    )
+
 
-    context_parts = []
-    for i, (path, title, score) in enumerate(doc_info, 1):
-        full_path = resolve_doc_path(path)
-        if not os.path.exists(full_path):
-            print(f"⚠️ 문서 파일 없음 (건너뜀): {full_path}")
+def build_analysis_context(target_infra, doc_info):
+    """
+    인프라 + RAG 문서(메모리 저장소에서 조회, 다중 문서 지원) → 입력 토큰 예산에 맞춘 프롬프트 재료
+    IAM 유효 권한 표는 예산 계산 전에 먼저 만들어서 고정 프롬프트 몫으로 센다.
+    모델/reasoning_effort/출력 토큰은 완성된 입력 크기로 라우팅해서 report["routing"] 에 넣는다.
+    Returns:
+        (인프라 JSON 문자열, 문서 컨텍스트 문자열, 권한 표 문자열, report)
+    """
+    started = time.perf_counter()
+    blocks = []
+    for i, (doc_id, title, score) in enumerate(doc_info, 1):
+        doc = document_store.get(doc_id)
+        if doc is None:
+            print(f"⚠️ 문서 없음 (건너뜀): {doc_id}")
             continue
-        with open(full_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        context_parts.append(f"[문서 {i} - {title} (유사도: {score:.4f})]\n{content}")
-        print(f"  📖 문서 {i} 로딩 완료: {title} ({len(content)} bytes)")
+        blocks.append((title, doc.render(i, title, score)))
+        print(f"  📖 문서 {i}: {title} ({doc.tokens} tokens)")
 
-    if not context_parts:
+    if not blocks:
+        raise FileNotFoundError("유사도 기준을 충족하는 문서를 찾을 수 없습니다.")
+
+    permissions = analyze_permissions(target_infra)
+    permission_summary = format_summary(permissions)
+    permission_tokens = count_tokens(permission_summary)
+
+    target_infra_json, retrieved_context, report = build_context(
+        target_infra, blocks,
+        overhead_tokens=PROMPT_OVERHEAD_TOKENS + permission_tokens,
+        # 어떤 규칙으로 라우팅되더라도 출력 자리가 남도록 가장 큰 출력 예산을 빼 둠
+        output_reserve=max_output_tokens(MODEL_PARAMS["max_tokens"]),
+    )
+    report["permissions"] = {
+        "principals": len(permissions["principals"]),
+        "reachability": len(permissions["edges"]),
+        "chains": len(permissions["chains"]),
+        "tokens": permission_tokens,
+    }
+    print(
+        f"📄 입력 {report['input_tokens']}/{report['budget']} tokens [{report['tokenizer']}] "
+        f"(인프라 {report['infra_tokens']}, 권한 표 {permission_tokens}, 문서 {len(report['document_tokens'])}건) | "
+        f"제거 필드 {sum(report['dropped_fields'].values())}개 | 제외 문서 {report['dropped_documents'] or '-'}"
+    )
+    if report["over_budget"]:
+        print("⚠️ 입력 토큰 예산 초과 (1순위 문서만으로도 예산을 넘음)")
+
+    features = measure(target_infra, len(report["document_tokens"]), report["input_tokens"])
+    routing = route(features, MODEL_ID, MODEL_PARAMS)
+    report["routing"] = routing
+    observe_stage("context_build", time.perf_counter() - started)
+    print(
+        f"🧭 라우팅: {routing['rule']} → {routing['model_id']} "
+        f"(reasoning_effort={routing['params'].get('reasoning_effort')}, max_tokens={routing['params'].get('max_tokens')}) | {features}"
+    )
+    return target_infra_json, retrieved_context, permission_summary, report
+
+
+def _existing_docs(doc_info) -> list:
+    """저장소에 있는 문서만 (하나도 없으면 single 모드와 같은 오류)"""
+    docs = []
+    for doc in doc_info:
+        if document_store.get(doc[0]) is not None:
+            docs.append(doc)
+        else:
+            print(f"⚠️ 문서 없음 (건너뜀): {doc[0]}")
+    if not docs:
         raise FileNotFoundError("유사도 기준을 충족하는 문서를 찾을 수 없습니다.")
+    return docs
+
+
+def _analyze_document(target_infra, doc):
+    """map: 문서 1건만 컨텍스트로 넣어 분석 → (분석 결과, 컨텍스트 report)"""
+    target_infra_json, retrieved_context, permission_summary, report = build_analysis_context(target_infra, [doc])
+    return run_security_analysis(target_infra_json, retrieved_context, permission_summary, report["routing"]), report
+
+
+def iterate_map_results(target_infra, doc_info, cancel_event=None):
+    """
+    map 단계: 문서별 분석을 map_executor 에서 동시에 실행하고
+    끝나는 순서대로 (문서 제목, 분석 결과, 컨텍스트 report) 를 yield 한다.
+    """
+    docs = _existing_docs(doc_info)
+    print(f"🧩 map-reduce 분석: 문서 {len(docs)}건 (동시 호출 최대 {MAP_MAX_CONCURRENCY}건)")
+    # 요청 단위 계측(telemetry)이 map 스레드에서도 같은 요청에 기록되도록 컨텍스트를 복사해서 실행
+    futures = {
+        map_executor.submit(contextvars.copy_context().run, _analyze_document, target_infra, doc): doc
+        for doc in docs
+    }
+    try:
+        for future in as_completed(futures):
+            title = futures[future][1]
+            yield (title, *future.result())
+            if cancel_event is not None and cancel_event.is_set():
+                break
+    finally:
+        # 중단된 경우 아직 시작하지 않은 호출은 취소
+        for future in futures:
+            future.cancel()
+
+
+def _map_routing(reports: dict) -> dict:
+    """map-reduce: 문서별 라우팅 결정"""
+    return {title: report["routing"] for title, report in reports.items()}
 
-    retrieved_context = "\n\n".join(context_parts)
-    print(f"📄 총 {len(context_parts)}개 문서 → 컨텍스트 길이: {len(retrieved_context)} chars")
+
+def _log_merge(merger: AnalysisMerger):
+    print(
+        f"🧩 reduce 완료: 성공 {len(merger.documents)}건 (일부 복구 {len(merger.partial)}건) | 실패 {len(merger.failed)}건 | "
+        f"중복 취약점 {merger.duplicates}건 제거"
+    )
+
+
+def run_map_reduce_analysis(target_infra, doc_info) -> dict:
+    """문서별 병렬 분석(map) 후 결과 병합(reduce)"""
+    merger = AnalysisMerger()
+    reports = {}
+    for title, analysis, report in iterate_map_results(target_infra, doc_info):
+        merger.add(analysis, source=title)
+        reports[title] = report
+    _log_merge(merger)
+    return dict(merger.result(), context=reports, routing=_map_routing(reports))
+
+
+def _is_cacheable(analysis_result) -> bool:
+    """정상적으로 파싱된 결과만 캐시 (실패/파싱 불가/일부만 복구된 응답은 다음 요청에서 다시 시도)"""
+    if analysis_result is None or "raw_output" in analysis_result or "parse" in analysis_result:
+        return False
+    map_reduce = analysis_result.get("map_reduce", {})
+    return not map_reduce.get("failed") and not map_reduce.get("partial")
+
+
+def _get_cached_analysis(cache_key: str):
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        print(f"⚡ 분석 결과 캐시 적중 ({cache_key[:12]}) → LLM 호출 생략")
+        cached["cache_hit"] = True
+    return cached
+
+
+def run_mbv_llm(doc_info, use_cache: bool = True, mode: str = None) -> str:
+    """
+    doc_info: str (단일 문서 id)
+             또는 list[(문서 id, title, score)] (다중 문서)
+             문서 id 는 시나리오 이름 (예: sqs_flag_shop, document_store 참고)
+    use_cache: False 면 캐시를 건너뛰고 항상 LLM 을 새로 호출 (결과는 캐시에 갱신)
+    mode: "single" | "map_reduce" (None 이면 MBV_ANALYSIS_MODE)
+    """
+    mode = resolve_mode(mode)
+    target_infra = load_target_infra()
+    doc_info = normalize_doc_info(doc_info)
+
+    # 분석 결과 캐시 조회
+    cache_key = analysis_cache_key(target_infra, doc_info, mode)
+    if use_cache:
+        cached = _get_cached_analysis(cache_key)
+        if cached is not None:
+            return cached
 
  # LLM 분석 실행
-    analysis_result = run_security_analysis(target_infra_json, retrieved_context)
+    if mode == "map_reduce":
+        analysis_result = run_map_reduce_analysis(target_infra, doc_info)
+    else:
+        target_infra_json, retrieved_context, permission_summary, report = build_analysis_context(target_infra, doc_info)
+        analysis_result = run_security_analysis(target_infra_json, retrieved_context, permission_summary, report["routing"])
+        if analysis_result is not None:
+            # 프롬프트에 실제로 들어간 토큰 수 / 예산 때문에 뺀 필드와 문서
+            analysis_result["context"] = report
+            analysis_result["routing"] = report["routing"]
+
+    if _is_cacheable(analysis_result):
+        analysis_cache.put(cache_key, analysis_result)
 
     return analysis_result
 
+
+def stream_mbv_llm(doc_info, use_cache: bool = True, cancel_event=None, mode: str = None):
+    """
+    run_mbv_llm 의 스트리밍 버전 (블로킹 제너레이터).
+    취약점 항목이 완성될 때마다 ("vulnerability", 항목) 을 yield 하고,
+    마지막에 ("done", 전체 분석 결과) 를 yield 한다.
+    캐시 적중 시에는 캐시된 항목을 같은 순서로 바로 흘려보낸다.
+    map_reduce 모드에서는 문서별 분석이 끝날 때마다 처음 등장한 취약점을 보낸다.
+    """
+    mode = resolve_mode(mode)
+    target_infra = load_target_infra()
+    doc_info = normalize_doc_info(doc_info)
+
+    cache_key = analysis_cache_key(target_infra, doc_info, mode)
+    if use_cache:
+        cached = _get_cached_analysis(cache_key)
+        if cached is not None:
+            for vuln in cached.get("vulnerabilities", []):
+                yield "vulnerability", vuln
+            yield "done", cached
+            return
+
+    if mode == "map_reduce":
+        merger = AnalysisMerger()
+        reports = {}
+        for title, analysis, report in iterate_map_results(target_infra, doc_info, cancel_event=cancel_event):
+            reports[title] = report
+            for vuln in merger.add(analysis, source=title):
+                print(f"  🚨 취약점 수신: {vuln.get('title')} ({title})")
+                yield "vulnerability", vuln
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        _log_merge(merger)
+        analysis_result = dict(merger.result(), context=reports, routing=_map_routing(reports))
+        if _is_cacheable(analysis_result):
+            analysis_cache.put(cache_key, analysis_result)
+        yield "done", analysis_result
+        return
+
+    target_infra_json, retrieved_context, permission_summary, report = build_analysis_context(target_infra, doc_info)
+
+    analysis_result = None
+    for event, data in stream_security_analysis(target_infra_json, retrieved_context, permission_summary, report["routing"], cancel_event=cancel_event):
+        if event == "vulnerability":
+            print(f"  🚨 취약점 수신: {data.get('title')}")
+            yield "vulnerability", data
+        else:
+            analysis_result = data
+
+    if analysis_result is None:
+        # 취소됨 (cancel_event)
+        return
+
+    # 이어쓰기 후에도 잘린 응답(parse 보고) / JSON 이 없는 응답(raw_output)은 캐시하지 않음
+    analysis_result["context"] = report
+    analysis_result["routing"] = report["routing"]
+    if _is_cacheable(analysis_result):
+        analysis_cache.put(cache_key, analysis_result)
+    yield "done", analysis_result
+
+
 # --- 실행부 수정 ---
 # 외부에서 호출 계획 없으면 필요x
 @router.post("/mbv_llm_gpt")
 async def mbv_llm_gpt(request: Request):
     print("mbv_llm_gpt 함수 실행됨")
     body = await request.json()
-    description = body.get("descritpion")
-    print("llm에 전돨된 descritpion:", description)
-    analysis_result = run_mbv_llm(description)
+    # 요청 본문 예: {"doc_ids": ["sqs_flag_shop", "lambda_privesc"], "mode": "map_reduce"}
+    # 하위호환: {"descritpion": "document/sqs_flag_shop.json"} (파일 이름으로 문서 id 를 찾을 뿐 경로로 열지 않음)
+    doc_ids = body.get("doc_ids") or [body.get("descritpion")]
+    print("llm에 전돨된 문서:", doc_ids)
+
+    unknown = [d for d in doc_ids if not isinstance(d, str) or document_store.get(d) is None]
+    if unknown:
+        return {"analysis_result": None, "error": f"알 수 없는 문서 id: {unknown} (사용 가능: {document_store.ids()})"}
+
+    doc_info = [(doc_id, doc_id, 0.0) for doc_id in doc_ids]
+    analysis_result = await run_in_analysis_executor(run_mbv_llm, doc_info, True, body.get("mode"))
     return {"analysis_result": analysis_result}
 
     '''
@@ -0,0 +1,120 @@
+# 분석 모델 / reasoning_effort / 출력 토큰 라우팅
+# 입력 크기(노드 수, 엣지 수, 문서 수, 입력 토큰 수)를 보고 규칙 표에서 위에서부터 처음 맞는 규칙을 고른다.
+# 작은 그래프는 low effort 로 빨리 끝내고, 큰 그래프만 medium effort / 큰 출력 예산을 쓴다.
+# (test_method1~4 에서 비교한 low effort / medium effort 설정을 입력 크기별 규칙으로 고정한 것)
+#
+# 규칙 표는 MBV_ROUTING_RULES_PATH 의 JSON 파일로 바꿀 수 있다. 형식:
+#   [{"name": "small",
+#     "when": {"max_nodes": 15, "max_edges": 25, "max_documents": 3, "max_input_tokens": 6000},
+#     "model_id": "openai.gpt-oss-120b-1:0", "reasoning_effort": "low", "max_tokens": 3072}, ...]
+#   when 의 조건은 모두 만족해야 하고(생략한 조건은 무시), when 이 없는 규칙은 항상 맞는다.
+#   model_id / reasoning_effort / max_tokens 를 생략하면 기본 설정값을 쓴다.
+import hashlib
+import json
+import os
+
+from backend.llm.permission_engine import graph_parts
+
+# --- 설정 ---
+ROUTING_RULES_PATH = os.getenv("MBV_ROUTING_RULES_PATH", "")
+
+DEFAULT_ROUTING_RULES = [
+    {
+        "name": "small",
+        "when": {"max_nodes": 15, "max_edges": 25, "max_documents": 3, "max_input_tokens": 6000},
+        "reasoning_effort": "low",
+        "max_tokens": 3072,
+    },
+    {
+        "name": "large",
+        "when": {"min_nodes": 80},
+        "reasoning_effort": "medium",
+        "max_tokens": 6144,
+    },
+    {
+        "name": "large_context",
+        "when": {"min_input_tokens": 12000},
+        "reasoning_effort": "medium",
+        "max_tokens": 6144,
+    },
+    {
+        "name": "default",
+        "reasoning_effort": "medium",
+        "max_tokens": 4096,
+    },
+]
+
+FEATURES = ("nodes", "edges", "documents", "input_tokens")
+
+
+def load_rules(path: str = ROUTING_RULES_PATH) -> list:
+    """규칙 표 읽기 (파일이 없거나 형식이 틀리면 기본 규칙)"""
+    if not path:
+        return DEFAULT_ROUTING_RULES
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+        if not isinstance(rules, list) or not all(isinstance(r, dict) for r in rules):
+            raise ValueError("규칙 표는 객체 리스트여야 합니다")
+        for rule in rules:
+            unknown = {
+                key for key in rule.get("when", {})
+                if key.split("_", 1)[0] not in ("min", "max") or key.split("_", 1)[-1] not in FEATURES
+            }
+            if unknown:
+                raise ValueError(f"알 수 없는 조건: {sorted(unknown)}")
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 라우팅 규칙 로딩 실패, 기본 규칙 사용: {path} ({e})")
+        return DEFAULT_ROUTING_RULES
+    print(f"🧭 라우팅 규칙 로딩: {path} ({len(rules)}개)")
+    return rules
+
+
+ROUTING_RULES = load_rules()
+# 캐시 키용 (규칙 표가 바뀌면 이전 결과를 쓰지 않음)
+ROUTING_RULES_VERSION = hashlib.sha256(
+    json.dumps(ROUTING_RULES, sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+
+
+def measure(infra, documents: int, input_tokens: int) -> dict:
+    """라우팅 입력값"""
+    nodes, edges = graph_parts(infra)
+    return {"nodes": len(nodes), "edges": len(edges), "documents": documents, "input_tokens": input_tokens}
+
+
+def _matches(when: dict, features: dict) -> bool:
+    for key, limit in when.items():
+        bound, feature = key.split("_", 1)
+        value = features.get(feature, 0)
+        if bound == "max" and value > limit:
+            return False
+        if bound == "min" and value < limit:
+            return False
+    return True
+
+
+def max_output_tokens(default_max_tokens: int, rules: list = None) -> int:
+    """규칙 표에서 가장 큰 출력 예산 (입력 예산 계산 시 출력 자리로 미리 빼 둠)"""
+    return max([r.get("max_tokens", default_max_tokens) for r in rules or ROUTING_RULES] + [default_max_tokens])
+
+
+def route(features: dict, model_id: str, model_params: dict, rules: list = None) -> dict:
+    """
+    Returns:
+        {"rule", "model_id", "params"(Bedrock 요청 파라미터), "features"}
+    """
+    rule = next(
+        (r for r in rules or ROUTING_RULES if _matches(r.get("when", {}), features)),
+        {"name": "fallback"},
+    )
+    params = dict(model_params)
+    for key in ("reasoning_effort", "max_tokens"):
+        if key in rule:
+            params[key] = rule[key]
+    return {
+        "rule": rule.get("name", "unnamed"),
+        "model_id": rule.get("model_id", model_id),
+        "params": params,
+        "features": features,
+    }
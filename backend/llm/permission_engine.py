@@ -0,0 +1,418 @@
+# IAM 유효 권한 / 역할 도달성 사전 계산 엔진
+# LLM 이 인프라 JSON 의 정책 문서를 직접 읽고 계산하던 부분(유효 권한 계산, AssumeRole/PassRole 연쇄)을
+# 파이썬에서 결정적으로 계산해서, 프롬프트에는 작은 표만 넣는다.
+#
+# 평가 규칙 (AWS 정책 평가 로직의 단순화 버전)
+#   - 명시적 Deny > Allow > 암묵적 Deny
+#   - Action / NotAction 와일드카드(*, ?) 매칭, 대소문자 무시
+#   - Condition 이 붙은 문장은 "조건부(?)" 로 표시하고 확정 판단에는 쓰지 않는다
+#   - Resource 가 없는 문장은 "*" 로 본다 (수집기가 Resource 를 생략하는 경우가 있음)
+#   - 역할 신뢰 정책의 Principal 이 없으면 "신뢰 정보 없음(?)" 으로 표시한다
+# SCP / Permissions Boundary / 세션 정책은 그래프에 없으므로 계산하지 않는다.
+import re
+from collections import deque
+from functools import lru_cache
+
+# 권한 상승/탈취에 쓰이는 주요 액션 (표에 "escalation" 으로 따로 표시)
+SENSITIVE_ACTIONS = (
+    "iam:PassRole", "iam:CreateAccessKey", "iam:UpdateAccessKey", "iam:CreateLoginProfile",
+    "iam:UpdateLoginProfile", "iam:AttachUserPolicy", "iam:AttachRolePolicy", "iam:AttachGroupPolicy",
+    "iam:PutUserPolicy", "iam:PutRolePolicy", "iam:PutGroupPolicy", "iam:CreatePolicyVersion",
+    "iam:SetDefaultPolicyVersion", "iam:UpdateAssumeRolePolicy", "iam:AddUserToGroup",
+    "iam:DeactivateMFADevice", "sts:AssumeRole",
+    "lambda:CreateFunction", "lambda:UpdateFunctionCode", "lambda:InvokeFunction",
+    "lambda:CreateEventSourceMapping", "ec2:RunInstances", "ecs:RunTask", "ecs:RegisterTaskDefinition",
+    "ssm:SendCommand", "secretsmanager:GetSecretValue", "sqs:SendMessage", "s3:GetObject",
+)
+
+# PassRole 대상 역할을 실제로 쓰게 만드는 서비스별 액션
+PASS_ROLE_SERVICE_ACTIONS = {
+    "lambda.amazonaws.com": ("lambda:CreateFunction", "lambda:UpdateFunctionConfiguration"),
+    "ec2.amazonaws.com": ("ec2:RunInstances",),
+    "ecs-tasks.amazonaws.com": ("ecs:RunTask", "ecs:RegisterTaskDefinition"),
+    "glue.amazonaws.com": ("glue:CreateDevEndpoint", "glue:CreateJob"),
+    "cloudformation.amazonaws.com": ("cloudformation:CreateStack",),
+    "codebuild.amazonaws.com": ("codebuild:CreateProject",),
+}
+
+PRINCIPAL_KINDS = {"iam_user": "user", "iam_role": "role", "iam_group": "group"}
+# relation 이 없는 엣지(search_pandyo 형식)는 양 끝 노드 타입으로 관계를 정한다
+RELATIONS_BY_TYPES = {
+    ("iam_user", "iam_role"): "ASSUME_ROLE",
+    ("iam_role", "iam_role"): "ASSUME_ROLE",
+    ("iam_user", "iam_group"): "MEMBER_OF",
+}
+POLICY_KEYS = ("inline_policies", "attached_policies", "group_policies")
+MAX_CHAIN_DEPTH = 5
+MAX_PATTERNS_SHOWN = 20
+MAX_CHAINS_SHOWN = 30
+
+ALLOW = "allow"
+CONDITIONAL = "conditional"
+DENY = "deny"
+IMPLICIT_DENY = "implicit_deny"
+
+
+@lru_cache(maxsize=4096)
+def _wildcard(pattern: str):
+    return re.compile("^" + re.escape(pattern).replace(r"\*", ".*").replace(r"\?", ".") + "$", re.IGNORECASE)
+
+
+def wildcard_match(pattern: str, value: str) -> bool:
+    return bool(_wildcard(str(pattern)).match(str(value)))
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class Statement:
+    """정규화된 정책 문장 1개"""
+
+    def __init__(self, raw: dict):
+        self.effect = str(raw.get("Effect", "Allow")).capitalize()
+        self.actions = [str(a) for a in _as_list(raw.get("Action"))]
+        self.not_actions = [str(a) for a in _as_list(raw.get("NotAction"))] if "NotAction" in raw else None
+        self.resources = [str(r) for r in _as_list(raw.get("Resource"))] or ["*"]
+        self.not_resources = [str(r) for r in _as_list(raw.get("NotResource"))] if "NotResource" in raw else None
+        self.conditional = bool(raw.get("Condition"))
+
+    def matches_action(self, action: str) -> bool:
+        if self.not_actions is not None:
+            return not any(wildcard_match(p, action) for p in self.not_actions)
+        return any(wildcard_match(p, action) for p in self.actions)
+
+    def matches_resource(self, resource) -> bool:
+        """resource 가 None 이면 '어떤 리소스든 하나라도' (Deny 는 전체를 덮을 때만 매칭)"""
+        if resource is None:
+            if self.effect == "Deny":
+                return self.not_resources is None and "*" in self.resources
+            return True
+        if self.not_resources is not None:
+            return not any(wildcard_match(p, resource) for p in self.not_resources)
+        return any(wildcard_match(p, resource) for p in self.resources)
+
+
+def policy_statements(policy) -> list:
+    """정책 표현(문장 리스트 / {Statement} / {PolicyDocument} / 문장 dict) → [Statement]"""
+    if isinstance(policy, list):
+        return [st for p in policy for st in policy_statements(p)]
+    if not isinstance(policy, dict):
+        # 정책 이름(str)만 있는 경우 내용을 알 수 없음
+        return []
+    for key in ("Statement", "PolicyDocument", "Document"):
+        if key in policy:
+            return policy_statements(policy[key])
+    if "Effect" in policy or "Action" in policy or "NotAction" in policy:
+        return [Statement(policy)]
+    return []
+
+
+def evaluate(statements, action: str, resource=None) -> str:
+    """allow / conditional / deny / implicit_deny (매칭되는 문장만 본다)"""
+    allowed = cond_allow = cond_deny = False
+    for st in statements:
+        if not st.matches_action(action) or not st.matches_resource(resource):
+            continue
+        if st.effect == "Deny":
+            if not st.conditional:
+                return DENY
+            cond_deny = True
+        elif st.conditional:
+            cond_allow = True
+        else:
+            allowed = True
+    if allowed:
+        # 조건부 Deny 가 걸리면 조건에 따라 막힐 수 있음
+        return CONDITIONAL if cond_deny else ALLOW
+    # 조건부 Deny 만 있고 Allow 가 없으면 어차피 암묵적 Deny
+    return CONDITIONAL if cond_allow else IMPLICIT_DENY
+
+
+class Principal:
+    """IAM 사용자/역할/그룹 1개"""
+
+    def __init__(self, node: dict):
+        self.node_id = str(node.get("node_id", ""))
+        self.kind = PRINCIPAL_KINDS[node.get("type") or node.get("node_type")]
+        props = node.get("properties") or node.get("attributes") or {}
+        parts = self.node_id.split(":")
+        self.name = str(node.get("name") or parts[-1])
+        self.account = next((p for p in parts if p.isdigit() and len(p) == 12), None)
+        arn = props.get("arn")
+        if isinstance(arn, str) and arn.startswith("arn:"):
+            self.arn = arn
+        else:
+            self.arn = f"arn:aws:iam::{self.account or '*'}:{self.kind}/{self.name}"
+        # 표 / 경로 표시용 (사용자와 역할 이름이 같을 수 있어 종류를 붙임)
+        self.label = f"{self.kind} {self.name}"
+        self.statements = [st for key in POLICY_KEYS for st in policy_statements(props.get(key))]
+        trust = props.get("assume_role_policy")
+        self.trust = [
+            raw for raw in _as_list((trust or {}).get("Statement") if isinstance(trust, dict) else trust)
+            if isinstance(raw, dict)
+        ]
+
+    def trusted_services(self) -> list:
+        services = []
+        for raw in self.trust:
+            if str(raw.get("Effect", "Allow")) != "Allow":
+                continue
+            principal = raw.get("Principal")
+            if isinstance(principal, dict):
+                services.extend(str(s) for s in _as_list(principal.get("Service")))
+        return sorted(set(services))
+
+    def trusts(self, other) -> str:
+        """이 역할의 신뢰 정책이 other 의 AssumeRole 을 허용하는지: yes / no / unknown"""
+        verdict = "no"
+        for raw in self.trust:
+            if str(raw.get("Effect", "Allow")) != "Allow":
+                continue
+            if not any(wildcard_match(a, "sts:AssumeRole") for a in _as_list(raw.get("Action")) or ["*"]):
+                continue
+            principal = raw.get("Principal")
+            if principal is None:
+                verdict = "unknown"
+                continue
+            if principal == "*":
+                return "yes"
+            if not isinstance(principal, dict):
+                continue
+            for aws in _as_list(principal.get("AWS")):
+                aws = str(aws)
+                # 계정 root 신뢰 = 해당 계정의 신원 정책이 허용하면 누구나
+                if aws == "*" or aws == other.arn or (
+                    other.account and aws in (other.account, f"arn:aws:iam::{other.account}:root")
+                ):
+                    return "yes"
+        return verdict
+
+
+def graph_parts(infra):
+    """
+    그래프 형식 / search_pandyo 형식(resources[].content) 모두에서 노드와 엣지 수집
+    search_pandyo 형식의 엣지에는 관계 추론용으로 원래 fileName 을 붙인다.
+    """
+    nodes, edges = [], []
+    graphs = [(None, infra)]
+    if isinstance(infra, dict) and "resources" in infra:
+        # resources[] 는 {fileName, content} 이거나 그래프 자체
+        graphs = [
+            (res.get("fileName"), res.get("content", res)) for res in infra["resources"] if isinstance(res, dict)
+        ]
+    for file_name, graph in graphs:
+        if not isinstance(graph, dict):
+            continue
+        nodes.extend(n for n in graph.get("nodes", []) or [] if isinstance(n, dict))
+        found = [e for e in graph.get("edges", []) or [] if isinstance(e, dict)]
+        if "src" in graph and "dst" in graph:
+            found.append(graph)
+        for edge in found:
+            edges.append({**edge, "fileName": file_name} if file_name and "fileName" not in edge else edge)
+    return nodes, edges
+
+
+def _endpoint_type(value, file_name, position: int):
+    """
+    엣지 끝점의 노드 타입 추정.
+    "iam_user node_id" 같은 자리표시자 → iam_user, "123456789012:iam_role:name" → iam_role,
+    그 외에는 "iam_user_to_iam_role.json" 같은 파일 이름에서 (position 0 = src, 1 = dst)
+    """
+    value = str(value or "")
+    if value.endswith(" node_id"):
+        return value[:-len(" node_id")].strip()
+    for part in value.split(":"):
+        if part in PRINCIPAL_KINDS:
+            return part
+    if file_name:
+        stem = str(file_name).rsplit(".", 1)[0]
+        for sep in ("_to_", "_and_"):
+            if sep in stem:
+                return stem.split(sep, 1)[position]
+    return None
+
+
+def edge_relation(edge: dict) -> str:
+    """엣지 관계 (relation 이 없으면 양 끝 노드 타입으로 추론, 모르면 빈 문자열)"""
+    if edge.get("relation"):
+        return str(edge["relation"])
+    types = (
+        _endpoint_type(edge.get("src"), edge.get("fileName"), 0),
+        _endpoint_type(edge.get("dst"), edge.get("fileName"), 1),
+    )
+    return RELATIONS_BY_TYPES.get(types, "")
+
+
+def _edge_principals(edge: dict, position: int, principals: list, by_node_id: dict) -> list:
+    """엣지 끝점(src/dst) → principals 인덱스 목록 (같은 node_id 는 노드 타입으로 구분)"""
+    value = edge.get("src" if position == 0 else "dst")
+    node_type = _endpoint_type(value, edge.get("fileName"), position)
+    kind = PRINCIPAL_KINDS.get(node_type)
+    matched = by_node_id.get(str(value), [])
+    if matched:
+        return [i for i in matched if kind is None or principals[i].kind == kind]
+    if str(value).endswith(" node_id") and kind:
+        # 자리표시자 엣지: 해당 타입의 주체 전체
+        return [i for i, p in enumerate(principals) if p.kind == kind]
+    return []
+
+
+def effective_actions(statements):
+    """
+    확정 Allow 액션 패턴 (전체 리소스 Deny 로 통째로 막힌 패턴 제외), Deny 패턴, 조건부 Allow 패턴
+    """
+    deny = sorted({p for st in statements if st.effect == "Deny" and not st.conditional
+                   and st.matches_resource(None) for p in st.actions})
+    allow, conditional = set(), set()
+    for st in statements:
+        if st.effect != "Allow":
+            continue
+        patterns = st.actions if st.not_actions is None else ["*(NotAction:" + ",".join(st.not_actions) + ")"]
+        for p in patterns:
+            if any(wildcard_match(d, p) for d in deny):
+                continue
+            (conditional if st.conditional else allow).add(p)
+    return sorted(allow), deny, sorted(conditional - allow)
+
+
+def analyze(infra) -> dict:
+    """
+    Returns:
+        {"principals": [{name, kind, arn, allow, deny, conditional, escalation, trusted_services}],
+         "edges": [(src, 관계, dst, 근거)], "chains": [[이름, 관계, 이름, ...]]}
+    주체는 목록 위치로 구분한다 (node_id 는 사용자/역할 사이에서 겹칠 수 있음).
+    """
+    nodes, graph_edges = graph_parts(infra)
+    principals = [
+        Principal(node) for node in nodes
+        if (node.get("type") or node.get("node_type")) in PRINCIPAL_KINDS
+    ]
+    by_node_id = {}
+    for i, p in enumerate(principals):
+        by_node_id.setdefault(p.node_id, []).append(i)
+
+    # 엣지 → (src 인덱스, 관계, dst 인덱스)
+    resolved = []
+    for edge in graph_edges:
+        relation = edge_relation(edge).lower()
+        if not relation:
+            continue
+        for si in _edge_principals(edge, 0, principals, by_node_id):
+            for di in _edge_principals(edge, 1, principals, by_node_id):
+                if si != di:
+                    resolved.append((si, relation, di))
+
+    # 그룹 소속(MEMBER_OF) 이면 그룹 정책을 사용자에게 합침
+    for si, relation, di in resolved:
+        if principals[di].kind == "group" and "member" in relation:
+            principals[si].statements = principals[si].statements + principals[di].statements
+
+    edge_assume = {(si, di) for si, relation, di in resolved if "assume" in relation}
+    roles = [(i, p) for i, p in enumerate(principals) if p.kind == "role"]
+
+    # 도달 관계: AssumeRole (신원 정책 + 신뢰 정책 / 그래프 엣지), PassRole (+ 서비스 실행 권한)
+    adjacency = {i: [] for i in range(len(principals))}
+    edges = []
+    for si, src in enumerate(principals):
+        if src.kind == "group":
+            continue
+        for ri, role in roles:
+            if ri == si:
+                continue
+            perm = evaluate(src.statements, "sts:AssumeRole", role.arn)
+            trust = role.trusts(src)
+            via = None
+            if perm == ALLOW and trust == "yes":
+                via = "policy+trust"
+            elif perm in (ALLOW, CONDITIONAL) and trust in ("yes", "unknown"):
+                via = "policy?"
+            elif (si, ri) in edge_assume:
+                via = "graph-edge"
+            if via:
+                adjacency[si].append((ri, "AssumeRole", via))
+                edges.append((src.label, "AssumeRole", role.label, via))
+
+            pass_perm = evaluate(src.statements, "iam:PassRole", role.arn)
+            if pass_perm in (ALLOW, CONDITIONAL):
+                usable = [
+                    svc for svc in role.trusted_services()
+                    if any(evaluate(src.statements, a) in (ALLOW, CONDITIONAL)
+                           for a in PASS_ROLE_SERVICE_ACTIONS.get(svc, ()))
+                ]
+                if usable:
+                    via = ",".join(usable) + ("?" if pass_perm == CONDITIONAL else "")
+                    adjacency[si].append((ri, "PassRole", via))
+                    edges.append((src.label, "PassRole", role.label, via))
+
+    # 연쇄 경로 (사용자에서 출발, 순환 없이 MAX_CHAIN_DEPTH 까지)
+    chains = []
+    for start_index, start in enumerate(principals):
+        if start.kind != "user":
+            continue
+        queue = deque([(start_index, [start.label], {start_index})])
+        while queue:
+            current, path, seen = queue.popleft()
+            for nxt, relation, via in adjacency.get(current, []):
+                if nxt in seen:
+                    continue
+                new_path = path + [f"{relation}({via})", principals[nxt].label]
+                chains.append(new_path)
+                if len(new_path) // 2 < MAX_CHAIN_DEPTH:
+                    queue.append((nxt, new_path, seen | {nxt}))
+
+    rows = []
+    for p in principals:
+        allow, deny, conditional = effective_actions(p.statements)
+        if "*" in allow:
+            # 전체 허용은 나열 대신 한 줄로
+            escalation = ["*"]
+        else:
+            escalation = [
+                a for a in SENSITIVE_ACTIONS
+                if evaluate(p.statements, a) in (ALLOW, CONDITIONAL)
+            ]
+        rows.append({
+            "name": p.name, "kind": p.kind, "arn": p.arn,
+            "allow": allow, "deny": deny, "conditional": conditional,
+            "escalation": escalation, "trusted_services": p.trusted_services(),
+        })
+    return {"principals": rows, "edges": edges, "chains": chains}
+
+
+def _join(items, limit=MAX_PATTERNS_SHOWN) -> str:
+    if not items:
+        return "-"
+    shown = ", ".join(items[:limit])
+    return shown + (f" (+{len(items) - limit})" if len(items) > limit else "")
+
+
+def format_summary(result: dict) -> str:
+    """analyze() 결과 → 프롬프트용 압축 표 (IAM 주체가 없으면 빈 문자열)"""
+    if not result["principals"]:
+        return ""
+    lines = ["# principals (kind name | allow | deny | conditional | escalation | trusted services)"]
+    for row in result["principals"]:
+        lines.append(" | ".join([
+            f"{row['kind']} {row['name']}",
+            _join(row["allow"]), _join(row["deny"]), _join(row["conditional"]),
+            _join(row["escalation"]), _join(row["trusted_services"]),
+        ]))
+    lines.append("# reachability (src -relation(근거)-> dst)")
+    if result["edges"]:
+        lines.extend(f"{src} -{rel}({via})-> {dst}" for src, rel, dst, via in result["edges"])
+    else:
+        lines.append("-")
+    lines.append("# chains (사용자 출발 다단계 경로)")
+    multi_hop = sorted((c for c in result["chains"] if len(c) > 3), key=len, reverse=True)
+    if multi_hop:
+        lines.extend(" → ".join(c) for c in multi_hop[:MAX_CHAINS_SHOWN])
+    else:
+        lines.append("-")
+    return "\n".join(lines)
+
+
+def summarize_permissions(infra) -> str:
+    return format_summary(analyze(infra))
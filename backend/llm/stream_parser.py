@@ -0,0 +1,227 @@
+# LLM 응답 JSON 파서 (스트리밍 / 전체 텍스트 공용)
+# 응답 텍스트가 조각(chunk) 단위로 들어올 때마다 괄호 균형을 추적해서
+# 최상위 JSON 객체의 "vulnerabilities" 배열 원소가 하나 완성될 때마다 바로 꺼내준다.
+# <reasoning> ... </reasoning> 블록과 JSON 바깥의 텍스트(마크다운 코드펜스 등)는 무시한다.
+# 응답이 max_tokens 등으로 중간에 잘려도 완성된 원소는 모두 복구하고, 잃어버린 원소는 parse 보고에 남긴다.
+import json
+import re
+
+REASONING_OPEN = "<reasoning>"
+REASONING_CLOSE = "</reasoning>"
+
+# 잘린/깨진 원소에서 제목만이라도 찾아 보고에 남김
+_TITLE_RE = re.compile(r'"title"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class VulnerabilityStreamParser:
+    """
+    사용 예:
+        parser = VulnerabilityStreamParser()
+        for chunk in stream:
+            for vuln in parser.feed(chunk):
+                ...  # 완성된 취약점 1건
+        result = parser.result()
+    """
+
+    def __init__(self, array_key: str = "vulnerabilities"):
+        self.array_key = array_key
+        self.buffer = ""
+        self.pos = 0
+        self.in_reasoning = False
+        self.stack = []              # 열린 괄호 ('{' 또는 '[')
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None      # 최상위 객체에서 마지막으로 닫힌 문자열 (키 후보)
+        self.pending_key = None      # ':' 뒤에 값이 올 최상위 키
+        self.root_start = None
+        self.root_end = None
+        self.array_depth = None      # vulnerabilities 배열 안일 때 그 배열의 깊이
+        self.element_start = None
+        self.items = []
+        self.invalid_elements = 0
+        self.element_count = 0       # 배열에서 시작된 원소 수 (완성 여부 무관)
+        self.lost = []               # JSON 으로 파싱되지 않은 원소 보고
+
+    @property
+    def complete(self) -> bool:
+        """최상위 JSON 객체가 끝까지 닫혔는지"""
+        return self.root_end is not None
+
+    @property
+    def truncated(self) -> bool:
+        """JSON 이 시작됐지만 끝까지 닫히지 않음 (응답이 중간에 잘림)"""
+        return self.root_start is not None and not self.complete
+
+    def feed(self, chunk: str) -> list:
+        """조각을 추가하고, 이번 조각으로 새로 완성된 원소 목록을 반환"""
+        self.buffer += chunk
+        new_items = []
+        text = self.buffer
+        while self.pos < len(text) and not self.complete:
+            if self.in_reasoning:
+                end = text.find(REASONING_CLOSE, self.pos)
+                if end == -1:
+                    # 닫는 태그가 조각 경계에 걸쳐 있을 수 있으므로 끝부분은 다시 확인
+                    self.pos = max(self.pos, len(text) - len(REASONING_CLOSE) + 1)
+                    break
+                self.pos = end + len(REASONING_CLOSE)
+                self.in_reasoning = False
+                continue
+
+            ch = text[self.pos]
+            depth = len(self.stack)
+
+            if depth == 0:
+                if ch == "<":
+                    rest = text[self.pos:self.pos + len(REASONING_OPEN)]
+                    if rest == REASONING_OPEN:
+                        self.in_reasoning = True
+                        self.pos += len(REASONING_OPEN)
+                        continue
+                    if REASONING_OPEN.startswith(rest):
+                        break  # 태그가 아직 덜 들어옴
+                elif ch == "{":
+                    self.root_start = self.pos
+                    self.stack.append(ch)
+                self.pos += 1
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if depth == 1:
+                        try:
+                            self.last_string = json.loads(text[self.string_start:self.pos + 1])
+                        except ValueError:
+                            self.last_string = None
+                self.pos += 1
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                self.string_start = self.pos
+            elif ch == ":" and depth == 1:
+                self.pending_key = self.last_string
+            elif ch == "," and depth == 1:
+                self.pending_key = None
+            elif ch in "{[":
+                if ch == "[" and depth == 1 and self.pending_key == self.array_key:
+                    self.array_depth = depth + 1
+                elif ch == "{" and self.array_depth == depth:
+                    self.element_start = self.pos
+                    self.element_count += 1
+                self.stack.append(ch)
+            elif ch in "}]":
+                self.stack.pop()
+                if ch == "}" and self.element_start is not None and len(self.stack) == self.array_depth:
+                    item = self._parse_element(text[self.element_start:self.pos + 1])
+                    if item is not None:
+                        self.items.append(item)
+                        new_items.append(item)
+                    self.element_start = None
+                elif ch == "]" and depth == self.array_depth:
+                    self.array_depth = None
+                if not self.stack:
+                    self.root_end = self.pos
+            self.pos += 1
+        return new_items
+
+    def _parse_element(self, element_text):
+        try:
+            item = json.loads(element_text)
+        except ValueError:
+            self.invalid_elements += 1
+            self.lost.append(_lost_element(self.element_count - 1, "invalid_json", element_text))
+            return None
+        return item if isinstance(item, dict) else None
+
+    def lost_elements(self) -> list:
+        """
+        복구하지 못한 원소 목록 [{index, reason, title, chars}]
+        reason: invalid_json (원소가 닫혔지만 JSON 이 아님) / truncated (작성 도중 응답이 끝남)
+        잘린 원소 뒤에 오려던 원소는 응답에 없으므로 알 수 없다.
+        """
+        lost = list(self.lost)
+        if self.truncated and self.element_start is not None:
+            lost.append(_lost_element(self.element_count - 1, "truncated", self.buffer[self.element_start:]))
+        return lost
+
+    def report(self) -> dict:
+        return {
+            "complete": self.complete,
+            "truncated": self.truncated,
+            "recovered": len(self.items),
+            "lost": self.lost_elements(),
+        }
+
+    def parse_root(self):
+        """완성된 최상위 객체 (아직 닫히지 않았거나 JSON 이 아니면 None)"""
+        if not self.complete:
+            return None
+        try:
+            parsed = json.loads(self.buffer[self.root_start:self.root_end + 1])
+        except ValueError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+    def result(self) -> dict:
+        """
+        최종 결과 객체.
+        최상위 객체가 완성됐으면 그대로 파싱하고, 아니면 지금까지 완성된 원소로 구성한다.
+        summary 가 없으면 severity 개수로 채운다.
+        잘렸거나 잃어버린 원소가 있으면 "parse" 에 report() 를 붙인다 (캐시하면 안 되는 결과).
+        """
+        parsed = self.parse_root()
+        if parsed is None:
+            parsed = {self.array_key: list(self.items)}
+        if self.array_key in parsed and "summary" not in parsed:
+            parsed["summary"] = summarize(parsed[self.array_key])
+        report = self.report()
+        if report["truncated"] or report["lost"]:
+            parsed["parse"] = report
+        return parsed
+
+
+def _lost_element(index: int, reason: str, text: str) -> dict:
+    match = _TITLE_RE.search(text)
+    title = None
+    if match:
+        try:
+            title = json.loads(f'"{match.group(1)}"')
+        except ValueError:
+            title = match.group(1)
+    return {"index": index, "reason": reason, "title": title, "chars": len(text)}
+
+
+def extract_json_from_text(text: str):
+    """
+    LLM 응답 전체 텍스트 → 결과 객체 (JSON 객체가 없거나 복구할 것이 없으면 None)
+    스트리밍이 아닌 invoke_model 응답과 실험 스크립트에서 쓰는 진입점.
+    """
+    if not text:
+        return None
+    parser = VulnerabilityStreamParser()
+    parser.feed(text)
+    if parser.root_start is None:
+        return None
+    if parser.parse_root() is None and not parser.items:
+        print(f"JSON 파싱 최종 실패: 복구 가능한 원소 없음 (잘림: {parser.truncated})")
+        return None
+    result = parser.result()
+    if "parse" in result:
+        lost = result["parse"]["lost"]
+        print(f"⚠️ 응답 일부 복구: {len(parser.items)}건 복구 / {len(lost)}건 손실 {[x['title'] for x in lost]}")
+    return result
+
+
+def summarize(vulnerabilities) -> dict:
+    """severity 별 개수"""
+    return {
+        level: len([x for x in vulnerabilities if str(x.get("severity")).lower() == level])
+        for level in ("high", "medium", "low")
+    }
@@ -4,38 +4,21 @@
 # - reasoning_effort: "medium" (기존 설정)
 # ============================================================
 import json
+import sys
 import boto3
 import os
 from typing import Dict, Any, Optional
 from botocore.exceptions import ClientError
-import re
 from datetime import datetime
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-TARGET_JSON_PATH = os.path.join(BASE_DIR, "..", "json", "pandyo", "search_pandyo.json")
 
-def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
-    if not text:
-        return None
-    text = re.sub(r'<reasoning>.*?</reasoning>', '', text, flags=re.DOTALL)
-    text = re.sub(r'```(?:json)?\s*([\s\S]*?)\s*```', r'\1', text)
-    try:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1:
-            json_str = text[start:end+1]
-            parsed = json.loads(json_str)
-            if "vulnerabilities" in parsed and "summary" not in parsed:
-                v = parsed["vulnerabilities"]
-                parsed["summary"] = {
-                    "high": len([x for x in v if str(x.get("severity")).lower() == "high"]),
-                    "medium": len([x for x in v if str(x.get("severity")).lower() == "medium"]),
-                    "low": len([x for x in v if str(x.get("severity")).lower() == "low"]),
-                }
-            return parsed
-    except Exception as e:
-        print(f"JSON 파싱 최종 실패: {e}")
-    return None
+# 저장소 루트를 import 경로에 추가 (이 스크립트를 직접 실행하는 경우)
+sys.path.insert(0, os.path.normpath(os.path.join(BASE_DIR, "..", "..")))
+# LLM 응답 JSON 추출 (mbv_llm_gpt.py 와 같은 파서: 잘린 응답도 완성된 원소까지 복구)
+from backend.llm.stream_parser import extract_json_from_text
+
+TARGET_JSON_PATH = os.path.join(BASE_DIR, "..", "json", "pandyo", "search_pandyo.json")
 
 def run_security_analysis(target_infra_json: str, retrieved_context: str) -> Optional[Dict[str, Any]]:
     """
@@ -1,12 +1,13 @@
-import boto3
 import json
 import os
 
 from fastapi import Request, APIRouter
 
+from backend.common.aws_clients import lambda_client as get_lambda_client
+
 router = APIRouter()
 
-lambda_client = boto3.client("lambda", region_name="ap-northeast-1")
+lambda_client = get_lambda_client("ap-northeast-1")
 
 @router.post("/lambda_invoke")
 async def lambda_invoke(request: Request):
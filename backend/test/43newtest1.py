@@ -15,7 +15,6 @@ reasoning_effort: medium
 import json
 import sys
 import os
-import re
 import time
 import boto3
 from datetime import datetime
@@ -29,6 +28,12 @@ MAX_TOKENS = 4096
 REASONING_EFFORT = "medium"
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 저장소 루트를 import 경로에 추가 (이 스크립트를 직접 실행하는 경우)
+sys.path.insert(0, os.path.normpath(os.path.join(BASE_DIR, "..", "..")))
+# LLM 응답 JSON 추출 (mbv_llm_gpt.py 와 같은 파서: 잘린 응답도 완성된 원소까지 복구)
+from backend.llm.stream_parser import extract_json_from_text
+
 DOC_DIR = os.path.join(BASE_DIR, "..", "document")
 
 # RAG 유사도 실측 결과 순위대로 문서 매핑
@@ -196,22 +201,6 @@ def load_doc(name):
         return f.read()
 
 
-def extract_json_from_text(text):
-    """LLM 출력에서 JSON 추출"""
-    text = re.sub(r'<reasoning>.*?</reasoning>', '', text, flags=re.DOTALL)
-    text = re.sub(r'```(?:json)?\s*([\s\S]*?)\s*```', r'\1', text)
-    try:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1:
-            json_str = text[start:end+1]
-            parsed = json.loads(json_str)
-            return parsed
-    except Exception as e:
-        print(f"  ❌ JSON 파싱 실패: {e}")
-    return None
-
-
 def call_llm(prompt, system_msg=None, max_tokens=MAX_TOKENS, temperature=0.2, reasoning_effort=REASONING_EFFORT):
     """Bedrock LLM 호출 + 메타데이터 반환"""
     if system_msg is None:
@@ -0,0 +1,6 @@
+# pytest 공용 설정
+# 프로젝트 루트를 경로에 추가 (backend 패키지 import, 다른 테스트 스크립트와 같은 방식)
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
@@ -1,8 +1,12 @@
-import boto3
 import json
 import os
 import glob
 from qdrant_client import QdrantClient
+import sys
+
+# 프로젝트 루트를 경로에 추가 (backend 패키지의 공용 임베딩 모듈 사용)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from backend.embed.embed_cache import get_embedding as _cached_embedding
 
 # =================================================================
 # 1. 환경 설정 및 경로 탐색
@@ -16,7 +20,6 @@ MODEL_ID = "cohere.embed-v4:0"
 COLLECTION_NAME = "pandyo"
 
 # 클라이언트 초기화
-bedrock = boto3.client(service_name='bedrock-runtime', region_name=REGION)
 q_client = QdrantClient(url="http://localhost:6333")
 
 # =================================================================
@@ -24,19 +27,8 @@ q_client = QdrantClient(url="http://localhost:6333")
 # =================================================================
 
 def get_embedding(text):
-    """입력받은 텍스트 전체를 Bedrock을 통해 벡터로 변환"""
-    native_request = {
-        "texts": [text], 
-        "input_type": "search_query", 
-        "truncate": "NONE"
-    }
-    
-    response = bedrock.invoke_model(modelId=MODEL_ID, body=json.dumps(native_request))
-    res_body = json.loads(response.get('body').read())
-    embeddings = res_body.get('embeddings')
-    
-    # 모델 응답 구조에 맞게 첫 번째 벡터값 반환
-    return embeddings.get('float')[0] if isinstance(embeddings, dict) else embeddings[0]
+    """입력받은 텍스트 전체를 Bedrock을 통해 벡터로 변환 (공용 캐시 사용)"""
+    return _cached_embedding(text, input_type="search_query")
 
 # =================================================================
 # 3. 메인 실행 반복문
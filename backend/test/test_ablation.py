@@ -4,31 +4,26 @@
 #       lambda_privesc와의 유사도 변화를 관찰하여 근본 원인 확인
 # 실행: python test_ablation.py (EC2에서 실행)
 # =========================================================
-import boto3
 import json
 import os
 import copy
 import math
+import sys
+
+# 프로젝트 루트를 경로에 추가 (backend 패키지의 공용 임베딩 모듈 사용)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from backend.embed.embed_cache import get_embedding as _cached_embedding
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PANDYO_PATH = os.path.join(BASE_DIR, "..", "json", "pandyo", "pandyo.json")
 
 REGION = "ap-northeast-1"
 MODEL_ID = "cohere.embed-v4:0"
-bedrock = boto3.client(service_name='bedrock-runtime', region_name=REGION)
 
 
 def get_embedding(text, input_type="search_document"):
-    """Bedrock Cohere embed-v4로 텍스트를 벡터로 변환"""
-    native_request = {
-        "texts": [text],
-        "input_type": input_type,
-        "truncate": "NONE"
-    }
-    response = bedrock.invoke_model(modelId=MODEL_ID, body=json.dumps(native_request))
-    res_body = json.loads(response.get('body').read())
-    embeddings = res_body.get('embeddings')
-    return embeddings.get('float')[0] if isinstance(embeddings, dict) else embeddings[0]
+    """Bedrock Cohere embed-v4로 텍스트를 벡터로 변환 (공용 캐시 사용)"""
+    return _cached_embedding(text, input_type=input_type)
 
 
 def cosine_sim(a, b):
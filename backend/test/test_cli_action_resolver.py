@@ -0,0 +1,128 @@
+# =========================================================
+# CLI 명령 → IAM 정책 로컬 해석 테스트 (cli_action_resolver, AWS 호출 없음)
+# 실행: python -m pytest backend/test/test_cli_action_resolver.py
+# =========================================================
+import pytest
+
+from backend.grok.cli_action_resolver import parse_command, resolve_command, split_commands
+
+# (명령, 기대 Statement 목록)
+RESOLVED = [
+    (
+        "aws iam create-user --user-name alice",
+        [{"Effect": "Allow", "Action": ["iam:CreateUser"], "Resource": ["arn:aws:iam::*:user/alice"]}],
+    ),
+    (
+        "aws iam put-role-policy --role-name app --policy-name p --policy-document '{\"Version\": \"2012-10-17\"}'",
+        [{"Effect": "Allow", "Action": ["iam:PutRolePolicy"], "Resource": ["arn:aws:iam::*:role/app"]}],
+    ),
+    (
+        # 권한 검사 대상은 그룹뿐 (RESOURCE_ARGUMENT_OVERRIDES)
+        "aws iam add-user-to-group --group-name admins --user-name alice",
+        [{"Effect": "Allow", "Action": ["iam:AddUserToGroup"], "Resource": ["arn:aws:iam::*:group/admins"]}],
+    ),
+    (
+        "aws ec2 describe-instances",
+        [{"Effect": "Allow", "Action": ["ec2:DescribeInstances"], "Resource": "*"}],
+    ),
+    (
+        # 인자에 따라 추가되는 액션, 다른 서비스 액션은 별도 Statement
+        "aws ec2 run-instances --image-id ami-1 --iam-instance-profile Name=p --tag-specifications x",
+        [
+            {"Effect": "Allow", "Action": ["ec2:RunInstances", "ec2:CreateTags"], "Resource": "*"},
+            {"Effect": "Allow", "Action": ["iam:PassRole"], "Resource": "*"},
+        ],
+    ),
+    (
+        "aws ec2 run-instances --image-id resolve:ssm:/aws/service/ami",
+        [
+            {"Effect": "Allow", "Action": ["ec2:RunInstances"], "Resource": "*"},
+            {"Effect": "Allow", "Action": ["ssm:GetParameters"], "Resource": "*"},
+        ],
+    ),
+    (
+        "aws lambda create-function --function-name fn --role arn:aws:iam::1:role/r --region us-east-1",
+        [
+            {"Effect": "Allow", "Action": ["lambda:CreateFunction"],
+             "Resource": ["arn:aws:lambda:us-east-1:*:function:fn"]},
+            {"Effect": "Allow", "Action": ["iam:PassRole"], "Resource": "*"},
+        ],
+    ),
+    (
+        # 작업 이름과 액션 이름이 다른 경우 (Invoke → InvokeFunction), ARN 값은 그대로
+        "aws lambda invoke --function-name arn:aws:lambda:us-east-1:123456789012:function:fn out.json",
+        [{"Effect": "Allow", "Action": ["lambda:InvokeFunction"],
+          "Resource": ["arn:aws:lambda:us-east-1:123456789012:function:fn"]}],
+    ),
+    (
+        "aws sts get-caller-identity",
+        [{"Effect": "Allow", "Action": ["sts:GetCallerIdentity"], "Resource": "*"}],
+    ),
+    (
+        "aws sts assume-role --role-arn arn:aws:iam::1:role/x --role-session-name s",
+        [{"Effect": "Allow", "Action": ["sts:AssumeRole"], "Resource": ["arn:aws:iam::1:role/x"]}],
+    ),
+    (
+        "aws s3api put-object --bucket b --key k",
+        [{"Effect": "Allow", "Action": ["s3:PutObject"], "Resource": ["arn:aws:s3:::b/k"]}],
+    ),
+    (
+        "aws s3api list-buckets",
+        [{"Effect": "Allow", "Action": ["s3:ListAllMyBuckets"], "Resource": "*"}],
+    ),
+    (
+        "aws s3api put-public-access-block --bucket b --public-access-block-configuration x",
+        [{"Effect": "Allow", "Action": ["s3:PutBucketPublicAccessBlock"], "Resource": ["arn:aws:s3:::b"]}],
+    ),
+]
+
+# 로컬에서 해석하지 않고 Grok 으로 넘기는 명령
+UNRESOLVED = [
+    "aws s3 cp ./a.txt s3://bucket/key",           # 고수준 명령
+    "aws s3 ls",
+    "aws s3api get-bucket-cors --bucket b",        # 액션 이름을 확인하지 않은 s3 작업
+    "aws s3control list-access-points --account-id 1",
+    "aws apigateway get-rest-apis",                # IAM 접두사가 HTTP 메서드
+    "aws nosuchservice do-thing",
+    "aws iam no-such-operation",
+    "ls -la",
+]
+
+
+@pytest.mark.parametrize("command, expected", RESOLVED)
+def test_resolve_command(command, expected):
+    assert resolve_command(command) == expected
+
+
+@pytest.mark.parametrize("command", UNRESOLVED)
+def test_unresolvable_commands_fall_back(command):
+    assert resolve_command(command) is None
+
+
+def test_account_is_templated_into_arns():
+    statements = resolve_command("aws iam get-user --user-name bob", account="123456789012")
+    assert statements[0]["Resource"] == ["arn:aws:iam::123456789012:user/bob"]
+
+
+def test_parse_command_keeps_region_and_positionals():
+    service, operation, args, region, positional = parse_command(
+        "aws lambda invoke --function-name fn --region ap-northeast-1 --cli-binary-format raw-in-base64-out out.json"
+    )
+    assert (service, operation, region, positional) == ("lambda", "invoke", "ap-northeast-1", ["out.json"])
+    assert args == {"function-name": "fn", "cli-binary-format": "raw-in-base64-out"}
+
+
+def test_split_commands_keeps_quoted_newlines_and_continuations():
+    script = (
+        "aws iam create-user --user-name a\n"
+        "\n"
+        "aws iam put-user-policy --user-name a --policy-name p --policy-document '{\n"
+        "  \"Version\": \"2012-10-17\"\n"
+        "}'\n"
+        "aws ec2 describe-instances \\\n"
+        "  --region us-east-1\n"
+    )
+    commands = split_commands(script)
+    assert len(commands) == 3
+    assert commands[1].endswith("}'")
+    assert parse_command(commands[2])[3] == "us-east-1"
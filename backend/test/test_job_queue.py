@@ -0,0 +1,88 @@
+# =========================================================
+# 분석 작업 대기열 시작/종료 테스트 (job_queue, 임시 SQLite 저장소, LLM 호출 없음)
+# 실행: python -m pytest backend/test/test_job_queue.py
+# =========================================================
+import threading
+import time
+
+import pytest
+
+from backend.jobs import job_queue as jq
+from backend.jobs.job_queue import JobQueue
+from backend.jobs.job_store import JobStore, SUCCEEDED
+
+
+def fake_search(cancel_event=None, **params):
+    yield "infrastructure", {"params": params}
+    yield "done", {"analysis": {"vulnerabilities": []}}
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(jq, "JOB_POLL_SEC", 0.05)
+    monkeypatch.setattr(jq, "JOB_OWNER_RETRY_SEC", 0.05)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    yield store
+    store.close()
+
+
+def make_queue(store):
+    return JobQueue(store, {"mbv_search": fake_search}, workers=2)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def worker_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("mbv-job-")]
+
+
+def test_start_runs_jobs_and_stop_releases_workers(store):
+    queue = make_queue(store)
+    queue.start()
+    job, created = queue.submit("mbv_search", {"use_cache": True})
+    assert created
+    assert wait_for(lambda: store.get(job["job_id"])["status"] == SUCCEEDED)
+
+    queue.stop(timeout=5)
+    assert worker_threads() == []
+    # 두 번 호출해도 안전
+    queue.stop(timeout=5)
+
+
+def test_stop_releases_owner_lock(store):
+    owner, standby = make_queue(store), make_queue(store)
+    owner.start()
+    standby.start()
+    assert owner._owner and not standby._owner
+
+    # 실행 프로세스가 종료하면 대기 중이던 쪽이 잠금을 이어받음
+    owner.stop(timeout=5)
+    assert wait_for(lambda: standby._owner)
+
+    standby.stop(timeout=5)
+    assert worker_threads() == []
+    restarted = make_queue(store)
+    assert restarted._acquire_owner_lock()
+    restarted._lock_file.close()
+
+
+def test_stop_ends_standby_without_taking_lock(store):
+    owner, standby = make_queue(store), make_queue(store)
+    owner.start()
+    standby.start()
+
+    standby.stop(timeout=5)
+    assert not standby._owner and standby._lock_file is None
+    owner.stop(timeout=5)
+    assert worker_threads() == []
@@ -4,61 +4,17 @@
 # 실행: python test_keyword_overlap.py
 # =========================================================
 import json
-import re
 import os
+import sys
+
+# 키워드 추출 로직은 운영 검색 경로(backend/embed/keyword_extract.py)와 공유
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from backend.embed.keyword_extract import extract_keywords, jaccard_similarity
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PANDYO_PATH = os.path.join(BASE_DIR, "..", "json", "pandyo", "pandyo.json")
 
 
-def extract_keywords(json_data):
-    """JSON 데이터에서 의미있는 키워드를 추출"""
-    text = json.dumps(json_data) if not isinstance(json_data, str) else json_data
-
-    keywords = set()
-
-    # 1. Action 키워드 추출
-    # "Action": ["iam:Get*", ...] 또는 "Action": "sts:AssumeRole"
-    action_list_matches = re.findall(r'"Action":\s*\[([^\]]+)\]', text)
-    for match in action_list_matches:
-        for kw in re.findall(r'"([^"]+)"', match):
-            keywords.add(kw)
-
-    action_single_matches = re.findall(r'"Action":\s*"([^"]+)"', text)
-    for kw in action_single_matches:
-        keywords.add(kw)
-
-    # 2. 노드 타입 추출
-    for match in re.findall(r'"type":\s*"([^"]+)"', text):
-        keywords.add(f"type:{match}")
-    for match in re.findall(r'"node_type":\s*"([^"]+)"', text):
-        keywords.add(f"type:{match}")
-
-    # 3. Edge 관계 추출
-    for match in re.findall(r'"relation":\s*"([^"]+)"', text):
-        keywords.add(f"relation:{match}")
-
-    # 4. 정책 이름 추출
-    for match in re.findall(r'"PolicyName":\s*"([^"]+)"', text):
-        keywords.add(f"policy:{match}")
-
-    # 5. 서비스 접두사 추출 (Action에서)
-    service_prefixes = set()
-    for kw in list(keywords):
-        if ":" in kw and not kw.startswith(("type:", "relation:", "policy:")):
-            service_prefixes.add(f"service:{kw.split(':')[0]}")
-    keywords.update(service_prefixes)
-
-    return keywords
-
-
-def jaccard_similarity(set1, set2):
-    """두 집합의 Jaccard 유사도 계산"""
-    intersection = set1 & set2
-    union = set1 | set2
-    return len(intersection) / len(union) if union else 0
-
-
 def categorize_keywords(keywords):
     """키워드를 카테고리별로 분류"""
     categories = {
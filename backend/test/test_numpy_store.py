@@ -0,0 +1,172 @@
+# =========================================================
+# 로컬 NumPy 벡터 저장소 테스트 (numpy_store, Qdrant 서버 / 임베딩 API 호출 없음)
+# 실행: python -m pytest backend/test/test_numpy_store.py
+# =========================================================
+import json
+import os
+
+import numpy as np
+import pytest
+from qdrant_client.models import PointStruct, QueryRequest, SparseVector, SparseVectorParams, VectorParams, Distance
+
+from backend.embed import mbv_search, vector_store
+from backend.embed.keyword_extract import extract_keywords, to_sparse_vector
+from backend.embed.numpy_store import CURRENT_FILE, KEEP_GENERATIONS, NumpyVectorClient
+
+SIZE = 4
+
+# (id, dense 벡터, sparse 인덱스)
+POINTS = [
+    (1, [1.0, 0.0, 0.0, 0.0], [10, 20]),
+    (2, [0.0, 1.0, 0.0, 0.0], [20, 30]),
+    (3, [0.7, 0.7, 0.0, 0.0], [40]),
+]
+
+
+def make_points(points=POINTS):
+    return [
+        PointStruct(id=i, vector={"": dense, "keywords": SparseVector(indices=idx, values=[1.0] * len(idx))},
+                    payload={"title": f"doc-{i}"})
+        for i, dense, idx in points
+    ]
+
+
+@pytest.fixture(params=["float32", "float16"])
+def client(request, tmp_path):
+    client = NumpyVectorClient(str(tmp_path), dtype=request.param)
+    client.create_collection(
+        "docs",
+        vectors_config=VectorParams(size=SIZE, distance=Distance.COSINE),
+        sparse_vectors_config={"keywords": SparseVectorParams()},
+    )
+    client.upsert("docs", make_points())
+    return client
+
+
+def current(client, name="docs"):
+    with open(os.path.join(client.base_dir, name, CURRENT_FILE), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_query_points_dense(client):
+    points = client.query_points("docs", query=[2.0, 0.0, 0.0, 0.0], limit=2).points
+    assert [p.id for p in points] == [1, 3]
+    assert points[0].score == pytest.approx(1.0, abs=1e-3)
+    assert points[1].score == pytest.approx(np.sqrt(0.5), abs=1e-3)
+    assert points[0].payload == {"title": "doc-1"}
+
+
+def test_query_points_sparse_drops_non_overlapping(client):
+    points = client.query_points("docs", query=SparseVector(indices=[20], values=[1.0]), using="keywords", limit=3).points
+    assert sorted(p.id for p in points) == [1, 2]
+
+
+def test_upsert_replaces_existing_point(client):
+    client.upsert("docs", make_points([(2, [0.0, 0.0, 1.0, 0.0], [50])]))
+    assert client.count("docs").count == len(POINTS)
+    assert client.query_points("docs", query=[0.0, 0.0, 1.0, 0.0], limit=1).points[0].id == 2
+
+
+def test_query_batch_points_matches_single_queries(client):
+    requests = [
+        QueryRequest(query=[0.0, 1.0, 0.0, 0.0], limit=2, with_payload=True),
+        QueryRequest(query=SparseVector(indices=[40], values=[1.0]), using="keywords", limit=2, with_payload=True),
+    ]
+    batch = client.query_batch_points("docs", requests=requests)
+    single = [
+        client.query_points("docs", query=r.query, limit=r.limit, using=r.using)
+        for r in requests
+    ]
+    assert [[p.id for p in r.points] for r in batch] == [[p.id for p in r.points] for r in single]
+    assert [p.id for p in batch[1].points] == [3]
+
+
+def test_write_swaps_current_generation(client):
+    before = current(client)
+    snapshot = client._load("docs")
+
+    client.delete("docs", [1])
+    after = current(client)
+    assert after != before and after > before
+    # 이전 스냅샷은 그대로 (읽는 중인 검색은 같은 세대의 벡터/payload 쌍만 봄)
+    assert snapshot.ids == [1, 2, 3] and len(snapshot.vectors) == 3
+    assert client._load("docs").ids == [2, 3]
+
+    # 오래된 세대는 KEEP_GENERATIONS 개만 남김
+    for _ in range(3):
+        client.upsert("docs", make_points([(9, [0.0, 0.0, 0.0, 1.0], [])]))
+    generations = [g for g in os.listdir(os.path.join(client.base_dir, "docs")) if g.startswith("gen-")]
+    assert len(generations) == KEEP_GENERATIONS
+    assert current(client) == max(generations)
+
+
+def test_current_pointer_decides_what_is_read(client):
+    client.delete("docs", [1])
+    previous = sorted(g for g in os.listdir(os.path.join(client.base_dir, "docs")) if g.startswith("gen-"))[-2]
+    with open(os.path.join(client.base_dir, "docs", CURRENT_FILE), "w", encoding="utf-8") as f:
+        f.write(previous)
+    assert client._load("docs").ids == [1, 2, 3]
+
+
+# 인프라 리소스 → 서비스별 축으로 만든 가짜 임베딩 (같은 서비스면 유사도 ≈ 1)
+SERVICES = ["lambda", "iam", "sqs"]
+
+
+def fake_embedding(text):
+    return [1.0 if f'"{s}:' in text else 0.0 for s in SERVICES] + [0.1]
+
+
+def fake_get_embeddings(texts, input_type=None):
+    return [fake_embedding(t) for t in texts]
+
+
+DOCUMENTS = [
+    {"id": 1, "title": "lambda_privesc", "resources": [{"Action": ["lambda:CreateFunction", "iam:PassRole"]}]},
+    {"id": 2, "title": "sqs_flag_shop", "resources": [{"Action": "sqs:SendMessage"}]},
+]
+
+
+@pytest.fixture
+def search_index(monkeypatch, tmp_path):
+    """vector_store 를 tmp_path 의 NumPy 저장소로 바꾸고 DOCUMENTS 를 색인"""
+    monkeypatch.setattr(vector_store, "q_client", NumpyVectorClient(str(tmp_path)))
+    monkeypatch.setattr(vector_store, "VECTOR_SIZE", len(SERVICES) + 1)
+    monkeypatch.setattr(vector_store, "_sparse_support", {})
+    monkeypatch.setattr(mbv_search, "get_embeddings", fake_get_embeddings)
+
+    name = vector_store.versioned_name(vector_store.new_version())
+    vector_store.create_collection(name)
+    vector_store.q_client.upsert(name, [
+        PointStruct(
+            id=doc["id"],
+            vector=vector_store.make_vector(fake_embedding(json.dumps(doc["resources"])),
+                                            *to_sparse_vector(extract_keywords(doc["resources"]))),
+            payload=doc,
+        )
+        for doc in DOCUMENTS
+    ])
+    vector_store.swap_alias(name)
+    return name
+
+
+# (질의 리소스, LLM 에 넘길 문서 title)
+SEARCH_CASES = [
+    ({"resources": [{"content": {"Action": ["lambda:CreateFunction", "iam:PassRole"]}}]}, ["lambda_privesc"]),
+    ({"resources": [{"content": {"Action": "sqs:SendMessage"}}]}, ["sqs_flag_shop"]),
+    ({"resources": [{"content": {"Action": "ec2:RunInstances"}}]}, []),
+]
+
+
+@pytest.mark.parametrize("infra, expected", SEARCH_CASES)
+def test_search_documents_end_to_end(search_index, infra, expected):
+    docs = mbv_search.search_documents(mbv_search.build_query_text(infra))
+    assert [title for _, title, _ in docs] == expected
+
+
+def test_search_follows_alias_swap(search_index):
+    # 새 버전 컬렉션으로 별칭을 바꾸면 다음 검색부터 새 데이터를 읽음
+    name = vector_store.versioned_name(vector_store.new_version())
+    vector_store.create_collection(name)
+    vector_store.swap_alias(name)
+    query = mbv_search.build_query_text({"resources": [{"content": {"Action": "sqs:SendMessage"}}]})
+    assert mbv_search.search_documents(query) == []
@@ -0,0 +1,103 @@
+# =========================================================
+# OpenRouter(Grok) 공용 클라이언트 테스트 (httpx.MockTransport, 외부 호출 없음)
+# 실행: python -m pytest backend/test/test_openrouter_client.py
+# =========================================================
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.grok import openrouter_client as oc
+
+REPLY = {"choices": [{"message": {"content": "{}"}}]}
+
+
+def use_transport(monkeypatch, handler, concurrency=oc.OPENROUTER_MAX_CONCURRENCY):
+    """공용 클라이언트를 MockTransport 로 바꾸고 (asyncio.run 마다 루프가 달라) 세마포어를 새로 만듦"""
+    monkeypatch.setattr(oc, "_client", oc.create_client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(oc, "_semaphore", asyncio.Semaphore(concurrency))
+
+
+def test_request_carries_configured_timeouts(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json=REPLY)
+
+    use_transport(monkeypatch, handler)
+
+    async def scenario():
+        assert await oc.chat_completion([{"role": "user", "content": "hi"}], model="m", reasoning=False) == REPLY
+        await oc.close_client()
+
+    asyncio.run(scenario())
+    request = seen[0]
+    assert request.url.path.endswith("/chat/completions")
+    assert json.loads(request.content) == {
+        "model": "m", "messages": [{"role": "user", "content": "hi"}], "reasoning": {"enabled": False},
+    }
+    assert request.extensions["timeout"] == {
+        "connect": oc.OPENROUTER_CONNECT_TIMEOUT_SEC,
+        "read": oc.OPENROUTER_READ_TIMEOUT_SEC,
+        "write": oc.OPENROUTER_CONNECT_TIMEOUT_SEC,
+        "pool": oc.OPENROUTER_READ_TIMEOUT_SEC,
+    }
+    assert oc._client is None
+
+
+@pytest.mark.parametrize("limit, calls", [(1, 4), (3, 10)])
+def test_concurrency_is_limited(monkeypatch, limit, calls):
+    in_flight, peak = 0, 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json=REPLY)
+
+    use_transport(monkeypatch, handler, concurrency=limit)
+
+    async def scenario():
+        results = await asyncio.gather(*(oc.chat_completion([]) for _ in range(calls)))
+        await oc.close_client()
+        return results
+
+    assert asyncio.run(scenario()) == [REPLY] * calls
+    assert peak == limit
+
+
+@pytest.mark.parametrize("error", [httpx.ReadTimeout, httpx.ConnectTimeout])
+def test_timeouts_propagate_and_release_slot(monkeypatch, error):
+    attempts = []
+
+    def handler(request):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise error("timed out", request=request)
+        return httpx.Response(200, json=REPLY)
+
+    use_transport(monkeypatch, handler, concurrency=1)
+
+    async def scenario():
+        with pytest.raises(error):
+            await oc.chat_completion([])
+        # 실패한 요청이 자리를 반납해야 다음 요청이 들어감
+        assert await asyncio.wait_for(oc.chat_completion([]), timeout=1) == REPLY
+        await oc.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_http_errors_raise(monkeypatch):
+    use_transport(monkeypatch, lambda request: httpx.Response(429, json={"error": "rate limited"}))
+
+    async def scenario():
+        with pytest.raises(httpx.HTTPStatusError):
+            await oc.chat_completion([])
+        await oc.close_client()
+
+    asyncio.run(scenario())
@@ -0,0 +1,132 @@
+# =========================================================
+# IAM 유효 권한 / 역할 도달성 계산 테스트 (permission_engine, backend/test/*.json 시나리오)
+# 실행: python -m pytest backend/test/test_permission_engine.py
+# =========================================================
+import json
+import os
+
+import pytest
+
+from backend.llm.permission_engine import (
+    ALLOW, CONDITIONAL, DENY, IMPLICIT_DENY, Statement, analyze, evaluate, format_summary,
+)
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_scenario(file_name):
+    with open(os.path.join(TEST_DIR, file_name), "r", encoding="utf-8") as f:
+        return analyze(json.load(f))
+
+
+@pytest.fixture(scope="module")
+def key_rotation():
+    return load_scenario("iam_privesc_by_key_rotation.json")
+
+
+@pytest.fixture(scope="module")
+def lambda_privesc():
+    return load_scenario("lambda_privesc.json")
+
+
+def principal(result, name):
+    return next(row for row in result["principals"] if row["name"] == name)
+
+
+# (시나리오, 주체 이름, 확정 Allow 에 있어야 하는 패턴, escalation 기대값)
+EFFECTIVE_PERMISSIONS = [
+    ("key_rotation", "developer_cgiddd7ga7gjim", ["secretsmanager:ListSecrets"], []),
+    ("key_rotation", "admin_cgiddd7ga7gjim", ["iam:Get*", "iam:List*", "sts:AssumeRole"], ["sts:AssumeRole"]),
+    ("key_rotation", "manager_cgiddd7ga7gjim", ["iam:CreateAccessKey", "iam:UpdateAccessKey"],
+     ["iam:CreateAccessKey", "iam:UpdateAccessKey", "iam:DeactivateMFADevice"]),
+    ("key_rotation", "cg_secretsmanager_cgiddd7ga7gjim", ["secretsmanager:GetSecretValue"],
+     ["secretsmanager:GetSecretValue"]),
+    ("lambda_privesc", "chris-cgidpsfdmder8l", ["iam:Get*", "iam:List*", "sts:AssumeRole"], ["sts:AssumeRole"]),
+    ("lambda_privesc", "cg-lambdaManager-role-cgidpsfdmder8l", ["iam:PassRole", "lambda:*"],
+     ["iam:PassRole", "lambda:CreateFunction", "lambda:UpdateFunctionCode", "lambda:InvokeFunction",
+      "lambda:CreateEventSourceMapping"]),
+    # 전체 허용은 나열 대신 "*" 한 줄
+    ("lambda_privesc", "cg-debug-role-cgidpsfdmder8l", ["*"], ["*"]),
+]
+
+
+@pytest.mark.parametrize("scenario, name, allow, escalation", EFFECTIVE_PERMISSIONS)
+def test_effective_permissions(request, scenario, name, allow, escalation):
+    row = principal(request.getfixturevalue(scenario), name)
+    assert set(allow) <= set(row["allow"])
+    assert row["escalation"] == escalation
+    assert row["deny"] == [] and row["conditional"] == []
+
+
+def test_trusted_services(lambda_privesc):
+    assert principal(lambda_privesc, "cg-debug-role-cgidpsfdmder8l")["trusted_services"] == ["lambda.amazonaws.com"]
+    assert principal(lambda_privesc, "cg-lambdaManager-role-cgidpsfdmder8l")["trusted_services"] == []
+
+
+# (시나리오, 출발, 관계, 도착, 근거 - None 이면 보고되지 않아야 함)
+EDGES = [
+    # 신원 정책(특정 역할 ARN) + 신뢰 정책(계정 root) 모두 허용
+    ("key_rotation", "user admin_cgiddd7ga7gjim", "AssumeRole", "role cg_secretsmanager_cgiddd7ga7gjim", "policy+trust"),
+    # sts:AssumeRole 권한이 없는 사용자
+    ("key_rotation", "user developer_cgiddd7ga7gjim", "AssumeRole", "role cg_secretsmanager_cgiddd7ga7gjim", None),
+    ("key_rotation", "user manager_cgiddd7ga7gjim", "AssumeRole", "role cg_secretsmanager_cgiddd7ga7gjim", None),
+    ("lambda_privesc", "user chris-cgidpsfdmder8l", "AssumeRole", "role cg-lambdaManager-role-cgidpsfdmder8l",
+     "policy+trust"),
+    # 신뢰 정책은 lambda 서비스만 허용 → 그래프 엣지로만 보고
+    ("lambda_privesc", "user chris-cgidpsfdmder8l", "AssumeRole", "role cg-debug-role-cgidpsfdmder8l", "graph-edge"),
+    # PassRole + lambda:CreateFunction, 대상 역할이 lambda 서비스를 신뢰
+    ("lambda_privesc", "role cg-lambdaManager-role-cgidpsfdmder8l", "PassRole", "role cg-debug-role-cgidpsfdmder8l",
+     "lambda.amazonaws.com"),
+    # iam:PassRole 권한이 없음
+    ("lambda_privesc", "user chris-cgidpsfdmder8l", "PassRole", "role cg-debug-role-cgidpsfdmder8l", None),
+    # sts:AssumeRole 권한 없음 (신뢰 정책도 서비스 전용)
+    ("lambda_privesc", "role cg-lambdaManager-role-cgidpsfdmder8l", "AssumeRole", "role cg-debug-role-cgidpsfdmder8l",
+     None),
+]
+
+
+@pytest.mark.parametrize("scenario, src, relation, dst, via", EDGES)
+def test_reachability_edges(request, scenario, src, relation, dst, via):
+    found = {(s, r, d): v for s, r, d, v in request.getfixturevalue(scenario)["edges"]}
+    assert found.get((src, relation, dst)) == via
+
+
+def test_chains(key_rotation, lambda_privesc):
+    assert key_rotation["chains"] == [
+        ["user admin_cgiddd7ga7gjim", "AssumeRole(policy+trust)", "role cg_secretsmanager_cgiddd7ga7gjim"],
+    ]
+    # 사용자 → 역할 AssumeRole → 관리자 역할 PassRole 2단계 연쇄
+    assert [
+        "user chris-cgidpsfdmder8l", "AssumeRole(policy+trust)", "role cg-lambdaManager-role-cgidpsfdmder8l",
+        "PassRole(lambda.amazonaws.com)", "role cg-debug-role-cgidpsfdmder8l",
+    ] in lambda_privesc["chains"]
+    # 역할에서 출발하는 경로는 만들지 않음
+    assert all(chain[0].startswith("user ") for chain in lambda_privesc["chains"])
+
+
+def test_format_summary_lists_multi_hop_chains(lambda_privesc):
+    summary = format_summary(lambda_privesc)
+    assert "# chains" in summary
+    assert "PassRole(lambda.amazonaws.com)-> role cg-debug-role-cgidpsfdmder8l" in summary
+
+
+# (문장 목록, 액션, 리소스, 기대 결과)
+EVALUATIONS = [
+    ([{"Effect": "Allow", "Action": "iam:Get*", "Resource": "*"}], "iam:GetUser", None, ALLOW),
+    ([{"Effect": "Allow", "Action": "iam:Get*"}], "IAM:getuser", None, ALLOW),
+    ([{"Effect": "Allow", "Action": "iam:Get*", "Resource": "*"}], "iam:ListUsers", None, IMPLICIT_DENY),
+    # 명시적 Deny 우선
+    ([{"Effect": "Allow", "Action": "*", "Resource": "*"}, {"Effect": "Deny", "Action": "iam:*", "Resource": "*"}],
+     "iam:PassRole", None, DENY),
+    # 조건부 Allow 는 확정하지 않음
+    ([{"Effect": "Allow", "Action": "sts:AssumeRole", "Resource": "*", "Condition": {"Bool": {"aws:MultiFactorAuthPresent": "true"}}}],
+     "sts:AssumeRole", None, CONDITIONAL),
+    ([{"Effect": "Allow", "NotAction": "iam:*", "Resource": "*"}], "iam:PassRole", None, IMPLICIT_DENY),
+    ([{"Effect": "Allow", "Action": "sts:AssumeRole", "Resource": "arn:aws:iam::1:role/a"}],
+     "sts:AssumeRole", "arn:aws:iam::1:role/b", IMPLICIT_DENY),
+]
+
+
+@pytest.mark.parametrize("statements, action, resource, expected", EVALUATIONS)
+def test_evaluate(statements, action, resource, expected):
+    assert evaluate([Statement(raw) for raw in statements], action, resource) == expected
@@ -0,0 +1,152 @@
+# =========================================================
+# IAM 정책 압축 테스트 (policy_compactor, AWS 호출 없음)
+# 실행: python -m pytest backend/test/test_policy_compactor.py
+# =========================================================
+import importlib
+
+import pytest
+
+from backend.grok import policy_compactor
+from backend.grok.policy_compactor import (
+    compact_policy, check_policy_size, dedupe_actions, merge_statements, POLICY_SIZE_LIMIT,
+)
+
+ALLOW_ALL = {"Effect": "Allow", "Resource": "*"}
+MFA = {"Bool": {"aws:MultiFactorAuthPresent": "true"}}
+
+
+def policy(*statements):
+    return {"Version": "2012-10-17", "Statement": list(statements)}
+
+
+# (입력 액션, 기대 결과)
+DEDUPE_CASES = [
+    (["iam:GetUser", "iam:GetUser"], ["iam:GetUser"]),
+    (["iam:GetUser", "IAM:getuser"], ["iam:GetUser"]),
+    # 같은 목록의 와일드카드가 이미 포함하는 액션
+    (["iam:Get*", "iam:GetUser", "iam:ListUsers"], ["iam:Get*", "iam:ListUsers"]),
+    ("sts:GetCallerIdentity", ["sts:GetCallerIdentity"]),
+]
+
+
+@pytest.mark.parametrize("actions, expected", DEDUPE_CASES)
+def test_dedupe_actions(actions, expected):
+    assert dedupe_actions(actions) == expected
+
+
+# (Statement 목록, 병합 후 Statement 수)
+MERGE_CASES = [
+    # Effect / Resource / Condition 이 같으면 액션을 합침
+    ([{**ALLOW_ALL, "Action": "iam:GetUser"}, {**ALLOW_ALL, "Action": ["iam:GetUser", "iam:ListUsers"]}], 1),
+    # Effect 가 다르면 합치지 않음
+    ([{**ALLOW_ALL, "Action": "iam:GetUser"}, {"Effect": "Deny", "Resource": "*", "Action": "iam:ListUsers"}], 2),
+    # Resource 가 다르면 합치지 않음 (액션 집합도 다름)
+    ([{"Effect": "Allow", "Action": "iam:GetUser", "Resource": "arn:aws:iam::1:user/a"},
+      {"Effect": "Allow", "Action": "iam:ListUsers", "Resource": "arn:aws:iam::1:user/b"}], 2),
+    # Condition 이 다르면 합치지 않음
+    ([{**ALLOW_ALL, "Action": "iam:GetUser"}, {**ALLOW_ALL, "Action": "iam:ListUsers", "Condition": MFA}], 2),
+    # 액션 집합이 같으면 Resource 를 합침
+    ([{"Effect": "Allow", "Action": "iam:GetUser", "Resource": "arn:aws:iam::1:user/a"},
+      {"Effect": "Allow", "Action": "iam:GetUser", "Resource": "arn:aws:iam::1:user/b"}], 1),
+    # NotAction / Principal 이 있는 Statement 는 그대로
+    ([{**ALLOW_ALL, "NotAction": "iam:*"}, {**ALLOW_ALL, "Action": "s3:GetObject"}], 2),
+]
+
+
+@pytest.mark.parametrize("statements, count", MERGE_CASES)
+def test_merge_statements(statements, count):
+    assert len(merge_statements(statements)) == count
+
+
+def test_merge_keeps_condition_and_resources():
+    merged = merge_statements([
+        {"Effect": "Allow", "Action": "iam:GetUser", "Resource": "arn:aws:iam::1:user/b", "Condition": MFA},
+        {"Effect": "Allow", "Action": "iam:GetUser", "Resource": "arn:aws:iam::1:user/a", "Condition": MFA},
+    ])
+    assert merged == [{
+        "Effect": "Allow", "Action": "iam:GetUser",
+        "Resource": ["arn:aws:iam::1:user/a", "arn:aws:iam::1:user/b"], "Condition": MFA,
+    }]
+
+
+def test_compact_does_not_mutate_input():
+    original = policy({**ALLOW_ALL, "Action": ["iam:GetUser", "iam:GetUser"]})
+    snapshot = repr(original)
+    compact_policy(original, wildcards=True)
+    assert repr(original) == snapshot
+
+
+WILDCARD_INPUT = policy({**ALLOW_ALL, "Action": [
+    "iam:GetUser", "iam:GetUserPolicy", "ec2:DescribeInstances", "ec2:DescribeInstanceStatus",
+]})
+
+
+def test_wildcards_off_by_default(monkeypatch):
+    monkeypatch.delenv("MBV_POLICY_WILDCARDS", raising=False)
+    module = importlib.reload(policy_compactor)
+    try:
+        assert module.POLICY_WILDCARDS is False
+        actions = module.compact_policy(WILDCARD_INPUT)["Statement"][0]["Action"]
+        assert not any("*" in a for a in actions)
+    finally:
+        importlib.reload(policy_compactor)
+
+
+# (접두사 허용 목록 설정, 기대 액션) - MBV_POLICY_WILDCARDS=1 일 때
+WILDCARD_CASES = [
+    # 기본값: iam / sts 만 와일드카드 (ec2 는 액션 목록을 확인하지 않은 접두사)
+    (None, ["ec2:DescribeInstanceStatus", "ec2:DescribeInstances", "iam:GetUser*"]),
+    ("sts", ["ec2:DescribeInstanceStatus", "ec2:DescribeInstances", "iam:GetUser", "iam:GetUserPolicy"]),
+]
+
+
+@pytest.mark.parametrize("prefixes, expected", WILDCARD_CASES)
+def test_wildcards_only_for_vetted_prefixes(monkeypatch, prefixes, expected):
+    monkeypatch.setenv("MBV_POLICY_WILDCARDS", "1")
+    if prefixes is None:
+        monkeypatch.delenv("MBV_POLICY_WILDCARD_PREFIXES", raising=False)
+    else:
+        monkeypatch.setenv("MBV_POLICY_WILDCARD_PREFIXES", prefixes)
+    module = importlib.reload(policy_compactor)
+    try:
+        assert module.compact_policy(WILDCARD_INPUT)["Statement"][0]["Action"] == expected
+    finally:
+        monkeypatch.undo()
+        importlib.reload(policy_compactor)
+
+
+def test_wildcard_never_covers_missing_actions():
+    # iam:GetUser* 는 GetUserPolicy 도 포함하므로 GetUser 하나만으로는 만들지 않음
+    compacted = compact_policy(policy({**ALLOW_ALL, "Action": ["iam:GetUser", "iam:GetRole"]}), wildcards=True)
+    assert compacted["Statement"][0]["Action"] == ["iam:GetRole", "iam:GetUser"]
+
+
+def test_size_limit():
+    small = policy({**ALLOW_ALL, "Action": "iam:GetUser"})
+    large = policy({
+        "Effect": "Allow", "Action": "s3:GetObject",
+        "Resource": [f"arn:aws:s3:::bucket-{i:04d}/*" for i in range(300)],
+    })
+    assert check_policy_size(small)["within_limit"]
+    report = check_policy_size(compact_policy(large))
+    assert report["limit"] == POLICY_SIZE_LIMIT == 6144
+    assert report["size"] > 6144 and not report["within_limit"]
+
+
+def test_grok_exe_rejects_oversized_policy(monkeypatch):
+    import json
+    from backend.grok import grok_exe
+
+    invoked = []
+    monkeypatch.setattr(grok_exe.lambda_client, "invoke", lambda **kwargs: invoked.append(kwargs))
+    large = policy({
+        "Effect": "Allow", "Action": "s3:GetObject",
+        "Resource": [f"arn:aws:s3:::bucket-{i:04d}/*" for i in range(300)],
+    })
+    result = grok_exe.run_grok_exe(grok_exe.GrokRequest(
+        grok_result={"choices": [{"message": {"content": json.dumps(large)}}]},
+        user_cli_input="aws s3api get-object --bucket b --key k out",
+    ))
+    assert result["message"] == "error"
+    assert result["compaction"]["within_limit"] is False
+    assert invoked == []
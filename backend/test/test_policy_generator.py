@@ -0,0 +1,105 @@
+# =========================================================
+# 명령 단위 정책 생성 테스트 (policy_generator, 임시 캐시 + 가짜 Grok 응답, 외부 호출 없음)
+# 실행: python -m pytest backend/test/test_policy_generator.py
+# =========================================================
+import asyncio
+import json
+
+import pytest
+
+from backend.grok import policy_generator as pg
+from backend.grok.openrouter_client import GROK_MODEL_ID
+from backend.grok.policy_cache import PolicyCache, normalize_command
+
+# 로컬 해석기가 처리하지 않아 캐시 / Grok 으로 가는 명령
+COMMAND = "aws s3 cp ./a.txt s3://bucket/key"
+POLICY = {"Version": "2012-10-17", "Statement": [
+    {"Effect": "Allow", "Action": "s3:PutObject", "Resource": "arn:aws:s3:::bucket/key"},
+]}
+
+
+def grok_reply(content):
+    return {"choices": [{"message": {"content": content}}]}
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = PolicyCache(str(tmp_path / "policy_cache.sqlite3"))
+    monkeypatch.setattr(pg, "get_policy_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def grok(monkeypatch):
+    """가짜 chat_completion (replies 를 차례로 돌려주고 호출 횟수를 기록)"""
+    state = {"calls": 0, "replies": []}
+
+    async def fake_chat_completion(messages, **kwargs):
+        state["calls"] += 1
+        return state["replies"].pop(0)
+
+    monkeypatch.setattr(pg, "chat_completion", fake_chat_completion)
+    return state
+
+
+def generate(command=COMMAND, use_cache=True):
+    return asyncio.run(pg.generate_command_policy(command, normalize_command(command), use_cache))
+
+
+def test_resolver_skips_cache_and_grok(cache, grok):
+    policy, source, error = generate("aws iam get-user --user-name bob")
+    assert (source, error, grok["calls"]) == ("resolver", None, 0)
+    assert policy["Statement"][0]["Action"] == ["iam:GetUser"]
+
+
+def test_valid_cache_hit_skips_grok(cache, grok):
+    cache.put(GROK_MODEL_ID, normalize_command(COMMAND), grok_reply(json.dumps(POLICY)))
+    assert generate() == (POLICY, "cache", None)
+    assert grok["calls"] == 0
+
+
+# 정책 JSON 을 꺼낼 수 없는 캐시 항목
+UNUSABLE_ENTRIES = [
+    grok_reply("정책을 만들 수 없습니다."),
+    grok_reply(json.dumps({"Version": "2012-10-17"})),
+    grok_reply(None),
+    {"choices": []},
+    {},
+]
+
+
+@pytest.mark.parametrize("entry", UNUSABLE_ENTRIES)
+def test_unusable_cache_entry_is_a_miss(cache, grok, entry):
+    normalized = normalize_command(COMMAND)
+    cache.put(GROK_MODEL_ID, normalized, entry)
+    grok["replies"].append(grok_reply(json.dumps(POLICY)))
+
+    assert generate() == (POLICY, "grok", None)
+    assert grok["calls"] == 1
+    # 잘못된 항목은 지워지고 새 응답이 저장됨
+    assert cache.get(GROK_MODEL_ID, normalized) == grok_reply(json.dumps(POLICY))
+    assert cache.stats()["invalidated"] == 1
+
+
+def test_unusable_cache_entry_with_bad_grok_reply_is_an_error(cache, grok):
+    normalized = normalize_command(COMMAND)
+    cache.put(GROK_MODEL_ID, normalized, grok_reply("없음"))
+    grok["replies"].append(grok_reply("역시 없음"))
+
+    policy, source, error = generate()
+    assert (policy, source) == (None, "grok") and error
+    assert cache.get(GROK_MODEL_ID, normalized) is None
+
+
+def test_generate_policy_reports_error_instead_of_crashing(cache, grok):
+    cache.put(GROK_MODEL_ID, normalize_command(COMMAND), grok_reply("없음"))
+    grok["replies"].append(grok_reply("없음"))
+
+    result = asyncio.run(pg.generate_policy(COMMAND))
+    assert result["policy"] is None and result["errors"] == 1
+    assert result["provenance"][0]["source"] == "grok"
+
+
+def test_delete_missing_entry(cache):
+    assert cache.delete(GROK_MODEL_ID, "aws s3 ls") is False
+    assert cache.stats()["invalidated"] == 0
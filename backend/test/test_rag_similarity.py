@@ -9,16 +9,20 @@ RAG 유사도 검증 테스트
 """
 
 import json
-import boto3
 from qdrant_client import QdrantClient
 from datetime import datetime
+import sys
+import os
+
+# 프로젝트 루트를 경로에 추가 (backend 패키지의 공용 임베딩 모듈 사용)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from backend.embed.embed_cache import get_embedding as _cached_embedding
 
 # --- 설정 ---
 REGION = "ap-northeast-1"
 MODEL_ID = "cohere.embed-v4:0"
 COLLECTION_NAME = "pandyo"
 
-bedrock = boto3.client(service_name='bedrock-runtime', region_name=REGION)
 q_client = QdrantClient(url="http://localhost:6333")
 
 # 테스트 대상 인프라 JSON (사용자 제공)
@@ -254,16 +258,8 @@ TARGET_INFRA = {
 
 
 def get_embedding(text):
-    """Bedrock Cohere embed-v4로 텍스트를 벡터로 변환 (search_query 타입)"""
-    native_request = {
-        "texts": [text],
-        "input_type": "search_query",
-        "truncate": "NONE"
-    }
-    response = bedrock.invoke_model(modelId=MODEL_ID, body=json.dumps(native_request))
-    res_body = json.loads(response.get('body').read())
-    embeddings = res_body.get('embeddings')
-    return embeddings.get('float')[0] if isinstance(embeddings, dict) else embeddings[0]
+    """Bedrock Cohere embed-v4로 텍스트를 벡터로 변환 (search_query 타입, 공용 캐시 사용)"""
+    return _cached_embedding(text, input_type="search_query")
 
 
 def main():
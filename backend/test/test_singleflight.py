@@ -0,0 +1,149 @@
+# =========================================================
+# 동일 요청 합치기 테스트 (singleflight, 이벤트 루프는 asyncio.run 으로 직접 실행)
+# 실행: python -m pytest backend/test/test_singleflight.py
+# =========================================================
+import asyncio
+
+import pytest
+
+from backend.common.singleflight import SingleFlight
+
+
+async def collect(agen, limit=None):
+    items = []
+    async for item in agen:
+        items.append(item)
+        if limit is not None and len(items) == limit:
+            await agen.aclose()
+            break
+    return items
+
+
+@pytest.mark.parametrize("callers", [1, 2, 8])
+def test_do_runs_producer_once(callers):
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def produce():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", produce) for _ in range(callers)))
+        assert results == ["result"] * callers
+        assert (len(calls), flight.started, flight.joined) == (1, 1, callers - 1)
+
+        # 계산이 끝나면 키를 지우므로 다음 요청은 새로 계산
+        await flight.do("key", produce)
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_do_shares_exceptions():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert [str(r) for r in results] == ["boom"] * 3
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("subscribers", [1, 3, 8])
+def test_stream_runs_producer_once(subscribers):
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def produce():
+            calls.append(1)
+            for i in range(5):
+                await asyncio.sleep(0)
+                yield i
+
+        results = await asyncio.gather(*(collect(flight.stream("key", produce)) for _ in range(subscribers)))
+        assert results == [[0, 1, 2, 3, 4]] * subscribers
+        assert (len(calls), flight.started, flight.joined) == (1, 1, subscribers - 1)
+
+    asyncio.run(scenario())
+
+
+def test_late_joiner_gets_replayed_events():
+    async def scenario():
+        flight = SingleFlight("test")
+        gate = asyncio.Event()
+
+        async def produce():
+            yield "a"
+            yield "b"
+            await gate.wait()
+            yield "c"
+
+        first = flight.stream("key", produce)
+        assert [await first.__anext__(), await first.__anext__()] == ["a", "b"]
+
+        # 이미 보낸 이벤트부터 재생한 뒤 이후 이벤트를 함께 받음
+        late = asyncio.ensure_future(collect(flight.stream("key", produce)))
+        await asyncio.sleep(0.01)
+        gate.set()
+        assert await collect(first) == ["c"]
+        assert await late == ["a", "b", "c"]
+        assert flight.joined == 1
+
+    asyncio.run(scenario())
+
+
+def test_stream_error_reaches_every_subscriber():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def produce():
+            yield "a"
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*(collect(flight.stream("key", produce)) for _ in range(2)),
+                                       return_exceptions=True)
+        assert [str(r) for r in results] == ["boom", "boom"]
+
+    asyncio.run(scenario())
+
+
+def test_producer_cancelled_when_last_subscriber_leaves():
+    async def scenario():
+        flight = SingleFlight("test")
+        closed = asyncio.Event()
+
+        async def produce():
+            try:
+                i = 0
+                while True:
+                    yield i
+                    i += 1
+                    await asyncio.sleep(0.001)
+            finally:
+                closed.set()
+
+        first = flight.stream("key", produce)
+        second = flight.stream("key", produce)
+        await first.__anext__()
+        await second.__anext__()
+
+        # 구독자가 남아 있으면 계산은 계속
+        await first.aclose()
+        await asyncio.sleep(0.01)
+        assert not closed.is_set()
+        assert await second.__anext__() is not None
+
+        await second.aclose()
+        await asyncio.wait_for(closed.wait(), timeout=1)
+        await asyncio.sleep(0)
+        assert flight._streams == {}
+
+    asyncio.run(scenario())
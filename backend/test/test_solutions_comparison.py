@@ -22,10 +22,13 @@ JSON 직접 임베딩의 구조적 편향 문제를 해결하기 위한
 import json
 import os
 import math
-import boto3
+import sys
+
+# 프로젝트 루트를 경로에 추가 (backend 패키지의 공용 임베딩 모듈 사용)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from backend.embed.embed_cache import get_embedding as _cached_embedding
 
 # ── Bedrock 설정 ──
-bedrock = boto3.client("bedrock-runtime", region_name="us-east-1")
 MODEL_ID = "cohere.embed-multilingual-v3"
 
 # ── pandyo.json 경로 ──
@@ -126,16 +129,8 @@ def extract_key_structure(resources, title):
 # 임베딩 및 유사도 함수
 # ══════════════════════════════════════════════════
 def get_embedding(text, input_type="search_document"):
-    """Cohere embed-v4로 텍스트를 벡터로 변환"""
-    request_body = {
-        "texts": [text],
-        "input_type": input_type,
-        "truncate": "NONE"
-    }
-    response = bedrock.invoke_model(modelId=MODEL_ID, body=json.dumps(request_body))
-    body = json.loads(response["body"].read())
-    emb = body.get("embeddings")
-    return emb.get("float")[0] if isinstance(emb, dict) else emb[0]
+    """Cohere embed-v4로 텍스트를 벡터로 변환 (공용 캐시 사용)"""
+    return _cached_embedding(text, input_type=input_type, model_id=MODEL_ID, region="us-east-1")
 
 
 def cosine_sim(a, b):
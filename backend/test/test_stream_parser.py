@@ -0,0 +1,88 @@
+# =========================================================
+# LLM 응답 JSON 파서 테스트 (stream_parser, LLM 호출 없음)
+# 실행: python -m pytest backend/test/test_stream_parser.py
+# =========================================================
+import json
+
+import pytest
+
+from backend.llm.stream_parser import VulnerabilityStreamParser, extract_json_from_text
+
+VULNS = [
+    {"title": "PassRole 권한 상승", "severity": "High", "description": "iam:PassRole 로 {관리자} 역할 전달"},
+    {"title": "비밀 노출", "severity": "medium", "description": "\"GetSecretValue\" 허용 [리소스 *]"},
+]
+BODY = json.dumps({"vulnerabilities": VULNS}, ensure_ascii=False)
+
+# (응답 텍스트, 복구된 title 목록)
+COMPLETE_RESPONSES = [
+    (BODY, ["PassRole 권한 상승", "비밀 노출"]),
+    # 마크다운 코드펜스
+    (f"```json\n{BODY}\n```", ["PassRole 권한 상승", "비밀 노출"]),
+    # JSON 앞뒤 설명 문장 (뒤쪽 문장의 중괄호는 무시)
+    (f"분석 결과입니다.\n{BODY}\n위 결과는 {{참고용}} 입니다.", ["PassRole 권한 상승", "비밀 노출"]),
+    # reasoning 블록 안의 중괄호는 JSON 시작으로 보지 않음
+    (f"<reasoning>먼저 {{\"x\": 1}} 를 본다</reasoning>\n{BODY}", ["PassRole 권한 상승", "비밀 노출"]),
+    # 문자열 안의 괄호 / 이스케이프된 따옴표 / 역슬래시
+    ('{"vulnerabilities": [{"title": "a \\"}]\\\\", "severity": "low"}]}', ['a "}]\\']),
+    # 다른 최상위 키의 배열은 원소로 꺼내지 않음
+    ('{"notes": [{"title": "x"}], "vulnerabilities": [{"title": "y", "severity": "low"}]}', ["y"]),
+]
+
+
+@pytest.mark.parametrize("text, titles", COMPLETE_RESPONSES)
+def test_extract_complete_responses(text, titles):
+    result = extract_json_from_text(text)
+    assert [v["title"] for v in result["vulnerabilities"]] == titles
+    assert "parse" not in result
+
+
+@pytest.mark.parametrize("text, titles", COMPLETE_RESPONSES)
+def test_streaming_chunks_match_whole_text(text, titles):
+    parser = VulnerabilityStreamParser()
+    streamed = [item for ch in text for item in parser.feed(ch)]
+    assert [v["title"] for v in streamed] == titles
+    assert parser.complete and parser.result() == extract_json_from_text(text)
+
+
+def test_summary_is_filled_from_severity():
+    assert extract_json_from_text(BODY)["summary"] == {"high": 1, "medium": 1, "low": 0}
+
+
+# (잘린 위치, 복구된 title 목록, 손실 title 목록)
+TRUNCATED = [
+    # 두 번째 원소 작성 도중 (제목은 보고에 남음)
+    (BODY.index('"비밀 노출"') + len('"비밀 노출"') + 5, ["PassRole 권한 상승"], ["비밀 노출"]),
+    # 두 번째 원소 제목 전
+    (BODY.index('{"title": "비밀'), ["PassRole 권한 상승"], []),
+    # 첫 번째 원소 문자열 안 (괄호가 들어있는 위치)
+    (BODY.index("{관리자}") + 2, [], ["PassRole 권한 상승"]),
+]
+
+
+@pytest.mark.parametrize("cut, recovered, lost", TRUNCATED)
+def test_truncated_output_keeps_completed_items(cut, recovered, lost):
+    parser = VulnerabilityStreamParser()
+    parser.feed(BODY[:cut])
+    assert parser.truncated and not parser.complete
+    result = parser.result()
+    assert [v["title"] for v in result["vulnerabilities"]] == recovered
+    assert [x["title"] for x in result["parse"]["lost"]] == lost
+    assert all(x["reason"] == "truncated" for x in result["parse"]["lost"])
+
+
+def test_truncated_text_without_items_is_none():
+    assert extract_json_from_text(BODY[:BODY.index("PassRole")]) is None
+
+
+def test_invalid_element_is_reported_and_skipped():
+    text = '{"vulnerabilities": [{"title": "bad", "severity": high}, {"title": "ok", "severity": "low"}]}'
+    parser = VulnerabilityStreamParser()
+    assert [v["title"] for v in parser.feed(text)] == ["ok"]
+    assert parser.lost_elements() == [{"index": 0, "reason": "invalid_json", "title": "bad",
+                                      "chars": len('{"title": "bad", "severity": high}')}]
+
+
+@pytest.mark.parametrize("text", ["", "JSON 없음", "<reasoning>{\"vulnerabilities\": []}"])
+def test_no_json_returns_none(text):
+    assert extract_json_from_text(text) is None
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
@@ -5,7 +7,21 @@ from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 서버 시작: 분석 작업 저장소/대기열 생성 + 워커 시작, 재시작 전에 끝나지 못한 작업 이어서 실행
+    # (import 가 아니라 서버 시작 시, 잠금을 잡은 프로세스 1개만 실행)
+    from backend.jobs.job_api import get_job_queue, shutdown_job_queue
+    from backend.grok.openrouter_client import close_client
+    get_job_queue().start()
+    yield
+    # 서버 종료: 워커 정리 + 실행 프로세스 잠금 해제 (다른 프로세스가 바로 이어받음)
+    shutdown_job_queue()
+    # OpenRouter(Grok) 공용 클라이언트의 커넥션 풀 정리
+    await close_client()
+
+
+app = FastAPI(lifespan=lifespan)
 templates = Jinja2Templates(directory="templates")
 
 # static 라우트
@@ -47,4 +63,12 @@ app.include_router(mbv_lambda_router)
 
 # CLI 도구 통합 라우팅 (cliCreate 모듈의 모든 라우터)
 from backend.cliCreate.router import router as cli_router
-app.include_router(cli_router)
\ No newline at end of file
+app.include_router(cli_router)
+
+# 단계별 지연 시간 / 토큰 메트릭 (Prometheus)
+from backend.common.telemetry import router as telemetry_router
+app.include_router(telemetry_router)
+
+# 분석 작업 대기열 (작업 id 로 상태/결과 조회)
+from backend.jobs.job_api import router as job_router
+app.include_router(job_router)
\ No newline at end of file
@@ -430,30 +430,166 @@ async function lambda_invoke() {
 // Vulnerability Analysis
 // 취약점 분석
         // 분석 시작
-        function startAnalysis() {
+        // forceRefresh 가 true 면 서버의 분석 결과 캐시를 건너뛰고 새로 분석
+        // 서버에 분석 작업을 등록하고 작업 id 의 SSE (/jobs/{id}/stream) 로 취약점을 받는 대로 표시
+        // 작업은 서버에서 끝까지 실행되므로 연결이 끊겨도 작업 상태를 조회해서 결과를 받을 수 있다
+        function startAnalysis(forceRefresh = false) {
 
             // 디자인적인 부분
             document.getElementById('analysisIdle').style.display = 'none';
             document.getElementById('analysisProgress').classList.remove('hidden');
             document.getElementById('analysisResults').classList.add('hidden');
-            
+            setAnalysisProgress(5, '인프라 구조 분석 중...');
+
+            if (typeof EventSource === 'undefined') {
+                startAnalysisFetch(forceRefresh);
+                return;
+            }
+
+            fetch('/jobs/mbv_search', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ no_cache: forceRefresh })
+            })
+            .then(res => {
+                if (!res.ok) {
+                    throw new Error('분석 작업 등록 실패');
+                }
+                return res.json();
+            })
+            .then(job => {
+                console.log('[MBV 분석 작업]', job);
+                // 스트림 연결이 끊기면 작업 상태 조회로 전환
+                streamAnalysis(`/jobs/${job.job_id}/stream`, () => pollAnalysisJob(job.job_id));
+            })
+            .catch(err => {
+                // 작업 API 를 쓸 수 없으면 기존 스트리밍 방식
+                console.warn('분석 작업 등록 실패 → /mbv_search/stream 으로 재시도', err);
+                streamAnalysis('/mbv_search/stream' + (forceRefresh ? '?no_cache=true' : ''), received => {
+                    // 스트리밍 연결 자체가 안 되면 (프록시 등) 기존 방식으로 재시도
+                    if (received === 0) {
+                        console.warn('SSE 연결 실패 → /mbv_search 로 재시도');
+                        startAnalysisFetch(forceRefresh);
+                    } else {
+                        setAnalysisProgress(100, `연결이 끊겼습니다 (취약점 ${received}건 수신).`);
+                    }
+                });
+            });
+        }
+
+        // SSE 로 분석 이벤트 수신 (onConnectionLost(받은 취약점 수): 서버 오류가 아닌 연결 오류일 때)
+        function streamAnalysis(url, onConnectionLost) {
+            const source = new EventSource(url);
+            let received = 0;
+            let finished = false;
+
+            source.addEventListener('infrastructure', e => {
+                const infrastructure = JSON.parse(e.data);
+                document.getElementById('infrastructureJSON').textContent = JSON.stringify(infrastructure, null, 2);
+                setAnalysisProgress(15, '유사 취약점 문서 검색 중...');
+            });
+
+            source.addEventListener('documents', e => {
+                const documents = JSON.parse(e.data);
+                console.log('[MBV 검색 문서]', documents);
+                if (documents.length > 0) {
+                    setAnalysisProgress(25, `문서 ${documents.length}건으로 LLM 분석 중...`);
+                }
+            });
+
+            source.addEventListener('vulnerability', e => {
+                const vuln = JSON.parse(e.data);
+                // 첫 취약점이 도착하면 결과 화면으로 전환하고 이후는 카드만 추가
+                if (received === 0) {
+                    document.getElementById('analysisResults').classList.remove('hidden');
+                    document.getElementById('vulnerabilityList').innerHTML = '';
+                }
+                received++;
+                document.getElementById('vulnerabilityList').appendChild(renderVulnerabilityCard(vuln, received - 1));
+                setAnalysisProgress(Math.min(25 + received * 10, 90), `취약점 ${received}건 발견, 분석 계속 중...`);
+            });
+
+            source.addEventListener('done', e => {
+                finished = true;
+                source.close();
+                const data = JSON.parse(e.data);
+                data.infrastructure = JSON.parse(document.getElementById('infrastructureJSON').textContent || 'null');
+                console.log('[MBV 분석 결과]', data);
+                setAnalysisProgress(100, '100% 완료');
+                showAnalysisResults(data);
+            });
+
+            // 서버가 보낸 error 이벤트 (data 있음) 와 연결 오류 (data 없음) 모두 여기로 옴
+            source.addEventListener('error', e => {
+                if (finished) return;
+                source.close();
+                if (e.data) {
+                    console.error('취약점 분석 API 에러:', JSON.parse(e.data).error);
+                    setAnalysisProgress(100, '분석 중 오류가 발생했습니다.');
+                    return;
+                }
+                onConnectionLost(received);
+            });
+        }
+
+        // 작업 상태 조회 (스트림 연결이 끊긴 뒤 작업이 끝날 때까지 반복)
+        function pollAnalysisJob(jobId) {
+            fetch(`/jobs/${jobId}`)
+            .then(res => {
+                if (res.status === 404) {
+                    // 보관 기간이 지나 삭제됐거나 모르는 작업 → 다시 조회해도 소용없음
+                    return null;
+                }
+                if (!res.ok) {
+                    throw new Error('작업 상태 조회 실패');
+                }
+                return res.json();
+            })
+            .then(job => {
+                if (job === null) {
+                    console.error('취약점 분석 작업을 찾을 수 없습니다:', jobId);
+                    setAnalysisProgress(100, '분석 작업을 찾을 수 없습니다. 다시 분석해 주세요.');
+                    return;
+                }
+                if (job.status === 'queued' || job.status === 'running') {
+                    setAnalysisProgress(90, '연결이 끊겼지만 서버에서 분석이 계속 진행 중입니다...');
+                    setTimeout(() => pollAnalysisJob(jobId), 2000);
+                    return;
+                }
+                if (job.status === 'succeeded') {
+                    console.log('[MBV 분석 결과]', job.result);
+                    setAnalysisProgress(100, '100% 완료');
+                    showAnalysisResults(job.result);
+                    return;
+                }
+                console.error('취약점 분석 작업 실패:', job.status, job.error);
+                setAnalysisProgress(100, '분석 중 오류가 발생했습니다.');
+            })
+            .catch(err => {
+                // 서버 재시작 중일 수 있으므로 잠시 뒤 다시 조회 (작업은 재시작 후 이어서 실행됨)
+                console.warn(err);
+                setTimeout(() => pollAnalysisJob(jobId), 5000);
+            });
+        }
+
+        function setAnalysisProgress(percent, text) {
+            document.getElementById('analysisProgressBar').style.width = percent + '%';
+            document.getElementById('progressText').textContent = text;
+        }
+
+        // 스트리밍을 쓸 수 없을 때: 전체 결과를 한 번에 받아서 표시
+        function startAnalysisFetch(forceRefresh = false) {
             let progress = 0;
             const interval = setInterval(() => {
                 progress += 10;
-                document.getElementById('analysisProgressBar').style.width = progress + '%';
-                document.getElementById('progressText').textContent = progress + '% 완료';
-                
-                if (progress >= 100) {
+                setAnalysisProgress(Math.min(progress, 90), Math.min(progress, 90) + '% 완료');
+                if (progress >= 90) {
                     clearInterval(interval);
-                    // setTimeout(() => {
-                    //     showAnalysisResults();
-                    // }, 500);
                 }
             }, 300);
 
-            
-                    ////////
-        //     // API 호출
              fetch('/mbv_search', {
                  method: 'POST',
                  headers: {
@@ -461,7 +597,8 @@ async function lambda_invoke() {
                  },
                  body: JSON.stringify(
                      {
-                         step: 'vulnerability_analysis'
+                         step: 'vulnerability_analysis',
+                         no_cache: forceRefresh
                      }
                  )
              })
@@ -473,12 +610,14 @@ async function lambda_invoke() {
              })
              .then(data => {
                  console.log('[MBV 분석 결과]', data);
+                clearInterval(interval);
+                setAnalysisProgress(100, '100% 완료');
                 showAnalysisResults(data);
              })
              .catch(err => {
+                 clearInterval(interval);
                  console.error('취약점 분석 API 에러:', err);
              });
-             /////////
          }
 
 
@@ -522,15 +661,22 @@ container.innerHTML = `
     }
             
             vulnerabilities.forEach((vuln, index) => {
+                container.appendChild(renderVulnerabilityCard(vuln, index));
+            });
+        }
+
+        // 취약점 카드 1개 생성 (전체 결과 표시 / 스트리밍 수신 공용)
+        function renderVulnerabilityCard(vuln, index) {
                 const card = document.createElement('div');
                 card.className = `vulnerability-card ${vuln.severity}`;
                 
                 const badgeClass = vuln.severity === 'high' ? 'badge-danger' : vuln.severity === 'medium' ? 'badge-warning' : 'badge-secondary';
+                const attackPath = vuln.attackPath || [];
                 
                 let attackPathHTML = '<div class="attack-path">';
-                vuln.attackPath.forEach((step, i) => {
+                attackPath.forEach((step, i) => {
                     attackPathHTML += `<span class="attack-path-item">${step}</span>`;
-                    if (i < vuln.attackPath.length - 1) {
+                    if (i < attackPath.length - 1) {
                         attackPathHTML += '<span class="attack-path-arrow">→</span>';
                     }
                 });
@@ -541,7 +687,7 @@ container.innerHTML = `
                         <div>
                             <h3 style="font-weight: 600; margin-bottom: 4px;">${index + 1}. ${vuln.title}</h3>
                             <div style="display: flex; gap: 8px; margin-top: 8px;">
-                                <span class="badge ${badgeClass}">${vuln.severity.toUpperCase()}</span>
+                                <span class="badge ${badgeClass}">${String(vuln.severity).toUpperCase()}</span>
                                 <span class="badge badge-secondary">CVSS: ${vuln.cvss_score}</span>
                             </div>
                         </div>
@@ -564,8 +710,7 @@ container.innerHTML = `
                     </div>
                 `;
                 
-                container.appendChild(card);
-            });
+                return card;
         }
 
         // Execution